@@ -41,6 +41,9 @@ export interface TrendPoint {
   date: string;
   area: string | null;
   avg_price: number;
+  median_price: number | null;
+  min_price: number;
+  max_price: number;
   count: number;
 }
 
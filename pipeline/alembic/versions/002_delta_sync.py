@@ -0,0 +1,36 @@
+"""Listing content hash and sync watermark for delta sync.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("content_hash", sa.String(16), nullable=True))
+    op.add_column("listings", sa.Column("changed_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_listings_changed_at", "listings", ["changed_at"], unique=False)
+
+    op.create_table(
+        "sync_state",
+        sa.Column("name", sa.String(64), nullable=False),
+        sa.Column("last_synced_at", sa.DateTime(), nullable=False),
+        sa.Column("last_recorded_at", sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_state")
+    op.drop_index("ix_listings_changed_at", table_name="listings")
+    op.drop_column("listings", "changed_at")
+    op.drop_column("listings", "content_hash")
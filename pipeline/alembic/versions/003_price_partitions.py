@@ -0,0 +1,108 @@
+"""Partition listing_price_history by month; area_daily_stats rollup.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 00:00:00
+
+On PostgreSQL, listing_price_history becomes a table range-partitioned by
+recorded_at month (primary key (id, recorded_at)). Partitions are created for
+every month with data through two months ahead; the loader adds later ones.
+Other databases keep the plain table.
+"""
+from datetime import date
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "listing_price_history"
+
+
+def _months(first: date, last: date):
+    """First day of every month from first's month through last's month."""
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_partition(parent: str, month: date) -> None:
+    upper = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLE}_y{month.year:04d}m{month.month:02d} PARTITION OF {parent}"
+        f" FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_listing_price_recorded", TABLE, ["listing_id", "recorded_at"], unique=True)
+    op.create_index("ix_listing_price_history_listing_id", TABLE, ["listing_id"], unique=False)
+    op.create_index("ix_listing_price_history_recorded_at", TABLE, ["recorded_at"], unique=False)
+
+
+def _swap_table(create_sql: str, partitioned: bool) -> None:
+    """Create the new table as <TABLE>_new, copy the rows, drop the old table and rename."""
+    op.execute(create_sql)
+    if partitioned:
+        bounds = op.get_bind().execute(sa.text(f"SELECT min(recorded_at), max(recorded_at) FROM {TABLE}")).one()
+        today = date.today()
+        last = max(bounds[1] or today, today)
+        last = date(last.year + (last.month + 1) // 12, (last.month + 1) % 12 + 1, 1)
+        for month in _months(min(bounds[0] or today, today), last):
+            _create_partition(f"{TABLE}_new", month)
+    op.execute(
+        f"INSERT INTO {TABLE}_new (id, listing_id, price, recorded_at)"
+        f" SELECT id, listing_id, price, recorded_at FROM {TABLE}"
+    )
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+    op.execute(f"DROP TABLE {TABLE}")
+    op.execute(f"ALTER TABLE {TABLE}_new RENAME TO {TABLE}")
+    op.execute(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {TABLE}_new_pkey TO {TABLE}_pkey")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    _create_indexes()
+
+
+def upgrade() -> None:
+    op.create_table(
+        "area_daily_stats",
+        sa.Column("recorded_at", sa.Date(), nullable=False),
+        sa.Column("area", sa.String(256), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("avg_price", sa.Float(), nullable=False),
+        sa.Column("median_price", sa.Float(), nullable=False),
+        sa.Column("min_price", sa.Float(), nullable=False),
+        sa.Column("max_price", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("recorded_at", "area"),
+    )
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _swap_table(
+        f"CREATE TABLE {TABLE}_new ("
+        f" id integer NOT NULL DEFAULT nextval('{TABLE}_id_seq'),"
+        " listing_id integer NOT NULL REFERENCES listings (id) ON DELETE CASCADE,"
+        " price double precision,"
+        " recorded_at date NOT NULL,"
+        f" CONSTRAINT {TABLE}_new_pkey PRIMARY KEY (id, recorded_at)"
+        ") PARTITION BY RANGE (recorded_at)",
+        partitioned=True,
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _swap_table(
+            f"CREATE TABLE {TABLE}_new ("
+            f" id integer NOT NULL DEFAULT nextval('{TABLE}_id_seq'),"
+            " listing_id integer NOT NULL REFERENCES listings (id) ON DELETE CASCADE,"
+            " price double precision,"
+            " recorded_at date NOT NULL,"
+            f" CONSTRAINT {TABLE}_new_pkey PRIMARY KEY (id)"
+            ")",
+            partitioned=False,
+        )
+    op.drop_table("area_daily_stats")
@@ -0,0 +1,54 @@
+"""Analytics output tables: area_price_trends, listing_metrics.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "area_price_trends",
+        sa.Column("recorded_at", sa.Date(), nullable=False),
+        sa.Column("area", sa.String(256), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("median_price", sa.Float(), nullable=False),
+        sa.Column("rolling_median", sa.Float(), nullable=False),
+        sa.Column("p10", sa.Float(), nullable=False),
+        sa.Column("p25", sa.Float(), nullable=False),
+        sa.Column("p75", sa.Float(), nullable=False),
+        sa.Column("p90", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("recorded_at", "area"),
+    )
+    op.create_table(
+        "listing_metrics",
+        sa.Column("listing_id", sa.Integer(), nullable=False),
+        sa.Column("last_seen_at", sa.Date(), nullable=False),
+        sa.Column("days_on_market", sa.Integer(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=False),
+        sa.Column("last_price", sa.Float(), nullable=False),
+        sa.Column("price_changes", sa.Integer(), nullable=False),
+        sa.Column("previous_price", sa.Float(), nullable=True),
+        sa.Column("last_change_at", sa.Date(), nullable=True),
+        sa.Column("last_change_pct", sa.Float(), nullable=True),
+        sa.Column("area_percentile", sa.Float(), nullable=False),
+        sa.Column("outlier_score", sa.Float(), nullable=True),
+        sa.Column("is_outlier", sa.Boolean(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("listing_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("listing_metrics")
+    op.drop_table("area_price_trends")
@@ -0,0 +1,84 @@
+"""
+Price-trend analytics over listing history: loads price rows in bulk into
+pandas, computes per-area distributions and rolling medians and per-listing
+price changes, days on market and outlier scores with vectorized operations,
+and writes the results back in bulk (area_price_trends, listing_metrics).
+Needs numpy and pandas.
+"""
+import logging
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import true
+
+from analytics.history import load_first_seen, load_history
+from analytics.store import write_frame
+from analytics.trends import area_trends, listing_metrics, price_changes
+from models import AreaPriceTrend, ListingMetrics, get_session
+from scraper.config import ANALYTICS_DAYS, ANALYTICS_OUTLIER_Z, ANALYTICS_ROLLING_DAYS
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "AnalyticsReport",
+    "area_trends",
+    "listing_metrics",
+    "load_history",
+    "price_changes",
+    "run_analytics",
+]
+
+
+@dataclass
+class AnalyticsReport:
+    history_rows: int = 0
+    area_days: int = 0
+    listings: int = 0
+    outliers: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def run_analytics(
+    as_of: Optional[date] = None,
+    days: int = ANALYTICS_DAYS,
+    rolling_days: int = ANALYTICS_ROLLING_DAYS,
+    outlier_z: float = ANALYTICS_OUTLIER_Z,
+) -> AnalyticsReport:
+    """
+    Recompute area trends for the last days days up to as_of (default today) and metrics for
+    every listing priced in that window, replacing the previous results in one transaction.
+    """
+    as_of = as_of or date.today()
+    since = as_of - timedelta(days=days - 1)
+    session = get_session()
+    try:
+        # Load rolling_days extra so the first written day has a full rolling window
+        history = load_history(session, since - timedelta(days=rolling_days - 1))
+        history = history[history["recorded_at"] <= pd.Timestamp(as_of)]
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        trends = area_trends(history, rolling_days)
+        trends = trends[trends["recorded_at"] >= pd.Timestamp(since)].assign(computed_at=now)
+        in_window = history[history["recorded_at"] >= pd.Timestamp(since)]
+        metrics = listing_metrics(in_window, load_first_seen(session), outlier_z, as_of)
+        if not metrics.empty:
+            metrics = metrics.assign(computed_at=now)
+        table = AreaPriceTrend.__table__
+        report = AnalyticsReport(history_rows=len(history))
+        report.area_days = write_frame(
+            session, table, trends, (table.c.recorded_at >= since) & (table.c.recorded_at <= as_of)
+        )
+        # Listings not priced in the window keep no metrics
+        report.listings = write_frame(session, ListingMetrics.__table__, metrics, true())
+        report.outliers = int(metrics["is_outlier"].sum()) if not metrics.empty else 0
+        session.commit()
+        logger.info("Analytics: %s", report.as_dict())
+        return report
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,22 @@
+"""python -m analytics [--days N] [--as-of YYYY-MM-DD]: recompute trend analytics."""
+import argparse
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+# Ensure pipeline root is on path when run as python -m analytics from elsewhere
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analytics import run_analytics
+from scraper.config import ANALYTICS_DAYS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute area trends and listing metrics.")
+    parser.add_argument("--days", type=int, default=ANALYTICS_DAYS, help="days of area trends to rewrite")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="last day (default: today)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    report = run_analytics(args.as_of, args.days)
+    print(f"Analytics: {report.history_rows} history rows, {report.area_days} area-days, "
+          f"{report.listings} listings, {report.outliers} outliers.")
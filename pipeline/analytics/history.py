@@ -0,0 +1,55 @@
+"""
+Bulk load of price history into columnar pandas frames. On PostgreSQL the
+rows are streamed with COPY ... TO STDOUT and parsed by pandas' C reader, so
+tens of millions of rows load without per-row Python objects.
+"""
+import io
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+HISTORY_COLUMNS = ("listing_id", "recorded_at", "price", "area")
+_HISTORY_SQL = (
+    "SELECT h.listing_id, h.recorded_at, h.price, COALESCE(l.area, '') AS area"
+    " FROM listing_price_history h JOIN listings l ON l.id = h.listing_id"
+    " WHERE h.price IS NOT NULL AND h.recorded_at >= {since}"
+)
+_LISTINGS_SQL = "SELECT id AS listing_id, first_seen_at FROM listings"
+
+
+def _copy_frame(session: Session, sql: str, params: tuple, names, dtype: dict, dates) -> pd.DataFrame:
+    """PostgreSQL: COPY a query's rows out as CSV and parse them in one pass."""
+    cursor = session.connection().connection.cursor()
+    buf = io.BytesIO()
+    cursor.copy_expert(f"COPY ({cursor.mogrify(sql, params).decode()}) TO STDOUT WITH (FORMAT csv)", buf)
+    buf.seek(0)
+    # na_filter off: '' is a real area value and the queries never return NULL prices
+    return pd.read_csv(buf, names=list(names), dtype=dtype, parse_dates=list(dates), na_filter=False)
+
+
+def load_history(session: Session, since: date) -> pd.DataFrame:
+    """
+    Priced history rows since a day as a frame (listing_id int64, recorded_at datetime64,
+    price float64, area category), sorted by listing then day.
+    """
+    dtype = {"listing_id": "int64", "price": "float64", "area": "category"}
+    if session.get_bind().dialect.name == "postgresql":
+        frame = _copy_frame(session, _HISTORY_SQL.format(since="%s"), (since,), HISTORY_COLUMNS, dtype, ["recorded_at"])
+    else:
+        frame = pd.read_sql_query(
+            text(_HISTORY_SQL.format(since=":since")), session.connection(), params={"since": since}
+        ).astype(dtype)
+        frame["recorded_at"] = pd.to_datetime(frame["recorded_at"])
+    return frame.sort_values(["listing_id", "recorded_at"], kind="stable", ignore_index=True)
+
+
+def load_first_seen(session: Session) -> pd.Series:
+    """listings.first_seen_at (datetime64) indexed by listing id."""
+    if session.get_bind().dialect.name == "postgresql":
+        frame = _copy_frame(session, _LISTINGS_SQL, (), ("listing_id", "first_seen_at"), {"listing_id": "int64"}, ["first_seen_at"])
+    else:
+        frame = pd.read_sql_query(text(_LISTINGS_SQL), session.connection())
+        frame["first_seen_at"] = pd.to_datetime(frame["first_seen_at"])
+    return frame.set_index("listing_id")["first_seen_at"]
@@ -0,0 +1,47 @@
+"""Bulk write-back of analytics frames: COPY on PostgreSQL, executemany elsewhere."""
+import io
+from datetime import date
+import pandas as pd
+from sqlalchemy import Table, delete
+from sqlalchemy.orm import Session
+
+
+def write_frame(session: Session, table: Table, frame: pd.DataFrame, replace=None, chunk_rows: int = 10000) -> int:
+    """
+    Insert frame's rows (columns named as in table) after deleting the rows matched by the
+    replace clause (None: keep existing rows). Returns the number of rows written.
+    """
+    if replace is not None:
+        session.execute(delete(table).where(replace))
+    if frame.empty:
+        return 0
+    columns = [c.name for c in table.columns if c.name in frame.columns]
+    frame = frame[columns]
+    if session.get_bind().dialect.name == "postgresql":
+        buf = io.StringIO(_copy_csv(frame, table))
+        cursor = session.connection().connection.cursor()
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+        return len(frame)
+    for start in range(0, len(frame), chunk_rows):
+        session.execute(table.insert(), _records(frame.iloc[start:start + chunk_rows], table))
+    return len(frame)
+
+
+def _copy_csv(frame: pd.DataFrame, table: Table) -> str:
+    """Frame as COPY csv: Date columns as dates, timestamps with their time, empty fields for NULL."""
+    frame = frame.copy()
+    for column in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]) and table.columns[column].type.python_type is date:
+            frame[column] = frame[column].dt.date
+    # Empty unquoted CSV fields are NULL for COPY
+    return frame.to_csv(index=False, header=False, na_rep="")
+
+
+def _records(frame: pd.DataFrame, table: Table) -> list:
+    """Rows as dicts of Python values (dates for Date columns, None for NaN/NaT)."""
+    out = frame.astype(object).where(frame.notna(), None)
+    for column in frame.columns:
+        # Timestamps pass as datetimes; Date columns need dates
+        if pd.api.types.is_datetime64_any_dtype(frame[column]) and table.columns[column].type.python_type is date:
+            out[column] = [v.date() if v is not None else None for v in out[column]]
+    return out.to_dict("records")
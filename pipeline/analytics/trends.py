@@ -0,0 +1,106 @@
+"""
+Vectorized trend metrics over a history frame from load_history (sorted by
+listing_id, recorded_at). Every function works on whole columns: grouped
+aggregates, shifted arrays and masks, no per-row Python.
+"""
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# Scales the median absolute deviation to a standard deviation for normal data
+_MAD_SCALE = 0.6745
+
+
+def area_trends(history: pd.DataFrame, rolling_days: int = 7) -> pd.DataFrame:
+    """
+    One row per (area, recorded_at): count, p10/p25/median/p75/p90 of the day's prices
+    and rolling_median, the median of the area's daily medians over the last rolling_days days.
+    """
+    grouped = history.groupby(["area", "recorded_at"], observed=True, sort=True)["price"]
+    quantiles = grouped.quantile(list(PERCENTILES)).unstack()
+    quantiles.columns = ["p10", "p25", "median_price", "p75", "p90"]
+    trends = quantiles.join(grouped.size().rename("count")).reset_index()
+    trends["rolling_median"] = (
+        trends.groupby("area", observed=True, sort=False)
+        .rolling(f"{rolling_days}D", on="recorded_at")["median_price"]
+        .median()
+        .to_numpy()
+    )
+    return trends
+
+
+def price_changes(history: pd.DataFrame) -> pd.DataFrame:
+    """Every day a listing's price differed from its previous recorded price (previous_price, change_pct)."""
+    ids = history["listing_id"].to_numpy()
+    prices = history["price"].to_numpy()
+    same = np.zeros(len(ids), dtype=bool)
+    same[1:] = ids[1:] == ids[:-1]
+    previous = np.full(len(prices), np.nan)
+    previous[1:] = prices[:-1]
+    changed = same & (prices != previous)
+    changes = history.loc[changed, ["listing_id", "recorded_at", "price"]].copy()
+    changes["previous_price"] = previous[changed]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes["change_pct"] = np.where(
+            changes["previous_price"] != 0, (changes["price"] / changes["previous_price"] - 1) * 100, np.nan
+        )
+    return changes.reset_index(drop=True)
+
+
+def listing_metrics(
+    history: pd.DataFrame,
+    first_seen: Optional[pd.Series] = None,
+    outlier_z: float = 3.5,
+    as_of: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    One row per listing as of its last recorded price: days on market (from first_seen, or the
+    first day in history), active (seen on the last day), price change count and the latest change,
+    percentile rank within its area that day, and a robust z-score of log(price) against the
+    area's prices that day (median / MAD), flagged as an outlier above outlier_z.
+    """
+    if history.empty:
+        return pd.DataFrame()
+    ids = history["listing_id"].to_numpy()
+    is_last = np.ones(len(ids), dtype=bool)
+    is_last[:-1] = ids[1:] != ids[:-1]
+    is_first = np.ones(len(ids), dtype=bool)
+    is_first[1:] = ids[1:] != ids[:-1]
+
+    metrics = history.loc[is_last, ["listing_id", "recorded_at", "area", "price"]].rename(
+        columns={"recorded_at": "last_seen_at", "price": "last_price"}
+    )
+    metrics = metrics.set_index("listing_id")
+    start = pd.Series(history["recorded_at"].to_numpy()[is_first], index=ids[is_first])
+    if first_seen is not None:
+        # first_seen is a timestamp (listings.first_seen_at); days on market counts calendar days
+        known = first_seen.reindex(start.index).dt.normalize()
+        start = known.where(known < start, start)
+    metrics["days_on_market"] = (metrics["last_seen_at"] - start).dt.days + 1
+    last_day = pd.Timestamp(as_of) if as_of else history["recorded_at"].max()
+    metrics["active"] = metrics["last_seen_at"] >= last_day
+
+    changes = price_changes(history)
+    metrics["price_changes"] = changes.groupby("listing_id").size().reindex(metrics.index, fill_value=0)
+    latest = changes.drop_duplicates("listing_id", keep="last").set_index("listing_id")
+    metrics["previous_price"] = latest["previous_price"]
+    metrics["last_change_at"] = latest["recorded_at"]
+    metrics["last_change_pct"] = latest["change_pct"]
+
+    # Rank and robust z-score of every price among its area's prices that day, on the days
+    # that are some listing's last; each listing then takes the values of its own last row
+    peers = history[history["recorded_at"].isin(np.unique(history["recorded_at"].to_numpy()[is_last]))]
+    groups = [peers["area"], peers["recorded_at"]]
+    log_price = np.log(peers["price"].where(peers["price"] > 0))
+    deviation = log_price - log_price.groupby(groups, observed=True).transform("median")
+    mad = deviation.abs().groupby(groups, observed=True).transform("median")
+    last_rows = history.index[is_last]
+    metrics["area_percentile"] = (
+        peers["price"].groupby(groups, observed=True).rank(pct=True, method="max").reindex(last_rows).to_numpy()
+    )
+    metrics["outlier_score"] = (_MAD_SCALE * deviation / mad.replace(0, np.nan)).reindex(last_rows).to_numpy()
+    metrics["is_outlier"] = metrics["outlier_score"].abs() > outlier_z
+    return metrics.drop(columns="area").reset_index()
@@ -0,0 +1,106 @@
+"""
+Benchmark: HTML extraction throughput per parser backend (ExampleListingExtractor).
+
+    python benchmarks/bench_extract.py --corpus ./saved_pages
+    python benchmarks/bench_extract.py --pages 200 --listings 100
+
+Runs extract_page (full parse: listings + links) for every installed backend,
+plus iter_from_html with a partial parse where the backend supports it, over
+a corpus of saved pages (*.html); without --corpus, synthetic pages are used.
+Reports pages/sec and listings/sec, and checks that every backend extracts
+the same listings as bs4.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scraper.extractors.example import ExampleListingExtractor
+from scraper.extractors.parsers import BACKENDS, available_backends, get_backend
+
+
+def synthetic_page(n: int, listings: int) -> str:
+    blocks = "\n".join(
+        f"""
+    <article class="listing" data-listing data-id="p{n}-{i}">
+      <!-- card {i} -->
+      <h2 class="title">  Listing {i} on page {n} </h2>
+      <div class="meta"><span class="price">${100_000 + n * 1000 + i:,}</span>
+        <span class="address">{i} Bench St, Unit {n}</span>
+        <span class="area" data-area>Area {i % 25}</span></div>
+      <p class="desc">{"Bright, quiet, close to transit. " * 6}</p>
+      <a href="/listing/{n}-{i}">Details</a>
+    </article>"""
+        for i in range(listings)
+    )
+    return f"""<!doctype html>
+<html><head><title>Results page {n}</title>
+<script>window.__state = {{"page": {n}}};</script>
+<style>.listing {{ margin: 1em; }}</style></head>
+<body><header><nav>{"<a href='/x'>Nav</a> " * 30}</nav></header>
+<main>{blocks}</main>
+<nav class="pagination"><a class="next" rel="next" href="/results?page={n + 1}">Next</a></nav>
+<footer>{"<p>Footer text</p>" * 20}</footer></body></html>"""
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    pages = []
+    for path in sorted(Path(directory).rglob("*.htm*")):
+        pages.append((path.read_text(encoding="utf-8", errors="replace"), f"https://bench.invalid/{path.name}"))
+    return pages
+
+
+def run(label: str, fn, pages: List[Tuple[str, str]], repeat: int) -> List[list]:
+    results = []
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(html, url) for html, url in pages]
+        best = min(best, time.perf_counter() - start)
+    listings = sum(len(r) for r in results)
+    print(f"{label:>18}: {len(pages) / best:9.1f} pages/s  {listings / best:11.0f} listings/s  ({best:.3f}s)")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved listing pages (*.html)")
+    parser.add_argument("--pages", type=int, default=100, help="synthetic pages when no corpus is given")
+    parser.add_argument("--listings", type=int, default=50, help="listings per synthetic page")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per backend; best time is reported")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+        if not pages:
+            print(f"No *.html files under {args.corpus}")
+            return 1
+    else:
+        pages = [(synthetic_page(n, args.listings), f"https://bench.invalid/results?page={n}") for n in range(args.pages)]
+    print(f"{len(pages)} pages, {sum(len(h) for h, _ in pages) / 1e6:.1f} MB of HTML")
+
+    installed = available_backends()
+    outputs = {}
+    for name in args.backends.split(","):
+        if name not in installed:
+            print(f"{name:>18}: not installed, skipped")
+            continue
+        extractor = ExampleListingExtractor(backend=name, partial=False)
+        results = run(f"{name} page", lambda h, u: extractor.extract_page(h, u)[0], pages, args.repeat)
+        if get_backend(name).supports_partial:
+            partial = ExampleListingExtractor(backend=name, partial=True)
+            run(f"{name} partial", partial.extract_from_html, pages, args.repeat)
+        outputs[name] = [[item.to_dict() for item in page] for page in results]
+    reference = outputs.get("bs4")
+    for name, rows in outputs.items():
+        if reference is not None and rows != reference:
+            print(f"WARNING: {name} extracts different listings than bs4")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Benchmark: extraction throughput vs worker processes (scraper.extract_pool).
+
+    python benchmarks/bench_extract_scaling.py --pages 400 --workers 1,2,4,8,16
+    python benchmarks/bench_extract_scaling.py --corpus ./saved_pages --backend bs4
+
+Extracts the same pages inline (main thread) and with ExtractPool at each
+worker count, and prints pages/sec, speedup over inline and parallel
+efficiency. Pool start-up is excluded (one warm-up pass per pool).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_extract import load_corpus, synthetic_page
+from scraper.extract_pool import ExtractPool, Page
+from scraper.extractors.example import ExampleListingExtractor
+
+
+def main() -> int:
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16, 32) if n <= max(cpus, 2))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved listing pages (*.html)")
+    parser.add_argument("--pages", type=int, default=400, help="synthetic pages when no corpus is given")
+    parser.add_argument("--listings", type=int, default=50, help="listings per synthetic page")
+    parser.add_argument("--workers", default=default_workers, help="comma-separated worker counts")
+    parser.add_argument("--backend", default="auto", help="parser backend (auto, selectolax, lxml, bs4)")
+    parser.add_argument("--unordered", action="store_true", help="yield results as chunks finish")
+    args = parser.parse_args()
+
+    if args.corpus:
+        raw = load_corpus(args.corpus)
+    else:
+        raw = [(synthetic_page(n, args.listings), f"https://bench.invalid/results?page={n}") for n in range(args.pages)]
+    pages = [Page(url, html) for html, url in raw]
+    extractor = ExampleListingExtractor(backend=args.backend)
+    print(f"{len(pages)} pages, backend {extractor.parser.name}, {cpus} CPUs")
+
+    start = time.perf_counter()
+    expected = sum(len(extractor.extract_page(p.html, p.url)[0]) for p in pages)
+    inline = len(pages) / (time.perf_counter() - start)
+    print(f"{'inline':>8}: {inline:9.1f} pages/s")
+
+    for workers in (int(n) for n in args.workers.split(",")):
+        with ExtractPool(workers) as pool:
+            list(pool.map(extractor, pages[: workers * 4]))   # start workers, warm caches
+            start = time.perf_counter()
+            listings = sum(len(r.items) for r in pool.map(extractor, pages, ordered=not args.unordered))
+            rate = len(pages) / (time.perf_counter() - start)
+            chunk = pool.chunk_pages
+        check = "" if listings == expected else f"  MISMATCH: {listings} listings, expected {expected}"
+        print(
+            f"{workers:>8}: {rate:9.1f} pages/s  speedup {rate / inline:5.2f}x  "
+            f"efficiency {rate / inline / workers:5.0%}  chunk {chunk}{check}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
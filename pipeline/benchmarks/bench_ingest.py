@@ -0,0 +1,62 @@
+"""
+Benchmark: ingest payload encoding per format (json, ndjson, msgpack) and JSON encoder.
+
+    python benchmarks/bench_ingest.py --items 500000
+
+Encodes the same listings into IngestClient chunk bodies, once from dict rows
+and once from ListingBatch rows. Prints the encode time and the raw and gzipped
+payload sizes. The JSON encoder is whichever of orjson / msgspec / json is
+installed; --stdlib forces the json module.
+"""
+import argparse
+import gzip
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_items import make_items
+from scraper import serialize
+from scraper.ingest import IngestClient, item_to_row, unique_rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--formats", default="json,ndjson,msgpack")
+    parser.add_argument("--stdlib", action="store_true", help="encode JSON with the json module")
+    args = parser.parse_args()
+    if args.stdlib:
+        sys.modules["orjson"] = sys.modules["msgspec"] = None   # make the imports fail
+    n = args.items
+    items = list(make_items(n))
+    day = date.today()
+    print(f"{n} listings, JSON encoder {serialize.json_backend()}")
+
+    for name in args.formats.split(","):
+        try:
+            client = IngestClient(url="http://bench.invalid", fmt=name)
+        except ImportError as e:
+            print(f"{name:>8}: skipped ({e})")
+            continue
+        for label, rows in (
+            ("dicts", lambda: (item_to_row(i) for i in items)),
+            ("batch", lambda: unique_rows(items, client.format)),
+        ):
+            start = time.perf_counter()
+            bodies = [body for _, body in client.iter_chunks(day, rows())]
+            elapsed = time.perf_counter() - start
+            raw = sum(map(len, bodies))
+            zipped = sum(len(gzip.compress(b, compresslevel=6)) for b in bodies[:20])
+            ratio = zipped / max(1, sum(map(len, bodies[:20])))
+            print(
+                f"{name:>8} {label:>5}: {elapsed:6.2f}s  {n / elapsed:10.0f} rows/s  "
+                f"{raw / 1e6:7.1f} MB raw  ~{raw * ratio / 1e6:6.1f} MB gzip"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
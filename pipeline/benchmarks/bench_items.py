@@ -0,0 +1,111 @@
+"""
+Benchmark: memory and serialization of listings held as ListingItems vs a ListingBatch.
+
+    python benchmarks/bench_items.py --items 1000000
+    python benchmarks/bench_items.py --items 200000 --formats json,msgpack
+
+Builds the same listings as a list of plain (dict-backed) dataclasses, the
+slotted ListingItem and a columnar ListingBatch, and reports the traced memory
+of each. It then times encoding them: per-item dicts (json.dumps / msgpack.packb
+/ pyarrow from_pylist) against ListingBatch.iter_json / to_msgpack / to_arrow.
+"""
+import argparse
+import dataclasses
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scraper.batch import ListingBatch
+from scraper.extractors.base import ListingItem
+from scraper.ingest import INGEST_FIELDS, item_to_row
+
+# ListingItem as it was before slots: same fields, one __dict__ per instance
+DictItem = dataclasses.make_dataclass(
+    "DictItem", [(f.name, f.type, f) for f in dataclasses.fields(ListingItem)]
+)
+
+
+def make_items(n: int, cls=ListingItem):
+    day = date.today()
+    for i in range(n):
+        yield cls(
+            source_id=f"bench-{i}",
+            source="bench",
+            title=f"Listing {i}",
+            address=f"{i} Bench St",
+            area=f"Area {i % 50}",
+            price=100_000.0 + i if i % 20 else None,
+            currency="USD",
+            url=f"https://bench.invalid/listing/{i}",
+            scraped_at=day,
+            raw={"beds": i % 5} if i % 10 == 0 else None,
+        )
+
+
+def traced(build):
+    """(result, bytes allocated by build that are still alive)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(label: str, n: int, fn) -> None:
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    size = f"{len(out) / 1e6:8.1f} MB" if isinstance(out, (bytes, bytearray)) else " " * 11
+    print(f"  {label:<28} {elapsed:7.2f}s  {n / elapsed:11.0f} items/s {size}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--formats", default="json,msgpack,arrow")
+    args = parser.parse_args()
+    n = args.items
+    formats = args.formats.split(",")
+
+    print(f"memory for {n} listings:")
+    _, dict_size = traced(lambda: list(make_items(n, DictItem)))
+    items, item_size = traced(lambda: list(make_items(n)))
+    batch, batch_size = traced(lambda: ListingBatch(make_items(n)))
+    for label, size in (("dataclass (__dict__)", dict_size), ("ListingItem (slots)", item_size), ("ListingBatch", batch_size)):
+        print(f"  {label:<28} {size / 1e6:8.1f} MB  {size / n:6.0f} B/item")
+
+    print("serialization:")
+    if "json" in formats:
+        timed("ingest rows, dicts", n, lambda: b", ".join(json.dumps(item_to_row(i)).encode() for i in items))
+        timed("ingest rows, ListingBatch", n, lambda: b", ".join(batch.iter_json(INGEST_FIELDS)))
+        timed("to_dict + json.dumps", n, lambda: json.dumps([i.to_dict() for i in items]).encode())
+        timed("ListingBatch.to_json", n, batch.to_json)
+    if "msgpack" in formats:
+        try:
+            import msgpack
+        except ImportError:
+            print("  msgpack: skipped (not installed)")
+        else:
+            timed("to_dict + msgpack.packb", n, lambda: msgpack.packb([i.to_dict() for i in items]))
+            timed("ListingBatch.to_msgpack", n, batch.to_msgpack)
+    if "arrow" in formats:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            print("  arrow: skipped (not installed)")
+        else:
+            rows = lambda: [dataclasses.asdict(i) | {"raw": json.dumps(i.raw) if i.raw else None} for i in items]
+            timed("asdict + Table.from_pylist", n, lambda: pa.Table.from_pylist(rows()))
+            timed("ListingBatch.to_arrow", n, batch.to_arrow)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Synthetic listing sites for the benchmarks: paginated result pages in the
+markup ExampleListingExtractor reads, plus one detail page per listing.
+
+    site = SyntheticSite(listings=2000, per_page=50, noise=2)
+    site.pages                  # number of result pages
+    site.listing_page(1)        # HTML of /list?page=1 (pages are 1-based)
+    site.detail_page("p1-0")    # HTML of /d/p1-0
+
+Pages are generated on demand and deterministically from (seed, page), so
+every run serves byte-identical HTML. noise adds markup real sites carry
+around the listings, without changing what is extracted:
+
+    0  bare listing blocks
+    1  head scripts/styles, nav, footer and comments
+    2  + wrapper divs, descriptions, tracking attributes, blank lines
+    3  + inline SVG icons, JSON-LD and a large hydration script
+"""
+import random
+from typing import Iterator, List, Tuple
+
+NOISE_LEVELS = (0, 1, 2, 3)
+
+
+class SyntheticSite:
+    """Deterministic listing site with listings spread over pages of per_page."""
+
+    def __init__(self, listings: int = 500, per_page: int = 25, noise: int = 1, seed: int = 0, areas: int = 25):
+        if noise not in NOISE_LEVELS:
+            raise ValueError(f"noise must be one of {NOISE_LEVELS}")
+        self.listings = listings
+        self.per_page = max(1, per_page)
+        self.noise = noise
+        self.seed = seed
+        self.areas = areas
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.listings // self.per_page))
+
+    def page_listings(self, page: int) -> List[Tuple[str, int]]:
+        """(source_id, global index) of the listings on a 1-based page."""
+        start = (page - 1) * self.per_page
+        return [(f"p{page}-{i - start}", i) for i in range(start, min(start + self.per_page, self.listings))]
+
+    def listing(self, index: int, page: int, version: int = 0) -> dict:
+        """Fields of one listing; version changes the price (re-scrape with changes)."""
+        rng = random.Random(f"{self.seed}:{index}")
+        price = 800 + rng.randrange(0, 4000, 5) + version * 25
+        return {
+            "source_id": f"p{page}-{index - (page - 1) * self.per_page}",
+            "title": f"{rng.choice(('Bright', 'Quiet', 'Cosy', 'Large', 'Renovated'))} {rng.randint(1, 4)}-bed #{index}",
+            "price": None if index % 17 == 16 else price,
+            "address": f"{index} {rng.choice(('Oak', 'Elm', 'Main', 'Park', 'Mill'))} St",
+            "area": f"Area {index % self.areas}",
+        }
+
+    def iter_pages(self) -> Iterator[Tuple[int, str]]:
+        for page in range(1, self.pages + 1):
+            yield page, self.listing_page(page)
+
+    def _block(self, item: dict, rng: random.Random) -> str:
+        price = f'<span class="price">${item["price"]:,}</span>' if item["price"] is not None else ""
+        body = (
+            f'<h2 class="title">{item["title"]}</h2>{price}'
+            f'<span class="address">{item["address"]}</span>'
+            f'<span class="area" data-area>{item["area"]}</span>'
+            f'<a href="/d/{item["source_id"]}">Details</a>'
+        )
+        if self.noise >= 2:
+            body = (
+                f'<div class="card-inner" data-track="{rng.getrandbits(32):08x}">\n\n  {body}\n'
+                f'  <p class="desc">{"Close to transit and shops. " * rng.randint(2, 8)}</p></div>'
+            )
+        if self.noise >= 3:
+            body = f'<svg class="icon" viewBox="0 0 24 24"><path d="M{"l2 3 " * 20}z"/></svg>{body}'
+        comment = f"<!-- listing {item['source_id']} -->" if self.noise >= 1 else ""
+        return f'<article class="listing" data-listing data-id="{item["source_id"]}">{comment}{body}</article>'
+
+    def listing_page(self, page: int, version: int = 0) -> str:
+        rng = random.Random(f"{self.seed}:page:{page}")
+        blocks = "\n".join(self._block(self.listing(index, page, version), rng) for _, index in self.page_listings(page))
+        nxt = f'<nav class="pagination"><a class="next" rel="next" href="/list?page={page + 1}">Next</a></nav>' if page < self.pages else ""
+        if self.noise == 0:
+            return f"<html><body><main>{blocks}</main>{nxt}</body></html>"
+        head = '<meta charset="utf-8"><script>window.dataLayer=[];</script><style>.listing{margin:1em}</style>'
+        if self.noise >= 3:
+            head += '<script type="application/ld+json">{"@type": "ItemList", "numberOfItems": %d}</script>' % self.per_page
+            head += f"<script>window.__STATE__ = {{\"items\": [{', '.join(str(rng.random()) for _ in range(400))}]}};</script>"
+        nav = "<header><nav>" + " ".join(f"<a href='/section/{i}'>Section {i}</a>" for i in range(20)) + "</nav></header>"
+        footer = "<footer>" + "<p>Terms, privacy and cookie settings.</p>" * 10 + "</footer>"
+        return (
+            f"<!doctype html><html><head><title>Results page {page}</title>{head}</head>"
+            f"<body>{nav}<main>{blocks}</main>{nxt}{footer}</body></html>"
+        )
+
+    def detail_page(self, source_id: str, version: int = 0) -> str:
+        page, i = source_id[1:].split("-")
+        index = (int(page) - 1) * self.per_page + int(i)
+        item = self.listing(index, int(page), version)
+        price = f'<span class="price">${item["price"]:,}</span>' if item["price"] is not None else ""
+        return (
+            f"<html><body><h1 class=\"title\">{item['title']}</h1>{price}"
+            f"<span class=\"address\">{item['address']}</span><span class=\"area\">{item['area']}</span></body></html>"
+        )
@@ -0,0 +1,198 @@
+"""
+Local stand-ins for the benchmarks, so they run offline:
+
+- SiteServer serves a SyntheticSite: /robots.txt, /list?page=N and /d/<id>,
+  with ETags (If-None-Match -> 304), and optionally a 429 with Retry-After
+  every throttle_every requests and a slow response every slow_every requests.
+- IngestServer accepts POST /api/ingest in every INGEST_FORMAT (gzip or not)
+  and answers like the Worker, counting chunks and rows; fail_every makes
+  every n-th request a 503 so sync retries can be measured.
+
+Both run on 127.0.0.1 with a free port in a daemon thread:
+
+    with SiteServer(SyntheticSite(1000)) as site, IngestServer() as ingest:
+        run(base_url=site.url + "/list", ingest_url=ingest.url)
+        print(site.stats, ingest.stats)
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from sitegen import SyntheticSite
+
+
+class _Server:
+    handler = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def count(self, **amounts: int) -> int:
+        """Add to stats; returns the new request count."""
+        with self._lock:
+            self.stats.update(amounts)
+            return self.stats["requests"]
+
+    def start(self) -> "_Server":
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body in one buffered write, sent without Nagle: otherwise keep-alive
+    # requests stall on delayed ACKs (~40ms each) and the benchmark measures TCP
+    wbufsize = 1 << 16
+    disable_nagle_algorithm = True
+
+    def reply(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8", **headers) -> None:
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _SiteHandler(_Handler):
+    def do_GET(self) -> None:
+        site: SiteServer = self.server.owner
+        n = site.count(requests=1)
+        url = urlparse(self.path)
+        if url.path == "/robots.txt":
+            self.reply(200, site.robots.encode(), "text/plain")
+            return
+        if site.throttle_every and n % site.throttle_every == 0:
+            site.count(throttled=1)
+            self.reply(429, b"slow down", Retry_After=str(site.retry_after))
+            return
+        if site.slow_every and n % site.slow_every == 0:
+            site.count(slow=1)
+            time.sleep(site.slow_seconds)
+        if url.path == "/list":
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            body = site.site.listing_page(page, site.version) if 1 <= page <= site.site.pages else None
+        elif url.path.startswith("/d/"):
+            try:
+                body = site.site.detail_page(url.path[3:], site.version)
+            except (ValueError, IndexError):
+                body = None
+        else:
+            body = None
+        if body is None:
+            site.count(not_found=1)
+            self.reply(404, b"not found")
+            return
+        data = body.encode()
+        etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            site.count(not_modified=1)
+            self.reply(304, ETag=etag)
+            return
+        site.count(pages=1, bytes=len(data))
+        self.reply(200, data, ETag=etag, Cache_Control="max-age=0")
+
+
+class SiteServer(_Server):
+    """Serves a SyntheticSite (see module docstring). Bump version to change every listing's price."""
+    handler = _SiteHandler
+
+    def __init__(
+        self,
+        site: SyntheticSite,
+        throttle_every: int = 0,
+        retry_after: int = 0,
+        slow_every: int = 0,
+        slow_seconds: float = 0.05,
+        crawl_delay: float = 0.0,
+    ):
+        super().__init__()
+        self.site = site
+        self.version = 0
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.slow_every = slow_every
+        self.slow_seconds = slow_seconds
+        self.robots = "User-agent: *\nDisallow: /private/\n"
+        if crawl_delay:
+            self.robots += f"Crawl-delay: {crawl_delay:g}\n"
+
+
+class _IngestHandler(_Handler):
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            data = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self) -> None:
+        ingest: IngestServer = self.server.owner
+        data = self._body()
+        n = ingest.count(requests=1, bytes=len(data))
+        if urlparse(self.path).path != "/api/ingest":
+            self.reply(404, b"not found")
+            return
+        if ingest.fail_every and n % ingest.fail_every == 0:
+            ingest.count(failed=1)
+            self.reply(503, b"unavailable", Retry_After="0")
+            return
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0]
+        if content_type == "application/x-ndjson":
+            lines = data.splitlines()
+            header = json.loads(lines[0])
+            header[header.pop("rows")] = [json.loads(line) for line in lines[1:] if line]
+        elif content_type == "application/msgpack":
+            import msgpack
+            header = msgpack.unpackb(data)
+        else:
+            header = json.loads(data)
+        rows = len(header.get("listings") or ())
+        ingest.count(chunks=1, rows=rows, area_stats=len(header.get("area_stats") or ()))
+        body = json.dumps({"ok": True, "inserted": rows, "deleted": 0, "errors": 0, "error_samples": []}).encode()
+        self.reply(200, body, "application/json")
+
+
+class IngestServer(_Server):
+    """Stand-in for the Worker's /api/ingest (see module docstring)."""
+    handler = _IngestHandler
+
+    def __init__(self, fail_every: int = 0):
+        super().__init__()
+        self.fail_every = fail_every
@@ -1,12 +1,13 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_init
 
-from scraper.config import REDIS_URL
+from scraper.config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, METRICS_PORT
 
 app = Celery(
     "web_scrap",
-    broker=REDIS_URL,
-    backend=REDIS_URL,
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
     include=["celery_app.tasks"],
 )
 app.conf.update(
@@ -14,10 +15,42 @@ app.conf.update(
     enable_utc=True,
     task_serializer="json",
     result_serializer="json",
+    # Fetched pages travel between fetch_page and extract_page: compress them
+    task_compression="gzip",
+    result_compression="gzip",
+    result_expires=2 * 86400,
+    # One queue per stage so fetch, extract and load workers scale independently:
+    #   celery -A celery_app worker -Q fetch / -Q extract / -Q load,sync,celery
+    task_routes={
+        "celery_app.tasks.fetch_page": {"queue": "fetch"},
+        "celery_app.tasks.extract_page": {"queue": "extract"},
+        "celery_app.tasks.load_batch": {"queue": "load"},
+        "celery_app.tasks.sync_day": {"queue": "sync"},
+    },
+    worker_prefetch_multiplier=1,
     beat_schedule={
         "daily-scrape": {
-            "task": "celery_app.tasks.run_etl",
+            "task": "celery_app.tasks.start_etl",
             "schedule": crontab(hour=6, minute=0),  # 06:00 UTC daily
         },
+        "daily-analytics": {
+            "task": "celery_app.tasks.run_analytics",
+            "schedule": crontab(hour=7, minute=30),  # after the day's scrape has loaded
+        },
     },
 )
+
+
+if METRICS_PORT:
+    # Prometheus exporter: the worker's main process on METRICS_PORT, prefork
+    # pool children on METRICS_PORT + 1 + their pool index (tasks run there)
+    @worker_init.connect
+    def _serve_worker_metrics(**kwargs):
+        from scraper.metrics import serve_metrics
+        serve_metrics(METRICS_PORT)
+
+    @worker_process_init.connect
+    def _serve_child_metrics(**kwargs):
+        from billiard.process import current_process
+        from scraper.metrics import serve_metrics
+        serve_metrics(METRICS_PORT + 1 + (getattr(current_process(), "index", 0) or 0))
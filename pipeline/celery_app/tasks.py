@@ -1,12 +1,313 @@
+"""
+ETL as a Celery canvas: one chain of fetch_page -> extract_page per source,
+where each extracted page replaces itself with a group of load_batch tasks
+plus the chain for the next page (and detail pages). All sources run in the
+header of a chord whose body, sync_day, syncs to the Worker API once every
+page has been loaded. Each task type has its own queue, rate limit and retry
+policy, so a failing page or DB batch only retries itself. Like crawl(), a run
+visits each normalized URL once per source and at most SCRAPE_MAX_PAGES pages
+up to SCRAPE_MAX_DEPTH; the claims are kept in Redis when the broker is Redis
+(shared by every worker), in-process otherwise.
+
+For tests or a one-box run: CELERY_BROKER_URL=memory://,
+CELERY_RESULT_BACKEND=cache+memory:// and app.conf.task_always_eager = True,
+then etl_canvas(...).apply() runs the whole graph in-process.
+
+etl (SQLAlchemy and the models) is imported inside the tasks that use the
+database, so fetch and extract workers start without it.
+"""
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date
+from typing import List, Optional
+
+from celery import chord, group
+from celery.utils.time import get_exponential_backoff_interval
+
 from celery_app import app
-from etl import run_extract_load
+from scraper import metrics
+from scraper.config import (
+    CELERY_BROKER_URL,
+    ETL_FETCH_RATE_LIMIT,
+    ETL_LOAD_RATE_LIMIT,
+    FINGERPRINT_INDEX,
+    LOAD_BATCH_SIZE,
+    SCRAPE_FOLLOW_DETAILS,
+    SCRAPE_MAX_DEPTH,
+    SCRAPE_MAX_PAGES,
+    SYNC_MODE,
+)
+from scraper.extractors import ListingItem, get_extractor, resolve_sources
+from scraper.fetcher import Fetcher
+from scraper.fingerprint import FingerprintIndex
+from scraper.frontier import normalize_url
+from scraper.stages import batched
+
+# Fetch statuses worth retrying (None = network error / timeout)
+TRANSIENT_STATUSES = (None, 408, 429, 500, 502, 503, 504)
+# Claimed URLs and page counts of a run expire after (seconds)
+CLAIM_TTL = 2 * 86400
+
+_fetcher: Optional[Fetcher] = None
+_index: Optional[FingerprintIndex] = None
+
+
+class _LocalClaims:
+    """Page claims of runs in this process (memory broker / eager mode)."""
+
+    def __init__(self):
+        self._seen = set()
+        self._pages: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def claim(self, crawl: str, url: str) -> bool:
+        with self._lock:
+            if (crawl, url) in self._seen:
+                return False
+            self._seen.add((crawl, url))
+            self._pages[crawl] += 1
+            return self._pages[crawl] <= SCRAPE_MAX_PAGES
+
+
+class _RedisClaims:
+    """Page claims shared by every worker of a Redis broker."""
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def claim(self, crawl: str, url: str) -> bool:
+        seen, pages = f"etl:seen:{crawl}", f"etl:pages:{crawl}"
+        if not self._client.sadd(seen, url):
+            return False
+        with self._client.pipeline() as pipe:
+            count, _, _ = pipe.incr(pages).expire(seen, CLAIM_TTL).expire(pages, CLAIM_TTL).execute()
+        return count <= SCRAPE_MAX_PAGES
+
+
+_claims = None
+
+
+def _claim(run: str, source: str, url: str) -> bool:
+    """
+    Claim url for one source's crawl in run: False if the run already has it,
+    or if it would be the crawl's page beyond SCRAPE_MAX_PAGES.
+    """
+    global _claims
+    if _claims is None:
+        redis_broker = CELERY_BROKER_URL.startswith(("redis://", "rediss://"))
+        _claims = _RedisClaims(CELERY_BROKER_URL) if redis_broker else _LocalClaims()
+    return _claims.claim(f"{run}:{source}", normalize_url(url))
+
+
+def _get_fetcher() -> Fetcher:
+    """One Fetcher per worker process (robots, per-host delays and HTTP cache are shared)."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = Fetcher()
+    return _fetcher
+
+
+def _get_index(session) -> Optional[FingerprintIndex]:
+    """
+    Fingerprint index of this worker process, topped up with other workers' changes.
+    Built on the first load_batch (from FINGERPRINT_SNAPSHOT when set).
+    """
+    global _index
+    if not FINGERPRINT_INDEX:
+        return None
+    from etl import load_fingerprint_index, refresh_fingerprint_index
+    if _index is None:
+        _index = load_fingerprint_index(session)
+    else:
+        refresh_fingerprint_index(session, _index)
+    return _index
+
+
+def _item(row: dict, day: date) -> ListingItem:
+    return ListingItem(**{**row, "scraped_at": day})
+
+
+def _total(results) -> int:
+    """Sum of load counts in the (nested) results of replaced extract tasks."""
+    if isinstance(results, (list, tuple)):
+        return sum(_total(r) for r in results)
+    return results if isinstance(results, int) else 0
+
+
+def etl_canvas(
+    day: date,
+    sources: Optional[List[str]] = None,
+    sync_to_api: bool = True,
+    sync_mode: str = SYNC_MODE,
+):
+    """chord(one fetch -> extract chain per source, sync_day) for one ETL run."""
+    run = uuid.uuid4().hex
+    crawls = [
+        fetch_page.si(extractor.source_name, url, day.isoformat(), run=run) | extract_page.s()
+        for extractor, url in resolve_sources(sources)
+        if _claim(run, extractor.source_name, url)
+    ]
+    return chord(crawls, sync_day.s(day.isoformat(), sync_to_api, sync_mode))
+
+
+@app.task(name="celery_app.tasks.start_etl")
+def start_etl(sync_to_api: bool = True, sync_mode: str = SYNC_MODE, sources: Optional[List[str]] = None):
+    """Beat entry point: launch today's ETL canvas and return its id."""
+    result = etl_canvas(date.today(), sources, sync_to_api, sync_mode).apply_async()
+    return {"id": result.id}
+
+
+@app.task(
+    name="celery_app.tasks.fetch_page",
+    bind=True,
+    max_retries=5,
+    rate_limit=ETL_FETCH_RATE_LIMIT or None,
+    acks_late=True,
+)
+def fetch_page(
+    self,
+    source: str,
+    url: str,
+    day: str,
+    depth: int = 0,
+    kind: str = "next",
+    listed: Optional[dict] = None,
+    run: str = "",
+) -> dict:
+    """Fetch one page. Transient failures are retried with backoff; after the last retry the page is skipped."""
+    context = {"source": source, "kind": kind, "source_id": listed["source_id"] if listed else None}
+    result = _get_fetcher().fetch(url, context)
+    if result.text is None and result.status in TRANSIENT_STATUSES and self.request.retries < self.max_retries:
+        raise self.retry(countdown=min(600, 10 * 2 ** self.request.retries))
+    return {
+        "source": source,
+        "url": result.url,
+        "day": day,
+        "depth": depth,
+        "kind": kind,
+        "listed": listed,
+        "html": result.text,
+        "status": result.status,
+        "run": run,
+    }
+
+
+@app.task(name="celery_app.tasks.extract_page", bind=True)
+def extract_page(self, page: dict):
+    """
+    Extract one fetched page, then replace this task with the page's load_batch
+    tasks and the fetch -> extract chains for the next page and detail pages
+    this run has not claimed yet.
+    """
+    source = page["source"]
+    extractor = get_extractor(source)
+    html = page["html"]
+    if page["kind"] == "detail":
+        item = None
+        if html:
+            with metrics.PARSE_SECONDS.time(source, "detail"):
+                item = extractor.extract_detail(html, page["url"], page["listed"]["source_id"])
+        rows = [item.to_dict()] if item else [page["listed"]]
+        return self.replace(load_batch.s(rows, page["day"]))
+    if not html:
+        return 0
+    with metrics.PARSE_SECONDS.time(source, "page"):
+        items, links = extractor.extract_page(html, page["url"])
+    follow: List = []
+    by_id = {item.source_id: item for item in items}
+    detail_ids = set()
+    run, depth = page["run"], page["depth"] + 1
+    for link in links:
+        if depth > SCRAPE_MAX_DEPTH:
+            break
+        if link.kind == "next" and _claim(run, source, link.url):
+            follow.append(fetch_page.si(source, link.url, page["day"], depth, run=run) | extract_page.s())
+        elif (
+            link.kind == "detail"
+            and SCRAPE_FOLLOW_DETAILS
+            and link.source_id in by_id
+            and _claim(run, source, link.url)
+        ):
+            # The listing is loaded once: from its detail page, or from this page if that fails
+            detail_ids.add(link.source_id)
+            listed = by_id[link.source_id].to_dict()
+            follow.append(
+                fetch_page.si(source, link.url, page["day"], depth, "detail", listed, run) | extract_page.s()
+            )
+    rows = [item.to_dict() for item in items if item.source_id not in detail_ids]
+    loads = [load_batch.s(chunk, page["day"]) for chunk in batched(rows, LOAD_BATCH_SIZE)]
+    if not loads and not follow:
+        return 0
+    return self.replace(group(loads + follow))
+
+
+@app.task(
+    name="celery_app.tasks.load_batch",
+    bind=True,
+    max_retries=5,
+    rate_limit=ETL_LOAD_RATE_LIMIT or None,
+    acks_late=True,
+)
+def load_batch(self, rows: List[dict], day: str) -> int:
+    """Upsert one batch of listings and their prices for day. Idempotent, so safe to retry."""
+    global _index
+    from sqlalchemy.exc import OperationalError
+    from etl import load_items
+    from models import get_session
+    recorded_at = date.fromisoformat(day)
+    session = get_session()
+    try:
+        index = _get_index(session)
+        processed = load_items(session, [_item(row, recorded_at) for row in rows], recorded_at, index=index)
+        session.commit()
+        return processed
+    except Exception as e:
+        session.rollback()
+        # The index already holds this batch's rolled-back writes: rebuild it on the next batch
+        _index = None
+        if isinstance(e, OperationalError):
+            # DB unavailable or deadlocked: exponential backoff with full jitter, capped at 10 minutes
+            raise self.retry(exc=e, countdown=get_exponential_backoff_interval(1, self.request.retries, 600, True))
+        raise
+    finally:
+        session.close()
+
+
+@app.task(name="celery_app.tasks.sync_day", bind=True, max_retries=3)
+def sync_day(self, results, day: str, sync_to_api: bool = True, sync_mode: str = SYNC_MODE):
+    """Chord body: once every page is loaded, roll up the day's area stats and sync to the Worker API."""
+    from etl import run_area_stats, run_sync
+    processed = _total(results)
+    synced = 0
+    if processed:
+        run_area_stats(date.fromisoformat(day))
+    if sync_to_api and processed:
+        report = run_sync(date.fromisoformat(day), sync_mode)
+        if not report.complete:
+            # Delta sync only advances its watermark when every row landed, so a retry resends the same changes
+            raise self.retry(countdown=300)
+        synced = report.sent
+    return {"processed": processed, "synced": synced}
+
+
+@app.task(name="celery_app.tasks.run_analytics")
+def run_analytics(days: Optional[int] = None) -> dict:
+    """Recompute area trends and listing metrics (needs numpy and pandas on this worker)."""
+    from analytics import run_analytics as analytics_run
+    from scraper.config import ANALYTICS_DAYS
+    return analytics_run(days=days or ANALYTICS_DAYS).as_dict()
 
 
 @app.task(name="celery_app.tasks.run_etl", bind=True)
-def run_etl(self, sync_to_api: bool = True):
-    """Celery task: run one ETL cycle and optionally sync to Worker API."""
+def run_etl(self, sync_to_api: bool = True, sync_mode: str = SYNC_MODE, sources: Optional[List[str]] = None):
+    """Celery task: run one whole ETL cycle in this worker (single-node setups)."""
+    from etl import run_extract_load
     try:
-        processed, synced = run_extract_load(sync_to_api=sync_to_api)
-        return {"processed": processed, "synced": synced}
+        start = time.monotonic()
+        processed, synced = run_extract_load(sync_to_api=sync_to_api, sync_mode=sync_mode, sources=sources)
+        return {"processed": processed, "synced": synced, "seconds": round(time.monotonic() - start, 3)}
     except Exception as e:
         self.retry(exc=e, countdown=60, max_retries=3)
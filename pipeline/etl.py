@@ -1,60 +1,584 @@
 """
 ETL: Extract (scraper) -> Transform (extractor) -> Load (PostgreSQL + optional API sync).
 """
-from datetime import date
-from typing import List
+import io
+import logging
+import statistics
+from itertools import groupby
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from scraper.config import DEFAULT_BASE_URL
-from scraper.extractors import ExampleListingExtractor
+from scraper import metrics
+from scraper.batch import ListingBatch
+from scraper.config import (
+    CRAWL_STATE,
+    DEFAULT_BASE_URL,
+    FINGERPRINT_INDEX,
+    FINGERPRINT_SNAPSHOT,
+    LOAD_BATCH_SIZE,
+    LOAD_MODE,
+    SYNC_MODE,
+)
+from scraper.crawl import CrawlCheckpoints, crawl_sources
+from scraper.extract_pool import make_pool
+from scraper.extractors import resolve_sources
+from scraper.fingerprint import FingerprintIndex, content_hash
 from scraper.fetcher import Fetcher
-from models import Listing, ListingPriceHistory, get_session
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from scraper.ingest import IngestClient, SyncReport
+from scraper.recrawl import RecrawlSchedule, VisitHistory, make_schedule, to_days
+from scraper.serialize import PayloadFormat
+from scraper.snapshot import make_snapshot_writer
+from scraper.stages import batched, threaded
+from models import AreaDailyStats, Listing, ListingPriceHistory, SyncState, get_session
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+from sqlalchemy.orm import Session, aliased
+
+logger = logging.getLogger(__name__)
+
+# sync_state row for the Worker API
+SYNC_STATE_NAME = "worker_api"
+_SYNC_COLUMNS = (
+    Listing.source_id,
+    Listing.source,
+    Listing.title,
+    Listing.address,
+    Listing.area,
+    Listing.url,
+    ListingPriceHistory.price,
+)
+# Incremental index refresh re-reads this much history, so rows committed late
+# by a concurrent writer (changed_at is set before commit) are not missed
+FINGERPRINT_LOOKBACK = timedelta(minutes=10)
+# Months whose listing_price_history partition is known to exist (PostgreSQL)
+_price_partitions: set = set()
 
 
 def run_extract_load(
     base_url: str = DEFAULT_BASE_URL,
     sync_to_api: bool = True,
+    sync_mode: str = SYNC_MODE,
+    sources: Optional[Sequence[str]] = None,
 ) -> tuple[int, int]:
     """
-    Run one ETL cycle: fetch page, extract listings, upsert into DB, record prices, optionally sync to Worker API.
+    Run one ETL cycle: crawl every source ("name" or "name=start_url"; base_url when a source
+    has no start URL), extract listings, upsert into DB, record prices, optionally sync to
+    Worker API (sync_mode "delta" or "full" resync).
     Returns (listings_processed, api_synced).
     """
     fetcher = Fetcher()
-    extractor = ExampleListingExtractor()
-    html = fetcher.get_html(base_url)
-    if not html:
-        return 0, 0
-    items = extractor.extract_from_html(html, base_url)
-    if not items:
-        return 0, 0
+    targets = resolve_sources(sources, base_url)
+    pool = make_pool()
     session = get_session()
+    today = date.today()
+    snapshot = make_snapshot_writer(today)
+    schedule = make_schedule()
     try:
-        today = date.today()
-        for item in items:
-            _upsert_listing(session, item, today)
+        index = load_fingerprint_index(session) if FINGERPRINT_INDEX else None
+        if schedule is not None and not len(schedule):
+            logger.info("Recrawl schedule seeded with %d listings", seed_recrawl_schedule(session, schedule))
+        # Fetch + extract run in a background stage; loading applies backpressure via a bounded queue.
+        # Sources are crawled one after another with a shared fetcher (robots/HTTP caches stay warm);
+        # with EXTRACT_WORKERS > 1, parsing runs in worker processes.
+        # With CRAWL_STATE, listings are committed per batch so the crawl can resume after them
+        checkpoints = CrawlCheckpoints() if CRAWL_STATE else None
+        items = crawl_sources(targets, fetcher, pool, schedule, checkpoints)
+        if snapshot:
+            items = snapshot.tee(items)
+        processed = load_items(session, threaded(items), today, index=index, checkpoints=checkpoints)
+        if snapshot:
+            logger.info("Snapshot: %s", ", ".join(str(p) for p in snapshot.close()))
+            snapshot = None
+        if fetcher.cache:
+            logger.info("HTTP cache: %s", fetcher.cache.stats.as_dict())
+        if not processed:
+            return 0, 0
+        refresh_area_stats(session, today)
         session.commit()
+        if index is not None:
+            logger.info("Fingerprint index: %d listings, %s", len(index), index.stats.as_dict())
+            if FINGERPRINT_SNAPSHOT:
+                index.save(FINGERPRINT_SNAPSHOT)
         if sync_to_api:
-            synced = _sync_to_api(session, today)
+            synced = _sync_to_api(session, today, sync_mode).sent
         else:
             synced = 0
-        return len(items), synced
+        return processed, synced
     finally:
         session.close()
+        if pool:
+            pool.close()
+        if snapshot:
+            snapshot.abort()
+        if schedule is not None:
+            schedule.save()
+
+
+def load_items(
+    session: Session,
+    items: Iterable,
+    recorded_at: date,
+    mode: str = LOAD_MODE,
+    batch_size: int = LOAD_BATCH_SIZE,
+    index: Optional[FingerprintIndex] = None,
+    checkpoints: Optional[CrawlCheckpoints] = None,
+) -> int:
+    """
+    Upsert listings and record prices for recorded_at. Returns number of items processed.
+    mode: "upsert" (batched INSERT ... ON CONFLICT), "copy" (COPY into staging, PostgreSQL)
+    or "row" (per-listing SELECT + INSERT/UPDATE).
+    With a fingerprint index, only new and changed listings are upserted: unchanged ones
+    just get their price row for the day (or nothing, if it is already recorded). The
+    index is updated as rows are written, so it is only valid once the session commits.
+    With crawl checkpoints, every batch is committed and then reported to them.
+    """
+    ensure_price_partition(session, recorded_at)
+    processed = 0
+
+    def counted(it: Iterable) -> Iterator:
+        nonlocal processed
+        for item in it:
+            processed += 1
+            yield item
+
+    items = counted(items)
+    if checkpoints is None:
+        mode = _write_items(session, items, recorded_at, mode, batch_size, index)
+    else:
+        # Commit per batch of crawled items, then let the crawl save its frontier up to them
+        for chunk in batched(items, batch_size):
+            mode = _write_items(session, chunk, recorded_at, mode, batch_size, index)
+            session.commit()
+            checkpoints.committed(processed)
+        # The crawl may offer its last save after the final full batch was committed
+        checkpoints.committed(processed)
+    metrics.LOAD_ROWS.inc(mode, amount=processed)
+    return processed
+
+
+def _write_items(
+    session: Session,
+    items: Iterable,
+    recorded_at: date,
+    mode: str,
+    batch_size: int,
+    index: Optional[FingerprintIndex],
+) -> str:
+    """Write items for load_items (without committing). Returns the load mode used."""
+    if index is not None:
+        items = _skip_unchanged(session, items, recorded_at, index, batch_size)
+    if mode == "copy" and session.get_bind().dialect.name == "postgresql":
+        # One observation for the whole COPY (it streams items as they arrive)
+        with metrics.LOAD_SECONDS.time("copy"):
+            _copy_upsert(session, items, recorded_at, index)
+        return "copy"
+    mode = "row" if mode == "row" else "upsert"
+    for chunk in batched(items, batch_size):
+        # Timed per batch, after batched() has pulled it, so upstream waits are not counted
+        with metrics.LOAD_SECONDS.time(mode):
+            if mode == "row":
+                for item in chunk:
+                    listing_id = _upsert_listing(session, item, recorded_at)
+                    if index is not None:
+                        index.remember(item, listing_id, recorded_at)
+            else:
+                _bulk_upsert(session, chunk, recorded_at, index)
+    return mode
+
+
+def ensure_price_partition(session: Session, recorded_at: date) -> None:
+    """PostgreSQL: create the listing_price_history partition for recorded_at's month if missing."""
+    month = recorded_at.replace(day=1)
+    engine = session.get_bind()
+    if month in _price_partitions or engine.dialect.name != "postgresql":
+        return
+    upper = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    # Own autocommit connection: DDL must not join (or abort) the load transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        partitioned = conn.exec_driver_sql(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid"
+            " WHERE c.relname = 'listing_price_history'"
+        ).first()
+        if partitioned:
+            try:
+                conn.exec_driver_sql(
+                    f"CREATE TABLE IF NOT EXISTS listing_price_history_y{month.year:04d}m{month.month:02d}"
+                    f" PARTITION OF listing_price_history"
+                    f" FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+            except (IntegrityError, ProgrammingError):
+                pass  # created concurrently by another loader
+    _price_partitions.add(month)
+
+
+def refresh_area_stats(session: Session, recorded_at: date) -> int:
+    """Recompute area_daily_stats for one day from its price rows. Returns the number of areas."""
+    session.execute(delete(AreaDailyStats).where(AreaDailyStats.recorded_at == recorded_at))
+    area = func.coalesce(Listing.area, "")
+    price = ListingPriceHistory.price
+    day = (
+        select(area.label("area"))
+        .join(ListingPriceHistory, ListingPriceHistory.listing_id == Listing.id)
+        .where(ListingPriceHistory.recorded_at == recorded_at, price.is_not(None))
+    )
+    now = _utcnow()
+    if session.get_bind().dialect.name == "postgresql":
+        # One aggregate over the day's partition
+        stmt = day.add_columns(
+            func.count(), func.avg(price), func.percentile_cont(0.5).within_group(price), func.min(price), func.max(price)
+        ).group_by(area)
+        rows = [
+            {"area": a, "count": n, "avg_price": avg, "median_price": med, "min_price": lo, "max_price": hi}
+            for a, n, avg, med, lo, hi in session.execute(stmt)
+        ]
+    else:
+        # No percentile aggregate elsewhere (SQLite): group sorted prices here
+        rows = []
+        for a, group in groupby(session.execute(day.add_columns(price).order_by(area, price)), key=lambda r: r[0]):
+            prices = [r[1] for r in group]
+            rows.append({
+                "area": a, "count": len(prices), "avg_price": sum(prices) / len(prices),
+                "median_price": statistics.median(prices), "min_price": prices[0], "max_price": prices[-1],
+            })
+    if rows:
+        session.execute(
+            _insert(session, AreaDailyStats).values(
+                [{**row, "recorded_at": recorded_at, "computed_at": now} for row in rows]
+            )
+        )
+    return len(rows)
+
+
+def run_area_stats(recorded_at: date) -> int:
+    """refresh_area_stats in a session of its own (for the Celery sync task)."""
+    session = get_session()
+    try:
+        areas = refresh_area_stats(session, recorded_at)
+        session.commit()
+        return areas
+    finally:
+        session.close()
+
+
+def _skip_unchanged(
+    session: Session,
+    items: Iterable,
+    recorded_at: date,
+    index: FingerprintIndex,
+    batch_size: int = LOAD_BATCH_SIZE,
+) -> Iterator:
+    """Yield only new or changed items; insert price rows for unchanged ones directly."""
+    prices: List[dict] = []
+    for item in items:
+        kind, listing_id = index.classify(item, recorded_at)
+        if kind == FingerprintIndex.PRICE_ONLY:
+            prices.append({"listing_id": listing_id, "price": item.price, "recorded_at": recorded_at})
+            if len(prices) >= batch_size:
+                _insert_prices(session, prices)
+                prices = []
+        elif kind != FingerprintIndex.SKIP:
+            yield item
+    if prices:
+        _insert_prices(session, prices)
+
+
+def _insert_prices(session: Session, prices: List[dict]) -> None:
+    session.execute(
+        _insert(session, ListingPriceHistory)
+        .values(prices)
+        .on_conflict_do_nothing(index_elements=["listing_id", "recorded_at"])
+    )
+
+
+def _fingerprint_rows(session: Session, since: Optional[datetime] = None, yield_per: int = 10000):
+    """(source, source_id, content_hash, id, changed_at, last price, day of last price) per listing."""
+    last = (
+        select(ListingPriceHistory.listing_id, func.max(ListingPriceHistory.recorded_at).label("day"))
+        .group_by(ListingPriceHistory.listing_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Listing.source, Listing.source_id, Listing.content_hash, Listing.id, Listing.changed_at,
+            ListingPriceHistory.price, last.c.day,
+        )
+        .outerjoin(last, last.c.listing_id == Listing.id)
+        .outerjoin(
+            ListingPriceHistory,
+            and_(ListingPriceHistory.listing_id == Listing.id, ListingPriceHistory.recorded_at == last.c.day),
+        )
+        .execution_options(yield_per=yield_per)
+    )
+    if since is not None:
+        stmt = stmt.where(Listing.changed_at >= since)
+    return session.execute(stmt)
+
+
+def refresh_fingerprint_index(session: Session, index: FingerprintIndex) -> int:
+    """Apply listings changed since index.watermark (all listings for a new index). Returns rows read."""
+    since = index.watermark - FINGERPRINT_LOOKBACK if index.watermark else None
+    rows = 0
+    for source, source_id, hex_hash, listing_id, changed_at, price, day in _fingerprint_rows(session, since):
+        # Rows from before content hashes existed get 0, so their first load rewrites them
+        index.put(source, source_id, int(hex_hash, 16) if hex_hash else 0, listing_id, price, day)
+        if changed_at and (index.watermark is None or changed_at > index.watermark):
+            index.watermark = changed_at
+        rows += 1
+    return rows
+
+
+def load_fingerprint_index(session: Session, snapshot: str = FINGERPRINT_SNAPSHOT) -> FingerprintIndex:
+    """Fingerprint index from the snapshot file (topped up from the DB), or built from the DB."""
+    index = FingerprintIndex.load(snapshot) if snapshot else None
+    if index is None:
+        index = FingerprintIndex()
+    rows = refresh_fingerprint_index(session, index)
+    logger.info("Fingerprint index: %d listings (%d read from DB)", len(index), rows)
+    return index
+
+
+def _recrawl_rows(session: Session, yield_per: int = 10000):
+    """
+    (source, source_id, first_seen_at, updated_at, changed_at, content_hash, days with a price,
+    last day with a price, price changes, day of the last price change) per listing.
+    """
+    prev = func.lag(ListingPriceHistory.price).over(
+        partition_by=ListingPriceHistory.listing_id, order_by=ListingPriceHistory.recorded_at
+    )
+    seq = func.row_number().over(partition_by=ListingPriceHistory.listing_id, order_by=ListingPriceHistory.recorded_at)
+    series = select(
+        ListingPriceHistory.listing_id,
+        ListingPriceHistory.recorded_at,
+        ListingPriceHistory.price,
+        prev.label("prev"),
+        seq.label("seq"),
+    ).subquery()
+    changed = and_(series.c.seq > 1, series.c.price.is_distinct_from(series.c.prev))
+    per_listing = (
+        select(
+            series.c.listing_id,
+            func.count().label("days"),
+            func.max(series.c.recorded_at).label("last_seen"),
+            func.sum(case((changed, 1), else_=0)).label("changes"),
+            func.max(case((changed, series.c.recorded_at))).label("last_change"),
+        )
+        .group_by(series.c.listing_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Listing.source, Listing.source_id, Listing.first_seen_at, Listing.updated_at, Listing.changed_at,
+            Listing.content_hash, per_listing.c.days, per_listing.c.last_seen, per_listing.c.changes,
+            per_listing.c.last_change,
+        )
+        .outerjoin(per_listing, per_listing.c.listing_id == Listing.id)
+        .order_by(Listing.source)
+        .execution_options(yield_per=yield_per)
+    )
+    return session.execute(stmt)
+
+
+def seed_recrawl_schedule(session: Session, schedule: RecrawlSchedule, batch_size: int = 1000) -> int:
+    """
+    Give every listing in the DB a visit history: each day with a price row counts as a
+    visit, each price move as a change, and the last day with a price (or updated_at, if
+    later) as the last visit. updated_at alone is not: unchanged listings skipped by the
+    fingerprint index keep the day of their last change. Returns listings seeded.
+    """
+    seeded = 0
+    for source, rows in groupby(_recrawl_rows(session), key=lambda row: row[0]):
+        histories: Dict[str, VisitHistory] = {}
+        for _, source_id, first_seen, updated, changed_at, hex_hash, days, last_seen, changes, last_change in rows:
+            changes = changes or 0
+            last = to_days(last_change) if last_change else None
+            # changed_at also moves on content changes the price series does not show
+            if changed_at and changed_at.date() > first_seen and (last is None or changed_at.date() > last_change):
+                changes += 1
+                last = to_days(changed_at.date())
+            histories[source_id] = VisitHistory(
+                first_seen=to_days(first_seen),
+                last_visit=to_days(max(last_seen, updated) if last_seen else updated),
+                visits=max(days or 0, 1),
+                changes=changes,
+                last_change=last,
+                content_hash=hex_hash or "",
+            )
+            if len(histories) >= batch_size:
+                schedule.put_many(source, histories)
+                seeded += len(histories)
+                histories = {}
+        schedule.put_many(source, histories)
+        seeded += len(histories)
+    return seeded
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _insert(session: Session, model):
+    """Dialect-specific INSERT supporting ON CONFLICT (PostgreSQL or SQLite)."""
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
+
+def _bulk_upsert(
+    session: Session,
+    items: List,
+    recorded_at: date,
+    index: Optional[FingerprintIndex] = None,
+) -> None:
+    """Upsert one chunk of listings with a single INSERT ... ON CONFLICT ... RETURNING, then bulk-insert prices."""
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement: last item wins
+    by_key = {(item.source_id, item.source): item for item in items}
+    now = _utcnow()
+    stmt = _insert(session, Listing).values(
+        [
+            {
+                "source_id": item.source_id,
+                "source": item.source,
+                "title": item.title,
+                "address": item.address,
+                "area": item.area,
+                "url": item.url,
+                "currency": item.currency,
+                "first_seen_at": recorded_at,
+                "updated_at": recorded_at,
+                "content_hash": content_hash(item),
+                "changed_at": now,
+            }
+            for item in by_key.values()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["source_id", "source"],
+        set_={
+            "title": stmt.excluded.title,
+            "address": stmt.excluded.address,
+            "area": stmt.excluded.area,
+            "url": stmt.excluded.url,
+            "updated_at": stmt.excluded.updated_at,
+            "content_hash": stmt.excluded.content_hash,
+            "changed_at": case(
+                (Listing.content_hash.is_distinct_from(stmt.excluded.content_hash), stmt.excluded.changed_at),
+                else_=Listing.changed_at,
+            ),
+        },
+    ).returning(Listing.id, Listing.source_id, Listing.source)
+    ids = {(source_id, source): listing_id for listing_id, source_id, source in session.execute(stmt)}
+    prices = [
+        {"listing_id": ids[key], "price": item.price, "recorded_at": recorded_at}
+        for key, item in by_key.items()
+        if item.price is not None
+    ]
+    if prices:
+        _insert_prices(session, prices)
+    if index is not None:
+        for key, item in by_key.items():
+            index.remember(item, ids[key], recorded_at)
 
 
-def _upsert_listing(session: Session, item, recorded_at: date) -> None:
+def _csv_row(values: Sequence) -> str:
+    """
+    One COPY CSV line: None as an unquoted empty field (NULL), every string quoted,
+    so an empty string stays "" instead of loading as NULL like in the other modes.
+    """
+    fields = []
+    for value in values:
+        if value is None:
+            fields.append("")
+        elif isinstance(value, str):
+            fields.append('"' + value.replace('"', '""') + '"')
+        else:
+            fields.append(str(value))
+    return ",".join(fields) + "\n"
+
+
+def _copy_upsert(
+    session: Session,
+    items: Iterable,
+    recorded_at: date,
+    index: Optional[FingerprintIndex] = None,
+) -> int:
+    """PostgreSQL: COPY all items into a temp staging table, then two set-based upserts."""
+    buf = io.StringIO()
+    processed = 0
+    staged: Dict[Tuple[str, str], object] = {}
+    for item in items:
+        if index is not None:
+            staged[(item.source_id, item.source)] = item
+        buf.write(_csv_row(
+            (processed, item.source_id, item.source, item.title, item.address, item.area,
+             item.url, item.currency, item.price, content_hash(item))
+        ))
+        processed += 1
+    if not processed:
+        return 0
+    buf.seek(0)
+    conn = session.connection()
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE IF NOT EXISTS listing_stage ("
+        " seq integer, source_id varchar(255), source varchar(128), title varchar(512),"
+        " address varchar(512), area varchar(256), url text, currency varchar(8), price double precision,"
+        " content_hash varchar(16)"
+        ") ON COMMIT DROP"
+    )
+    cursor = conn.connection.cursor()
+    cursor.copy_expert(
+        "COPY listing_stage (seq, source_id, source, title, address, area, url, currency, price, content_hash)"
+        " FROM STDIN WITH (FORMAT csv)",
+        buf,
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO listings (source_id, source, title, address, area, url, currency, first_seen_at, updated_at,"
+        " content_hash, changed_at)"
+        " SELECT DISTINCT ON (source_id, source) source_id, source, title, address, area, url, currency, %(d)s, %(d)s,"
+        " content_hash, %(now)s"
+        " FROM listing_stage ORDER BY source_id, source, seq DESC"
+        " ON CONFLICT (source_id, source) DO UPDATE SET title = EXCLUDED.title, address = EXCLUDED.address,"
+        " area = EXCLUDED.area, url = EXCLUDED.url, updated_at = EXCLUDED.updated_at,"
+        " content_hash = EXCLUDED.content_hash,"
+        " changed_at = CASE WHEN listings.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+        " THEN EXCLUDED.changed_at ELSE listings.changed_at END",
+        {"d": recorded_at, "now": _utcnow()},
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO listing_price_history (listing_id, price, recorded_at)"
+        " SELECT DISTINCT ON (l.id) l.id, s.price, %(d)s FROM listing_stage s"
+        " JOIN listings l ON l.source_id = s.source_id AND l.source = s.source"
+        " WHERE s.price IS NOT NULL ORDER BY l.id, s.seq DESC"
+        " ON CONFLICT (listing_id, recorded_at) DO NOTHING",
+        {"d": recorded_at},
+    )
+    if index is not None:
+        ids = conn.exec_driver_sql(
+            "SELECT DISTINCT l.source_id, l.source, l.id FROM listing_stage s"
+            " JOIN listings l ON l.source_id = s.source_id AND l.source = s.source"
+        )
+        for source_id, source, listing_id in ids:
+            index.remember(staged[(source_id, source)], listing_id, recorded_at)
+    return processed
+
+
+def _upsert_listing(session: Session, item, recorded_at: date) -> int:
     stmt = select(Listing).where(
         Listing.source_id == item.source_id,
         Listing.source == item.source,
     )
     row = session.execute(stmt).scalars().one_or_none()
+    item_hash = content_hash(item)
     if row:
         row.title = item.title
         row.address = item.address
         row.area = item.area
         row.url = item.url
         row.updated_at = recorded_at
+        if row.content_hash != item_hash:
+            row.content_hash = item_hash
+            row.changed_at = _utcnow()
         listing_id = row.id
     else:
         listing = Listing(
@@ -66,6 +590,8 @@ def _upsert_listing(session: Session, item, recorded_at: date) -> None:
             url=item.url,
             first_seen_at=recorded_at,
             updated_at=recorded_at,
+            content_hash=item_hash,
+            changed_at=_utcnow(),
         )
         session.add(listing)
         session.flush()
@@ -81,43 +607,132 @@ def _upsert_listing(session: Session, item, recorded_at: date) -> None:
         session.add(
             ListingPriceHistory(listing_id=listing_id, price=item.price, recorded_at=recorded_at)
         )
+    return listing_id
 
 
-def _sync_to_api(session: Session, recorded_at: date) -> int:
-    """Export listing + price snapshot to Cloudflare Worker API. Returns count sent."""
-    import httpx
-    from scraper.config import API_INGEST_URL, API_INGEST_SECRET
-    if not API_INGEST_URL:
-        return 0
+def _iter_sync_rows(
+    session: Session,
+    recorded_at: date,
+    fmt: PayloadFormat,
+    yield_per: int = 1000,
+) -> Iterator[bytes]:
+    """Stream listing + price rows for recorded_at, encoded in fmt (server-side cursor, no ORM objects kept)."""
     stmt = (
-        select(Listing, ListingPriceHistory.price)
+        select(*_SYNC_COLUMNS)
         .join(ListingPriceHistory, Listing.id == ListingPriceHistory.listing_id)
         .where(ListingPriceHistory.recorded_at == recorded_at)
+        .execution_options(yield_per=yield_per)
     )
-    rows = list(session.execute(stmt).all())
-    payload = {
-        "recorded_at": recorded_at.isoformat(),
-        "listings": [
-            {
-                "source_id": r[0].source_id,
-                "source": r[0].source,
-                "title": r[0].title,
-                "address": r[0].address,
-                "area": r[0].area,
-                "url": r[0].url,
-                "price": r[1],
-            }
-            for r in rows
-        ],
-    }
-    headers = {"Content-Type": "application/json"}
-    if API_INGEST_SECRET:
-        headers["X-Ingest-Secret"] = API_INGEST_SECRET
-    ingest_url = f"{API_INGEST_URL.rstrip('/')}/api/ingest" if not API_INGEST_URL.rstrip("/").endswith("ingest") else API_INGEST_URL.rstrip("/")
+    yield from _encoded_rows(session.execute(stmt), fmt)
+
+
+def _encoded_rows(result, fmt: PayloadFormat) -> Iterator[bytes]:
+    """Rows of a _SYNC_COLUMNS query encoded in fmt, one ListingBatch per yield_per partition."""
+    names = list(result.keys())
+    for rows in result.partitions():
+        yield from fmt.encode_batch(ListingBatch.from_columns(dict(zip(names, zip(*rows)))), names)
+
+
+def _iter_delta_rows(
+    session: Session,
+    recorded_at: date,
+    state: SyncState,
+    fmt: PayloadFormat,
+    yield_per: int = 1000,
+) -> Iterator[Union[dict, bytes]]:
+    """
+    Rows that differ from the last synced day (state.last_recorded_at): listings whose content
+    changed since the watermark or that were absent that day, then {"deleted": true} rows for
+    listings present that day but gone on recorded_at.
+    """
+    today = aliased(ListingPriceHistory)
+    base = aliased(ListingPriceHistory)
+    changed = (
+        select(*_SYNC_COLUMNS[:-1], today.price)
+        .join(today, and_(today.listing_id == Listing.id, today.recorded_at == recorded_at))
+        .outerjoin(base, and_(base.listing_id == Listing.id, base.recorded_at == state.last_recorded_at))
+        .where(or_(Listing.changed_at > state.last_synced_at, base.id.is_(None)))
+        .execution_options(yield_per=yield_per)
+    )
+    yield from _encoded_rows(session.execute(changed), fmt)
+    if state.last_recorded_at == recorded_at:
+        return
+    deleted = (
+        select(Listing.source_id, Listing.source)
+        .join(base, and_(base.listing_id == Listing.id, base.recorded_at == state.last_recorded_at))
+        .outerjoin(today, and_(today.listing_id == Listing.id, today.recorded_at == recorded_at))
+        .where(today.id.is_(None))
+        .execution_options(yield_per=yield_per)
+    )
+    for row in session.execute(deleted):
+        yield {"source_id": row.source_id, "source": row.source, "deleted": True}
+
+
+def _iter_area_stats(session: Session, recorded_at: date) -> Iterator[dict]:
+    stmt = select(
+        AreaDailyStats.area,
+        AreaDailyStats.count,
+        AreaDailyStats.avg_price,
+        AreaDailyStats.median_price,
+        AreaDailyStats.min_price,
+        AreaDailyStats.max_price,
+    ).where(AreaDailyStats.recorded_at == recorded_at)
+    for row in session.execute(stmt):
+        yield {**row._mapping, "area": row.area or None}
+
+
+def run_sync(recorded_at: date, mode: str = SYNC_MODE) -> SyncReport:
+    """Sync recorded_at to the Worker API in a session of its own (for the Celery sync task)."""
+    session = get_session()
     try:
-        with httpx.Client(timeout=30) as client:
-            resp = client.post(ingest_url, json=payload, headers=headers)
-            resp.raise_for_status()
-        return len(payload["listings"])
-    except Exception:
-        return 0
+        return _sync_to_api(session, recorded_at, mode)
+    finally:
+        session.close()
+
+
+def _sync_to_api(session: Session, recorded_at: date, mode: str = SYNC_MODE) -> SyncReport:
+    """
+    Export listing + price snapshot to Cloudflare Worker API in chunks. Returns per-chunk report.
+    mode "delta" sends only changes since the last successful sync (the Worker carries unchanged
+    rows forward from that day); "full" resends every row for recorded_at.
+    """
+    from scraper.config import API_INGEST_URL
+    if not API_INGEST_URL:
+        return SyncReport()
+    started_at = _utcnow()
+    state = session.get(SyncState, SYNC_STATE_NAME)
+    client = IngestClient()
+    if mode == "delta" and state is not None and state.last_recorded_at <= recorded_at:
+        report = client.send(
+            recorded_at,
+            _iter_delta_rows(session, recorded_at, state, client.format),
+            fields={"mode": "delta", "base_recorded_at": state.last_recorded_at.isoformat()},
+            first_fields={"carry_forward": True},
+        )
+    else:
+        report = client.send(recorded_at, _iter_sync_rows(session, recorded_at, client.format))
+    # Precomputed per-area aggregates for trend queries; without them the Worker
+    # falls back to aggregating price_history, so a failure here is not fatal
+    stats = client.send(recorded_at, _iter_area_stats(session, recorded_at), key="area_stats")
+    for chunk in report.failed_chunks() + stats.failed_chunks():
+        logger.warning(
+            "ingest chunk %d (%d rows) failed after %d attempts: %s",
+            chunk.index, chunk.rows, chunk.attempts, chunk.error,
+        )
+    for chunk in report.chunks + stats.chunks:
+        if chunk.errors:
+            # The Worker applied the rest of the chunk; the watermark stays put so the next sync resends it
+            logger.warning(
+                "ingest chunk %d: %d of %d rows rejected by the Worker: %s",
+                chunk.index, chunk.errors, chunk.rows, chunk.error_samples,
+            )
+    if report.complete:
+        # Advance the watermark only when every chunk landed with no rejected rows
+        if state is None:
+            state = SyncState(name=SYNC_STATE_NAME, last_synced_at=started_at, last_recorded_at=recorded_at)
+            session.add(state)
+        else:
+            state.last_synced_at = started_at
+            state.last_recorded_at = recorded_at
+        session.commit()
+    return report
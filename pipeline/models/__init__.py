@@ -1,11 +1,16 @@
+from models.analytics import AreaPriceTrend, ListingMetrics
 from models.db import Base, get_engine, get_session, init_db
-from models.listing import Listing, ListingPriceHistory
+from models.listing import AreaDailyStats, Listing, ListingPriceHistory, SyncState
 
 __all__ = [
     "Base",
     "get_engine",
     "get_session",
     "init_db",
+    "AreaDailyStats",
+    "AreaPriceTrend",
     "Listing",
+    "ListingMetrics",
     "ListingPriceHistory",
+    "SyncState",
 ]
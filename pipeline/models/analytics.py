@@ -0,0 +1,46 @@
+"""Tables written by the analytics job (pipeline/analytics)."""
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.db import Base
+
+
+class AreaPriceTrend(Base):
+    """Per-area price distribution for one day, with a rolling median of daily medians."""
+    __tablename__ = "area_price_trends"
+
+    recorded_at: Mapped[date] = mapped_column(Date, primary_key=True)
+    # "" for listings without an area
+    area: Mapped[str] = mapped_column(String(256), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    median_price: Mapped[float] = mapped_column(Float, nullable=False)
+    rolling_median: Mapped[float] = mapped_column(Float, nullable=False)
+    p10: Mapped[float] = mapped_column(Float, nullable=False)
+    p25: Mapped[float] = mapped_column(Float, nullable=False)
+    p75: Mapped[float] = mapped_column(Float, nullable=False)
+    p90: Mapped[float] = mapped_column(Float, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ListingMetrics(Base):
+    """Per-listing price changes, days on market and outlier score as of its last price."""
+    __tablename__ = "listing_metrics"
+
+    listing_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    last_seen_at: Mapped[date] = mapped_column(Date, nullable=False)
+    days_on_market: Mapped[int] = mapped_column(Integer, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    last_price: Mapped[float] = mapped_column(Float, nullable=False)
+    price_changes: Mapped[int] = mapped_column(Integer, nullable=False)
+    previous_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    last_change_at: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    last_change_pct: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Percentile rank of last_price among the area's prices that day (0-1]
+    area_percentile: Mapped[float] = mapped_column(Float, nullable=False)
+    # Robust z-score of log(last_price) within the area that day; |score| > ANALYTICS_OUTLIER_Z is an outlier
+    outlier_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    is_outlier: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -1,8 +1,8 @@
 """Listing and price history models for ETL storage."""
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Date, Float, ForeignKey, Index, String, Text, UniqueConstraint
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.db import Base
@@ -22,6 +22,9 @@ class Listing(Base):
     currency: Mapped[str] = mapped_column(String(8), default="USD")
     first_seen_at: Mapped[date] = mapped_column(Date, nullable=False)
     updated_at: Mapped[date] = mapped_column(Date, nullable=False)
+    # Hash of synced fields (title/address/area/url/price); changed_at moves only when it changes
+    content_hash: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    changed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
 
     price_history: Mapped[list] = relationship("ListingPriceHistory", back_populates="listing", order_by="ListingPriceHistory.recorded_at")
 
@@ -31,7 +34,11 @@ class Listing(Base):
 
 
 class ListingPriceHistory(Base):
-    """Daily (or per-scrape) price snapshot for trend analysis."""
+    """
+    Daily (or per-scrape) price snapshot for trend analysis. On PostgreSQL the table is
+    range-partitioned by recorded_at month (migration 003, primary key (id, recorded_at));
+    the loader creates the partition for a new month before writing to it.
+    """
     __tablename__ = "listing_price_history"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -44,3 +51,27 @@ class ListingPriceHistory(Base):
     __table_args__ = (
         Index("ix_listing_price_recorded", "listing_id", "recorded_at", unique=True),
     )
+
+
+class SyncState(Base):
+    """Watermark of the last successful sync to the Worker API (one row per target)."""
+    __tablename__ = "sync_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_recorded_at: Mapped[date] = mapped_column(Date, nullable=False)
+
+
+class AreaDailyStats(Base):
+    """Per-area price aggregates for one day, recomputed from listing_price_history after each load."""
+    __tablename__ = "area_daily_stats"
+
+    recorded_at: Mapped[date] = mapped_column(Date, primary_key=True)
+    # "" for listings without an area
+    area: Mapped[str] = mapped_column(String(256), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    avg_price: Mapped[float] = mapped_column(Float, nullable=False)
+    median_price: Mapped[float] = mapped_column(Float, nullable=False)
+    min_price: Mapped[float] = mapped_column(Float, nullable=False)
+    max_price: Mapped[float] = mapped_column(Float, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -4,67 +4,92 @@ Use in GitHub Actions; set API_INGEST_URL (and optional API_INGEST_SECRET) as se
 """
 import os
 import sys
-from datetime import date
+from datetime import date, datetime, timezone
+from itertools import chain
 from pathlib import Path
+from typing import Optional
 
 # Ensure pipeline root is on path
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-# Load env from pipeline/.env or from environment (CI injects secrets)
-from dotenv import load_dotenv
-load_dotenv(Path(__file__).resolve().parent / ".env")
-
+# Settings come from the environment (CI injects secrets) or pipeline/.env, see scraper.config
+from scraper import metrics
 from scraper.config import API_INGEST_URL, DEFAULT_BASE_URL
-from scraper.extractors import ExampleListingExtractor
+from scraper.crawl import crawl_sources
+from scraper.extract_pool import make_pool
+from scraper.extractors import resolve_sources
 from scraper.fetcher import Fetcher
+from scraper.ingest import IngestClient, SyncReport, ingest_endpoint, unique_rows
+from scraper.recrawl import make_schedule
+from scraper.snapshot import make_snapshot_writer
+from scraper.stages import threaded
+
+
+def _scrape_and_sync(fetcher: Fetcher, today: date) -> Optional[SyncReport]:
+    """Crawl every source and stream the listings to the Worker; None when nothing was extracted."""
+    base_url = os.getenv("SCRAPE_BASE_URL", DEFAULT_BASE_URL)
+    pool = make_pool()
+    # Replay later with: python -m scraper.replay --sync --from <day>
+    snapshot = make_snapshot_writer(today)
+    # No DB here: with RECRAWL_STATE, visit histories start from the first run that follows detail pages
+    schedule = make_schedule()
+    try:
+        items = crawl_sources(resolve_sources(default_url=base_url), fetcher, pool, schedule)
+        if snapshot:
+            items = snapshot.tee(items)
+        items = threaded(items)
+        first = next(items, None)
+        if first is None:
+            return None
+        client = IngestClient()
+        report = client.send(today, unique_rows(chain([first], items), client.format))
+        if snapshot:
+            for path in snapshot.close():
+                print(f"Snapshot: {path}")
+            snapshot = None
+        return report
+    finally:
+        if pool:
+            pool.close()
+        if snapshot:
+            snapshot.abort()
+        if schedule is not None:
+            schedule.save()
 
 
 def main() -> int:
     if not API_INGEST_URL:
         print("API_INGEST_URL not set; skipping sync.")
         return 0
-    base_url = os.getenv("SCRAPE_BASE_URL", DEFAULT_BASE_URL)
+    started_at = datetime.now(timezone.utc)
     fetcher = Fetcher()
-    extractor = ExampleListingExtractor()
-    html = fetcher.get_html(base_url)
-    if not html:
-        print("No HTML fetched.")
-        return 1
-    items = extractor.extract_from_html(html, base_url)
-    if not items:
+    with metrics.profiled():
+        report = _scrape_and_sync(fetcher, date.today())
+    cache = fetcher.cache.stats.as_dict() if fetcher.cache else None
+    if report is None:
         print("No listings extracted.")
+        metrics.write_report(started_at=started_at, ok=False, synced=0, http_cache=cache)
         return 1
-    today = date.today()
-    payload = {
-        "recorded_at": today.isoformat(),
-        "listings": [
-            {
-                "source_id": i.source_id,
-                "source": i.source,
-                "title": i.title,
-                "address": i.address,
-                "area": i.area,
-                "url": i.url,
-                "price": i.price,
-            }
-            for i in items
-        ],
-    }
-    import httpx
-    headers = {"Content-Type": "application/json"}
-    secret = os.getenv("API_INGEST_SECRET")
-    if secret:
-        headers["X-Ingest-Secret"] = secret
-    ingest_url = f"{API_INGEST_URL.rstrip('/')}/api/ingest"
-    try:
-        with httpx.Client(timeout=30) as client:
-            resp = client.post(ingest_url, json=payload, headers=headers)
-            resp.raise_for_status()
-    except Exception as e:
-        print(f"Ingest failed: {e}")
-        return 1
-    print(f"Synced {len(payload['listings'])} listings to {ingest_url}")
-    return 0
+    failed = report.failed_chunks()
+    for chunk in failed:
+        print(f"Ingest chunk {chunk.index} ({chunk.rows} rows) failed after {chunk.attempts} attempts: {chunk.error}")
+    if report.row_errors:
+        print(f"Worker rejected {report.row_errors} rows: {[s for c in report.chunks for s in c.error_samples][:10]}")
+    if cache:
+        print(f"HTTP cache: {cache}")
+    print(f"Synced {report.sent} listings in {len(report.chunks)} chunks to {ingest_endpoint(API_INGEST_URL)}")
+    path = metrics.write_report(
+        started_at=started_at,
+        ok=report.ok,
+        synced=report.sent,
+        chunks=len(report.chunks),
+        failed_chunks=len(failed),
+        row_errors=report.row_errors,
+        http_cache=cache,
+    )
+    if path:
+        print(f"Run report: {path}")
+    return 0 if report.ok else 1
 
 
 if __name__ == "__main__":
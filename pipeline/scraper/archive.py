@@ -0,0 +1,196 @@
+"""
+Content-addressed archive of fetched HTML, for re-extraction without
+refetching. Each distinct body is stored once (keyed by its SHA-256) as a
+WARC-like record (text headers + body) compressed into its own zstd frame and
+appended to a segment file; segments roll over at ARCHIVE_SEGMENT_BYTES. A
+SQLite index maps digests to (segment, offset, length) and records every
+capture (URL, time, source, page kind), so a run's pages can be streamed back
+in the order they were fetched. A segment is a plain concatenation of zstd frames and can
+be read with any zstd tool. Needs zstandard.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from scraper.config import ARCHIVE_DIR, ARCHIVE_LEVEL, ARCHIVE_SEGMENT_BYTES
+
+
+@dataclass
+class Capture:
+    """One archived fetch: where the body lives and what the page was."""
+    url: str
+    fetched_at: str
+    digest: str
+    segment: str
+    offset: int
+    length: int
+    status: Optional[int] = None
+    source: Optional[str] = None
+    kind: Optional[str] = None
+    source_id: Optional[str] = None
+
+
+class HtmlArchive:
+    """Deduplicated zstd segments + SQLite index under one directory."""
+
+    def __init__(
+        self,
+        directory: str = ARCHIVE_DIR,
+        segment_bytes: int = ARCHIVE_SEGMENT_BYTES,
+        level: int = ARCHIVE_LEVEL,
+    ):
+        import zstandard
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock()
+        self._segment: Optional[Path] = None
+        self._handle = None
+        self._db = sqlite3.connect(
+            str(self.directory / "index.sqlite"), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        # Several crawler processes may share the archive: each appends to its own segments
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " digest TEXT PRIMARY KEY, segment TEXT NOT NULL, offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS captures ("
+            " id INTEGER PRIMARY KEY, url TEXT NOT NULL, fetched_at TEXT NOT NULL, day TEXT NOT NULL,"
+            " status INTEGER, digest TEXT NOT NULL, source TEXT, kind TEXT, source_id TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_captures_source_day ON captures (source, day)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_captures_url_day ON captures (url, day)")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle:
+                self._handle.close()
+                self._handle = None
+            self._db.close()
+
+    def _writable_segment(self):
+        """Open segment of this process, rolled over once it reaches segment_bytes."""
+        if self._handle is None or self._handle.tell() >= self.segment_bytes:
+            if self._handle:
+                self._handle.close()
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            self._segment = self.directory / f"seg-{stamp}-{os.getpid()}.warc.zst"
+            self._handle = open(self._segment, "ab")
+        return self._handle
+
+    def put(
+        self,
+        url: str,
+        body: str,
+        status: Optional[int] = None,
+        source: Optional[str] = None,
+        kind: Optional[str] = None,
+        source_id: Optional[str] = None,
+    ) -> str:
+        """Archive one fetched body (stored once per distinct content) and record the capture; returns its digest."""
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if not self._db.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                header = (
+                    "WARC/1.1\r\nWARC-Type: response\r\n"
+                    f"WARC-Target-URI: {url}\r\nWARC-Date: {now.strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+                    f"WARC-Payload-Digest: sha256:{digest}\r\n"
+                    f"Content-Type: text/html; charset=utf-8\r\nContent-Length: {len(data)}\r\n\r\n"
+                ).encode()
+                frame = self._compressor.compress(header + data + b"\r\n\r\n")
+                handle = self._writable_segment()
+                offset = handle.tell()
+                handle.write(frame)
+                handle.flush()
+                self._db.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, segment, offset, length, size) VALUES (?, ?, ?, ?, ?)",
+                    (digest, self._segment.name, offset, len(frame), len(data)),
+                )
+            self._db.execute(
+                "INSERT INTO captures (url, fetched_at, day, status, digest, source, kind, source_id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, now.isoformat(), now.date().isoformat(), status, digest, source, kind, source_id),
+            )
+        return digest
+
+    def _decode(self, frame: bytes) -> str:
+        record = self._decompressor.decompress(frame)
+        _, _, payload = record.partition(b"\r\n\r\n")
+        return payload[:-4].decode("utf-8")
+
+    def get(self, digest: str) -> Optional[str]:
+        """Body with this digest, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT segment, offset, length FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if not row:
+            return None
+        with open(self.directory / row[0], "rb") as f:
+            f.seek(row[1])
+            return self._decode(f.read(row[2]))
+
+    def captures(
+        self,
+        source: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        latest: bool = True,
+    ) -> Iterator[Capture]:
+        """
+        Captures (optionally of one source and day range), in capture order: by day, then in
+        the order they were fetched (a deduplicated body may live in an older segment).
+        latest=True keeps only the newest capture per URL and day.
+        """
+        where, params = ["1 = 1"], []
+        if source:
+            where.append("c.source = ?")
+            params.append(source)
+        if start:
+            where.append("c.day >= ?")
+            params.append(start.isoformat())
+        if end:
+            where.append("c.day <= ?")
+            params.append(end.isoformat())
+        if latest:
+            where.append("c.id = (SELECT MAX(id) FROM captures d WHERE d.url = c.url AND d.day = c.day)")
+        sql = (
+            "SELECT c.url, c.fetched_at, c.digest, b.segment, b.offset, b.length, c.status, c.source, c.kind,"
+            " c.source_id FROM captures c JOIN blobs b ON b.digest = c.digest"
+            f" WHERE {' AND '.join(where)} ORDER BY c.day, c.id"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        for row in rows:
+            yield Capture(*row)
+
+    def read(self, captures: Iterable[Capture]) -> Iterator[Tuple[Capture, str]]:
+        """(capture, body) for each capture, keeping one segment file open at a time."""
+        segment, handle = None, None
+        try:
+            for capture in captures:
+                if capture.segment != segment:
+                    if handle:
+                        handle.close()
+                    segment = capture.segment
+                    handle = open(self.directory / segment, "rb")
+                handle.seek(capture.offset)
+                yield capture, self._decode(handle.read(capture.length))
+        finally:
+            if handle:
+                handle.close()
+
+
+def make_archive(directory: str = ARCHIVE_DIR) -> Optional[HtmlArchive]:
+    """HtmlArchive for directory, or None when archiving is disabled (empty ARCHIVE_DIR)."""
+    return HtmlArchive(directory) if directory else None
@@ -0,0 +1,198 @@
+"""
+Concurrent HTTP fetcher (httpx + asyncio) for crawls spanning many pages/hosts.
+Bounded global concurrency, per-host politeness slots paced by the adaptive
+RateLimiter, HTTP/2 and pooled keep-alive connections. Same robots.txt checks
+and retry policy as Fetcher, so throughput scales with hosts, not pages.
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from scraper.config import (
+    FETCH_CONCURRENCY,
+    FETCH_PER_HOST,
+    RATE_MAX_WAIT,
+    RATE_MIN_DELAY,
+    REQUEST_TIMEOUT,
+    SCRAPE_DELAY_SECONDS,
+    USER_AGENT,
+)
+from scraper import metrics
+from scraper.archive import HtmlArchive, make_archive
+from scraper.fetcher import RETRY_STATUSES, FetchResult, HostBlocked, archive_result
+from scraper.http_cache import HttpCache, make_cache
+from scraper.rate_limit import THROTTLE_STATUSES, RateLimiter, get_limiter, parse_retry_after
+from scraper.robots import can_fetch, crawl_delay
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AsyncFetcher:
+    """Async counterpart of Fetcher: robots.txt, per-host rate limit, retries, timeout."""
+
+    def __init__(
+        self,
+        user_agent: str = USER_AGENT,
+        delay_seconds: float = SCRAPE_DELAY_SECONDS,
+        timeout: int = REQUEST_TIMEOUT,
+        respect_robots: bool = True,
+        concurrency: int = FETCH_CONCURRENCY,
+        per_host: int = FETCH_PER_HOST,
+        retries: int = 3,
+        http2: bool = True,
+        cache: Optional[HttpCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_wait: float = RATE_MAX_WAIT,
+        archive: Optional[HtmlArchive] = None,
+    ):
+        self.user_agent = user_agent
+        self.delay_seconds = delay_seconds
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.retries = retries
+        self.cache = cache if cache is not None else make_cache()
+        self.archive = archive if archive is not None else make_archive()
+        self.limiter = limiter or get_limiter()
+        self.max_wait = max_wait
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent},
+            timeout=timeout,
+            http2=http2 and _http2_available(),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._global = asyncio.Semaphore(concurrency)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._floors: Dict[str, float] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def delay_for(self, url: str) -> float:
+        """Minimum delay between requests to url's host: RATE_MIN_DELAY, raised to robots.txt Crawl-delay."""
+        floor = min(RATE_MIN_DELAY, self.delay_seconds)
+        if not self.respect_robots:
+            return floor
+        robots_delay = await asyncio.to_thread(crawl_delay, url, self.user_agent)
+        return max(floor, robots_delay or 0.0)
+
+    async def _limit(self, method, *args):
+        """Call a limiter method, off the event loop when its state is in Redis."""
+        if self.limiter.shared:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> httpx.Response:
+        if self.respect_robots and not await asyncio.to_thread(can_fetch, url, self.user_agent):
+            raise PermissionError(f"robots.txt disallows: {url}")
+        host = urlparse(url).netloc
+        slot = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        if host not in self._floors:
+            self._floors.setdefault(host, await self.delay_for(url))
+        floor = self._floors[host]
+        async with slot:
+            for attempt in range(self.retries + 1):
+                wait = await self._limit(self.limiter.reserve, host, floor, self.delay_seconds, self.max_wait)
+                if wait > self.max_wait:
+                    raise HostBlocked(f"{host} asks to wait {wait:.0f}s")
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                start = time.monotonic()
+                try:
+                    async with self._global:
+                        resp = await self._client.get(url, headers=headers)
+                except httpx.TransportError:
+                    latency = time.monotonic() - start
+                    await self._limit(self.limiter.record, host, None, latency, None, floor)
+                    metrics.record_fetch(host, None, latency)
+                    if attempt == self.retries:
+                        raise
+                    continue
+                latency = time.monotonic() - start
+                metrics.record_fetch(host, resp.status_code, latency, len(resp.content))
+                retry_after = None
+                if resp.status_code in THROTTLE_STATUSES:
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                await self._limit(self.limiter.record, host, resp.status_code, latency, retry_after, floor)
+                if resp.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return resp
+        raise RuntimeError("unreachable")
+
+    async def get_html(self, url: str) -> Optional[str]:
+        """Fetch URL and return response text or None on failure."""
+        result = await self.fetch(url)
+        return result.text
+
+    async def fetch(self, url: str, context: Optional[dict] = None) -> FetchResult:
+        """Fetch URL (conditionally, when cached); never raises. context is stored with the archived page."""
+        result = await self._fetch(url)
+        await asyncio.to_thread(archive_result, self.archive, result, context)
+        return result
+
+    async def _fetch(self, url: str) -> FetchResult:
+        # Cache and archive do file/Redis I/O: off the event loop, like the robots.txt checks
+        try:
+            headers = await asyncio.to_thread(self.cache.conditional_headers, url) if self.cache else None
+            resp = await self.get(url, headers=headers)
+            if resp.status_code == 304 and self.cache:
+                text = await asyncio.to_thread(self.cache.not_modified, url)
+                if text is not None:
+                    return FetchResult(url=url, status=304, text=text, not_modified=True)
+                resp = await self.get(url)
+            resp.raise_for_status()
+            if self.cache:
+                await asyncio.to_thread(self.cache.store, url, resp.headers, resp.text)
+            return FetchResult(url=url, status=resp.status_code, text=resp.text)
+        except httpx.HTTPStatusError as e:
+            metrics.record_fetch_error(url, str(e.response.status_code))
+            logger.debug("Fetch %s: %s", url, e)
+            return FetchResult(url=url, status=e.response.status_code, error=str(e))
+        except Exception as e:
+            metrics.record_fetch_error(url, type(e).__name__)
+            logger.warning("Fetch %s failed: %s", url, str(e) or type(e).__name__)
+            return FetchResult(url=url, error=str(e) or type(e).__name__)
+
+    async def fetch_all(self, urls: Iterable[str]) -> AsyncIterator[FetchResult]:
+        """Fetch urls concurrently; yield results as they complete (not in input order)."""
+        window = self.concurrency * 4
+        pending = set()
+        for url in urls:
+            pending.add(asyncio.ensure_future(self.fetch(url)))
+            if len(pending) >= window:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+
+def fetch_many(urls: Iterable[str], **kwargs) -> List[FetchResult]:
+    """Synchronous helper: fetch urls concurrently with an AsyncFetcher and return all results."""
+
+    async def _run() -> List[FetchResult]:
+        async with AsyncFetcher(**kwargs) as fetcher:
+            return [r async for r in fetcher.fetch_all(urls)]
+
+    return asyncio.run(_run())
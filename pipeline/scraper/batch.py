@@ -0,0 +1,220 @@
+"""
+Columnar batches of listings. A ListingBatch holds one array per field
+instead of one object per listing. Prices and scrape days go in typed
+arrays. The source/area/currency strings are interned, so the few distinct
+values are shared by every row. Raw extras are kept only for the rows that
+have them. A batch encodes to ingest JSON rows, msgpack or Arrow a column at
+a time, without building a dict per listing. Each distinct interned value is
+encoded only once.
+"""
+import json
+import sys
+from array import array
+from dataclasses import fields
+from datetime import date
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from scraper.extractors.base import ListingItem
+from scraper.serialize import msgpack_array_header, msgpack_encoder, msgpack_map_header
+
+FIELDS = tuple(f.name for f in fields(ListingItem))
+# Columns with a handful of distinct values: interned on append, encoded once per value
+INTERNED = ("source", "area", "currency")
+_NAN = float("nan")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _json_value(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if isinstance(value, date):
+        return '"' + value.isoformat() + '"'
+    return json.dumps(value)
+
+
+def _raw_json(raw: Optional[dict]) -> Optional[str]:
+    return json.dumps(raw) if raw is not None else None
+
+
+def json_strings(values: Iterable[Optional[str]]) -> List[str]:
+    """JSON for a column of strings (None -> null)."""
+    return [encode_basestring_ascii(v) if v is not None else "null" for v in values]
+
+
+def json_floats(values: Iterable[Optional[float]]) -> List[str]:
+    """JSON for a column of numbers (None or NaN -> null)."""
+    return ["null" if v is None or v != v else repr(v) for v in values]
+
+
+def json_rows(names: Sequence[str], columns: Sequence[Sequence[str]]) -> Iterator[bytes]:
+    """
+    JSON objects (bytes) for rows given as columns of already-encoded values.
+    Same output as json.dumps({name: value, ...}) for each row.
+    """
+    template = "{{" + ", ".join(encode_basestring_ascii(name) + ": {}" for name in names) + "}}"
+    return map(str.encode, map(template.format, *columns))
+
+
+class ListingBatch:
+    """Struct-of-arrays batch of ListingItems (see module docstring)."""
+
+    def __init__(self, items: Iterable[ListingItem] = ()):
+        self.source_id: List[str] = []
+        self.source: List[str] = []
+        self.title: List[str] = []
+        self.address: List[Optional[str]] = []
+        self.area: List[Optional[str]] = []
+        self.price = array("d")          # NaN = no price
+        self.currency: List[str] = []
+        self.url: List[Optional[str]] = []
+        self.scraped_at = array("q")     # date ordinals, 0 = none
+        self.raw: Dict[int, dict] = {}   # row -> extras, only for rows that have them
+        self.extend(items)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence]) -> "ListingBatch":
+        """
+        Batch from columns of plain values (e.g. query results); fields without
+        a column get ListingItem's defaults (None, currency "USD").
+        """
+        batch = cls()
+        n = len(next(iter(columns.values()), ()))
+        for name in ("source_id", "source", "title", "address", "area", "currency", "url"):
+            values = columns.get(name)
+            if values is None:
+                values = ["USD" if name == "currency" else None] * n
+            elif name in INTERNED:
+                values = [sys.intern(v) if v else v for v in values]
+            setattr(batch, name, list(values))
+        if "price" in columns:
+            batch.price = array("d", (_NAN if p is None else p for p in columns["price"]))
+        else:
+            batch.price = array("d", [_NAN]) * n
+        days = columns.get("scraped_at")
+        batch.scraped_at = array("q", (d.toordinal() if d else 0 for d in days)) if days else array("q", [0]) * n
+        if "raw" in columns:
+            batch.raw = {i: raw for i, raw in enumerate(columns["raw"]) if raw is not None}
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.source_id)
+
+    def append(self, item: ListingItem) -> None:
+        if item.raw is not None:
+            self.raw[len(self.source_id)] = item.raw
+        self.source_id.append(item.source_id)
+        self.source.append(sys.intern(item.source))
+        self.title.append(item.title)
+        self.address.append(item.address)
+        self.area.append(sys.intern(item.area) if item.area else item.area)
+        self.price.append(_NAN if item.price is None else item.price)
+        self.currency.append(sys.intern(item.currency) if item.currency else item.currency)
+        self.url.append(item.url)
+        self.scraped_at.append(item.scraped_at.toordinal() if item.scraped_at else 0)
+
+    def extend(self, items: Iterable[ListingItem]) -> None:
+        for item in items:
+            self.append(item)
+
+    def __getitem__(self, i: int) -> ListingItem:
+        price = self.price[i]
+        day = self.scraped_at[i]
+        return ListingItem(
+            self.source_id[i], self.source[i], self.title[i], self.address[i], self.area[i],
+            None if price != price else price, self.currency[i], self.url[i],
+            date.fromordinal(day) if day else None, self.raw.get(i),
+        )
+
+    def __iter__(self) -> Iterator[ListingItem]:
+        return map(self.__getitem__, range(len(self)))
+
+    def _values(self, name: str) -> Sequence:
+        """Column as Python values (price None for missing, scraped_at as dates)."""
+        if name == "price":
+            return [None if v != v else v for v in self.price]
+        if name == "scraped_at":
+            days = {d: date.fromordinal(d) if d else None for d in set(self.scraped_at)}
+            return [days[d] for d in self.scraped_at]
+        if name == "raw":
+            return [self.raw.get(i) for i in range(len(self))] if self.raw else [None] * len(self)
+        return getattr(self, name)
+
+    def _encoded(self, name: str, encode) -> list:
+        """Column encoded value by value; interned columns and days once per distinct value."""
+        if name in INTERNED or name == "scraped_at":
+            values = self._values(name) if name == "scraped_at" else getattr(self, name)
+            cache = {v: encode(v) for v in set(values)}
+            return list(map(cache.__getitem__, values))
+        if name == "raw":
+            none = encode(None)
+            column = [none] * len(self)
+            for i, raw in self.raw.items():
+                column[i] = encode(raw)
+            return column
+        return list(map(encode, self._values(name)))
+
+    def _json_column(self, name: str) -> List[str]:
+        if name == "price":
+            return json_floats(self.price)
+        if name in ("source_id", "title", "address", "url"):
+            return json_strings(getattr(self, name))
+        return self._encoded(name, _json_value)
+
+    def iter_json(self, names: Sequence[str] = FIELDS) -> Iterator[bytes]:
+        """One JSON object (bytes) per row with the given fields, as json.dumps of to_dict() would give."""
+        return json_rows(names, [self._json_column(name) for name in names])
+
+    def to_json(self, names: Sequence[str] = FIELDS) -> bytes:
+        """JSON array of row objects."""
+        return b"[" + b", ".join(self.iter_json(names)) + b"]"
+
+    def iter_msgpack(self, names: Sequence[str] = FIELDS) -> Iterator[bytes]:
+        """One msgpack map per row with the given fields (scraped_at as ISO date strings)."""
+        pack = msgpack_encoder()
+
+        def pack_day(day: Optional[date]) -> bytes:
+            return pack(day.isoformat() if day else None)
+
+        columns = [self._encoded(name, pack_day if name == "scraped_at" else pack) for name in names]
+        # One %b per field after its packed key: rows are assembled in C by bytes % tuple
+        template = msgpack_map_header(len(names)) + b"".join(
+            pack(name).replace(b"%", b"%%") + b"%b" for name in names
+        )
+        return map(template.__mod__, zip(*columns))
+
+    def to_msgpack(self, names: Sequence[str] = FIELDS) -> bytes:
+        """msgpack array of row maps. Needs msgspec or msgpack."""
+        return msgpack_array_header(len(self)) + b"".join(self.iter_msgpack(names))
+
+    def to_arrow(self, schema=None):
+        """
+        pyarrow Table of the batch: all fields, or the fields of schema cast to its types.
+        Interned columns become dictionary arrays and raw holds JSON strings. Needs pyarrow.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        names = schema.names if schema is not None else FIELDS
+        arrays = []
+        for name in names:
+            if name == "price":
+                values = pa.Array.from_buffers(pa.float64(), len(self), [None, pa.py_buffer(self.price)])
+                column = pc.if_else(pc.is_nan(values), pa.scalar(None, pa.float64()), values)
+            elif name == "scraped_at":
+                days = pa.Array.from_buffers(pa.int64(), len(self), [None, pa.py_buffer(self.scraped_at)])
+                column = pc.if_else(pc.equal(days, 0), None, pc.subtract(days, _EPOCH_ORDINAL))
+                column = column.cast(pa.int32()).view(pa.date32())
+            elif name == "raw":
+                column = pa.array(self._encoded("raw", _raw_json), pa.string())
+            elif name in INTERNED:
+                column = pa.array(getattr(self, name), pa.string()).dictionary_encode()
+            else:
+                column = pa.array(getattr(self, name), pa.string())
+            if schema is not None and column.type != schema.field(name).type:
+                column = column.cast(schema.field(name).type)
+            arrays.append(column)
+        if schema is not None:
+            return pa.Table.from_arrays(arrays, schema=schema)
+        return pa.Table.from_arrays(arrays, names=list(names))
@@ -0,0 +1,277 @@
+"""
+Multi-page crawl: follow pagination (and optionally detail pages) from a seed
+URL through a CrawlFrontier, yielding ListingItems as pages are extracted.
+"""
+import hashlib
+import threading
+from collections import deque
+from dataclasses import asdict
+from datetime import date
+from functools import partial
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scraper import metrics
+from scraper.config import (
+    CRAWL_BLOOM_CAPACITY,
+    CRAWL_STATE,
+    SCRAPE_FOLLOW_DETAILS,
+    SCRAPE_MAX_DEPTH,
+    SCRAPE_MAX_PAGES,
+)
+from scraper.extract_pool import ExtractPool, Page, PageResult
+from scraper.extractors.base import CrawlLink, ListingExtractor, ListingItem
+from scraper.fetcher import FetchResult, Fetcher
+from scraper.frontier import CrawlFrontier, FrontierEntry, make_store
+from scraper.recrawl import RecrawlSchedule
+
+# Offer a frontier save every N pages (see CrawlCheckpoints)
+CHECKPOINT_EVERY = 10
+
+
+class CrawlCheckpoints:
+    """
+    Frontier saves held back until the listings yielded before them are durable.
+    crawl() counts the items it yields and offers a save every CHECKPOINT_EVERY
+    pages; the consumer calls committed(n) once the first n items it received
+    are committed, which runs every save offered at or before item n. A crash
+    before that leaves the previous save in place, so no listing is lost.
+    """
+
+    def __init__(self):
+        self.yielded = 0
+        self._offers: Deque[Tuple[int, Callable[[], None]]] = deque()
+        self._lock = threading.Lock()
+
+    def offer(self, save: Callable[[], None]) -> None:
+        with self._lock:
+            self._offers.append((self.yielded, save))
+
+    def committed(self, count: int) -> None:
+        with self._lock:
+            ready = []
+            while self._offers and self._offers[0][0] <= count:
+                ready.append(self._offers.popleft()[1])
+        for save in ready:
+            save()
+
+
+def _item_from_dict(row: dict) -> ListingItem:
+    scraped_at = row.get("scraped_at")
+    return ListingItem(**{**row, "scraped_at": date.fromisoformat(scraped_at) if scraped_at else None})
+
+
+def crawl_key(base_url: str, source: str, day: Optional[date] = None) -> str:
+    """Key for persisted crawl state: one crawl per seed URL and source per day."""
+    day = day or date.today()
+    digest = hashlib.sha1(base_url.encode()).hexdigest()[:16]
+    return f"{source}:{day.isoformat()}:{digest}"
+
+
+def _extractor_tag(extractor: ListingExtractor) -> str:
+    return f"{type(extractor).__module__}.{type(extractor).__qualname__}:{extractor.source_name}"
+
+
+def _cached_extraction(
+    extractor: ListingExtractor,
+    fetcher: Fetcher,
+    result: FetchResult,
+) -> Optional[Tuple[List[ListingItem], List[CrawlLink]]]:
+    """Cached extract_page result for a page that came back 304 Not Modified, if any."""
+    cache = fetcher.cache
+    if not (cache and result.not_modified):
+        return None
+    meta = cache.get_meta(result.url)
+    if not meta or meta.get("extractor") != _extractor_tag(extractor):
+        return None
+    cache.stats.extractions_skipped += 1
+    today = date.today()
+    items = [ListingItem(**{**row, "scraped_at": today}) for row in meta["items"]]
+    return items, [CrawlLink(**link) for link in meta["links"]]
+
+
+def _cache_extraction(
+    extractor: ListingExtractor,
+    fetcher: Fetcher,
+    result: FetchResult,
+    items: List[ListingItem],
+    links: List[CrawlLink],
+) -> None:
+    if fetcher.cache:
+        fetcher.cache.set_meta(
+            result.url,
+            {
+                "extractor": _extractor_tag(extractor),
+                "items": [{**item.to_dict(), "scraped_at": None} for item in items],
+                "links": [asdict(link) for link in links],
+            },
+        )
+
+
+def _extract_batch(
+    extractor: ListingExtractor,
+    fetcher: Fetcher,
+    entries: List[FrontierEntry],
+    pool: Optional[ExtractPool] = None,
+) -> Iterator[PageResult]:
+    """Fetch entries and extract them (in pool worker processes if given); one result per entry, in order."""
+    fetched = []
+    for entry in entries:
+        context = {"source": extractor.source_name, "kind": entry.kind, "source_id": entry.source_id}
+        fetched.append((entry, fetcher.fetch(entry.url, context)))
+    results: List[Optional[PageResult]] = []
+    todo: List[Tuple[int, Page]] = []
+    for entry, result in fetched:
+        page = PageResult(url=entry.url, kind=entry.kind, source_id=entry.source_id)
+        if result.text and entry.kind != "detail":
+            cached = _cached_extraction(extractor, fetcher, result)
+            if cached:
+                page.items, page.links = cached
+            elif pool is None:
+                with metrics.PARSE_SECONDS.time(extractor.source_name, "page"):
+                    page.items, page.links = extractor.extract_page(result.text, result.url)
+                _cache_extraction(extractor, fetcher, result, page.items, page.links)
+            else:
+                todo.append((len(results), Page(result.url, result.text, entry.kind, entry.source_id)))
+                page = None
+        elif result.text:
+            if pool is None:
+                with metrics.PARSE_SECONDS.time(extractor.source_name, "detail"):
+                    item = extractor.extract_detail(result.text, entry.url, entry.source_id)
+                page.items = [item] if item else []
+            else:
+                todo.append((len(results), Page(entry.url, result.text, entry.kind, entry.source_id)))
+                page = None
+        results.append(page)
+    if todo:
+        for (index, _), page in zip(todo, pool.map(extractor, [p for _, p in todo])):
+            result = fetched[index][1]
+            if page.kind != "detail":
+                _cache_extraction(extractor, fetcher, result, page.items, page.links)
+            results[index] = page
+    yield from results
+
+
+def crawl(
+    base_url: str,
+    extractor: ListingExtractor,
+    fetcher: Optional[Fetcher] = None,
+    max_pages: int = SCRAPE_MAX_PAGES,
+    max_depth: int = SCRAPE_MAX_DEPTH,
+    follow_details: bool = SCRAPE_FOLLOW_DETAILS,
+    state: str = CRAWL_STATE,
+    pool: Optional[ExtractPool] = None,
+    schedule: Optional[RecrawlSchedule] = None,
+    checkpoints: Optional["CrawlCheckpoints"] = None,
+) -> Iterator[ListingItem]:
+    """
+    Crawl from base_url, yielding listings page by page. With a state store
+    (CRAWL_STATE: directory or "redis") and CrawlCheckpoints, the frontier is
+    saved once the consumer has committed the listings of the pages it marks
+    done, and an interrupted crawl resumes from there instead of restarting
+    from page 1 (a crawl without checkpoints only resumes). With an ExtractPool,
+    queued pages are fetched in batches and parsed in worker processes. With a
+    RecrawlSchedule, detail links are held until every listing page is in, and
+    only the ones its plan chooses are followed.
+    """
+    fetcher = fetcher or Fetcher()
+    store = make_store(state)
+    key = crawl_key(base_url, extractor.source_name)
+    saved = store.load(key) if store else None
+    # Listings whose detail page is queued: yielded once, after the detail page (or at the end)
+    pending: Dict[str, ListingItem] = {}
+    # Detail links waiting for the recrawl plan: source_id -> (url, depth)
+    held: Dict[str, Tuple[str, int]] = {}
+    if saved:
+        frontier = CrawlFrontier.from_state(saved)
+        pending = {sid: _item_from_dict(row) for sid, row in saved.get("pending", {}).items()}
+        held = {sid: (url, depth) for sid, (url, depth) in saved.get("held", {}).items()}
+    else:
+        frontier = CrawlFrontier(max_depth=max_depth, max_pages=max_pages, bloom_capacity=CRAWL_BLOOM_CAPACITY)
+        frontier.add(base_url, depth=0, kind="seed")
+    batch_size = pool.workers * 2 if pool else 1
+    checkpointed = frontier.pages_popped
+    plan = schedule.plan(extractor.source_name) if schedule is not None and follow_details else None
+    if plan and held:
+        plan.select([pending[sid] for sid in held if sid in pending])
+    try:
+        while frontier or held:
+            ready: List[ListingItem] = []
+            if not frontier:
+                # Every listing page is in: queue the detail pages the plan spends its budget on
+                chosen = set(plan.choose() if plan else held)
+                for sid, (url, depth) in held.items():
+                    if sid not in chosen or not frontier.add(url, depth=depth, kind="detail", source_id=sid):
+                        if sid in pending:
+                            ready.append(pending.pop(sid))
+                held = {}
+            else:
+                inflight = [frontier.pop()]
+                while frontier and len(inflight) < batch_size:
+                    inflight.append(frontier.pop())
+                for entry, page in zip(inflight, _extract_batch(extractor, fetcher, inflight, pool)):
+                    if entry.kind == "detail":
+                        listed = pending.pop(entry.source_id, None)
+                        if plan and page.items:
+                            plan.record(listed, page.items[0])
+                        item = (page.items[0] if page.items else None) or listed
+                        if item:
+                            ready.append(item)
+                        continue
+                    deferred = set()
+                    if plan:
+                        linked = {link.source_id for link in page.links if link.kind == "detail"}
+                        wanted = plan.select([item for item in page.items if item.source_id in linked])
+                    for link in page.links:
+                        if link.kind == "detail" and not follow_details:
+                            continue
+                        if link.kind == "detail" and plan:
+                            if link.source_id in wanted and link.source_id not in held:
+                                held[link.source_id] = (link.url, entry.depth + 1)
+                                deferred.add(link.source_id)
+                            continue
+                        queued = frontier.add(link.url, depth=entry.depth + 1, kind=link.kind, source_id=link.source_id)
+                        if queued and link.kind == "detail":
+                            deferred.add(link.source_id)
+                    for item in page.items:
+                        if item.source_id in deferred:
+                            pending[item.source_id] = item
+                        else:
+                            ready.append(item)
+            for item in ready:
+                if checkpoints:
+                    checkpoints.yielded += 1
+                yield item
+            if store and checkpoints and frontier.pages_popped - checkpointed >= CHECKPOINT_EVERY:
+                state = {
+                    **frontier.state(),
+                    "pending": {sid: item.to_dict() for sid, item in pending.items()},
+                    "held": {sid: list(link) for sid, link in held.items()},
+                }
+                checkpoints.offer(partial(store.save, key, state))
+                checkpointed = frontier.pages_popped
+        # Page budget exhausted before every detail page was visited
+        for item in pending.values():
+            if checkpoints:
+                checkpoints.yielded += 1
+            yield item
+        if store:
+            if checkpoints:
+                checkpoints.offer(partial(store.clear, key))
+            else:
+                store.clear(key)
+    finally:
+        if plan:
+            plan.close()
+
+
+def crawl_sources(
+    sources: Iterable[Tuple[ListingExtractor, str]],
+    fetcher: Optional[Fetcher] = None,
+    pool: Optional[ExtractPool] = None,
+    schedule: Optional[RecrawlSchedule] = None,
+    checkpoints: Optional["CrawlCheckpoints"] = None,
+) -> Iterator[ListingItem]:
+    """Crawl (extractor, start URL) pairs one after another with one shared fetcher (and pool, schedule, checkpoints)."""
+    fetcher = fetcher or Fetcher()
+    for extractor, base_url in sources:
+        yield from crawl(base_url, extractor, fetcher=fetcher, pool=pool, schedule=schedule, checkpoints=checkpoints)
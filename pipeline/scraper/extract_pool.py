@@ -0,0 +1,173 @@
+"""
+Parallel extraction: HTML parsing is CPU-bound and holds the GIL, so pages
+are shipped (as UTF-8 bytes) to a pool of worker processes and the listings
+come back as compact tuples. Pages are grouped into chunks whose size adapts
+to keep each task near a target duration, and results can be returned in
+input order or as they complete.
+"""
+import hashlib
+import multiprocessing
+import pickle
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scraper import metrics
+from scraper.config import EXTRACT_WORKERS
+from scraper.extractors.base import CrawlLink, ListingExtractor, ListingItem
+
+_ITEM_FIELDS = tuple(f.name for f in fields(ListingItem))
+
+
+@dataclass
+class Page:
+    """One fetched page to extract: a listing page, or a detail page of source_id."""
+    url: str
+    html: str
+    kind: str = "next"
+    source_id: Optional[str] = None
+
+
+@dataclass
+class PageResult:
+    """Listings and crawl links extracted from one Page (detail pages: at most one item, no links)."""
+    url: str
+    kind: str
+    source_id: Optional[str] = None
+    items: List[ListingItem] = field(default_factory=list)
+    links: List[CrawlLink] = field(default_factory=list)
+
+
+# Worker process side: extractors unpickled once per process, keyed by digest
+_worker_extractors: Dict[str, ListingExtractor] = {}
+
+
+def _init_worker() -> None:
+    """Preload the extractor registry (spec files, parser backend) once per worker."""
+    from scraper.extractors.registry import source_names
+    source_names()
+
+
+def _extract_chunk(
+    key: str,
+    blob: bytes,
+    pages: List[Tuple[str, bytes, str, Optional[str]]],
+) -> Tuple[float, list, List[float]]:
+    """Extract a chunk: (total seconds, packed results, seconds per page)."""
+    extractor = _worker_extractors.get(key)
+    if extractor is None:
+        extractor = _worker_extractors[key] = pickle.loads(blob)
+    start = time.perf_counter()
+    out = []
+    seconds = []
+    for url, body, kind, source_id in pages:
+        page_start = time.perf_counter()
+        html = body.decode("utf-8")
+        if kind == "detail":
+            item = extractor.extract_detail(html, url, source_id)
+            out.append(([_pack(item)] if item else [], []))
+        else:
+            items, links = extractor.extract_page(html, url)
+            out.append(([_pack(i) for i in items], [(l.url, l.kind, l.source_id) for l in links]))
+        seconds.append(time.perf_counter() - page_start)
+    return time.perf_counter() - start, out, seconds
+
+
+def _pack(item: ListingItem) -> tuple:
+    return tuple(getattr(item, name) for name in _ITEM_FIELDS)
+
+
+class ExtractPool:
+    """Process pool running extractor.extract_page / extract_detail on batches of pages."""
+
+    def __init__(
+        self,
+        workers: int = EXTRACT_WORKERS,
+        target_seconds: float = 0.05,
+        max_chunk: int = 64,
+    ):
+        self.workers = max(1, workers)
+        self.target_seconds = target_seconds
+        self.max_chunk = max_chunk
+        self.chunk_pages = 1
+        # spawn: the pool is started from pipeline threads, where fork is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def __enter__(self) -> "ExtractPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+
+    def _adapt(self, elapsed: float, pages: int) -> None:
+        """Resize chunks so one task takes about target_seconds of worker time."""
+        if pages and elapsed > 0:
+            ideal = self.target_seconds / (elapsed / pages)
+            # Move halfway towards the ideal size to smooth out noisy pages
+            self.chunk_pages = max(1, min(self.max_chunk, round((self.chunk_pages + ideal) / 2)))
+
+    def map(self, extractor: ListingExtractor, pages: Iterable[Page], ordered: bool = True) -> Iterator[PageResult]:
+        """
+        Extract pages in the pool. ordered=True yields results in input order;
+        otherwise chunk by chunk as they finish. At most 2 chunks per worker are in flight.
+        """
+        blob = pickle.dumps(extractor)
+        key = hashlib.sha1(blob).hexdigest()
+        window = self.workers * 2
+        pending: deque = deque()   # (future, pages) in submission order
+        it = iter(pages)
+        exhausted = False
+
+        def collect(future, chunk: List[Page]) -> Iterator[PageResult]:
+            elapsed, out, seconds = future.result()
+            self._adapt(elapsed, len(chunk))
+            for page, (items, links), page_seconds in zip(chunk, out, seconds):
+                metrics.PARSE_SECONDS.observe(page_seconds, extractor.source_name, "detail" if page.kind == "detail" else "page")
+                yield PageResult(
+                    url=page.url,
+                    kind=page.kind,
+                    source_id=page.source_id,
+                    items=[ListingItem(*t) for t in items],
+                    links=[CrawlLink(*l) for l in links],
+                )
+
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < window:
+                    chunk = []
+                    for page in it:
+                        chunk.append(page)
+                        if len(chunk) >= self.chunk_pages:
+                            break
+                    if not chunk:
+                        exhausted = True
+                        break
+                    payload = [(p.url, p.html.encode("utf-8"), p.kind, p.source_id) for p in chunk]
+                    pending.append((self._executor.submit(_extract_chunk, key, blob, payload), chunk))
+                if not pending:
+                    break
+                if ordered:
+                    future, chunk = pending.popleft()
+                    yield from collect(future, chunk)
+                else:
+                    done, _ = wait([f for f, _ in pending], return_when=FIRST_COMPLETED)
+                    for entry in [e for e in pending if e[0] in done]:
+                        pending.remove(entry)
+                        yield from collect(*entry)
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+
+def make_pool(workers: int = EXTRACT_WORKERS) -> Optional[ExtractPool]:
+    """ExtractPool with workers processes, or None to extract inline (workers <= 1)."""
+    return ExtractPool(workers) if workers > 1 else None
@@ -1,4 +1,27 @@
-from scraper.extractors.base import ListingItem, ListingExtractor
-from scraper.extractors.example import ExampleListingExtractor
+from scraper.extractors.base import CrawlLink, ListingItem, ListingExtractor
+from scraper.extractors.registry import get_extractor, register, register_spec, resolve_sources
 
-__all__ = ["ListingItem", "ListingExtractor", "ExampleListingExtractor"]
+__all__ = [
+    "CrawlLink",
+    "ListingItem",
+    "ListingExtractor",
+    "ExampleListingExtractor",
+    "SpecExtractor",
+    "get_extractor",
+    "register",
+    "register_spec",
+    "resolve_sources",
+]
+
+# Extractor classes are imported on first use (their parser backends load only then)
+_LAZY = {
+    "ExampleListingExtractor": "scraper.extractors.example",
+    "SpecExtractor": "scraper.extractors.spec",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,29 @@
 """Base extractor interface and listing model."""
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import date
-from typing import Any, List, Optional
+from typing import Any, Iterator, List, Optional, Tuple
 
 
-@dataclass
+def parse_price(text: Optional[str]) -> Optional[float]:
+    """Number in a price string ("$1,200.00" -> 1200.0), or None."""
+    if not text:
+        return None
+    digits = re.sub(r"[^\d.]", "", text)
+    try:
+        return float(digits) if digits else None
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
 class ListingItem:
-    """Normalized listing record for ETL."""
+    """
+    Normalized listing record for ETL. Immutable and slotted (no per-item __dict__):
+    use dataclasses.replace to change a field, and scraper.batch.ListingBatch to
+    hold large numbers of them.
+    """
     source_id: str           # unique id on the source site
     source: str              # e.g. "example_listings"
     title: str
@@ -34,6 +50,14 @@ class ListingItem:
         }
 
 
+@dataclass
+class CrawlLink:
+    """Link found on a listing page: next page of results or a listing's detail page."""
+    url: str
+    kind: str = "next"   # "next" (pagination) or "detail"
+    source_id: Optional[str] = None   # listing the detail page belongs to
+
+
 class ListingExtractor(ABC):
     """Abstract extractor: given HTML (or URL), yield ListingItems."""
 
@@ -43,3 +67,19 @@ class ListingExtractor(ABC):
     def extract_from_html(self, html: str, url: str) -> List[ListingItem]:
         """Parse HTML and return list of ListingItem."""
         pass
+
+    def iter_from_html(self, html: str, url: str) -> Iterator[ListingItem]:
+        """Yield ListingItems one at a time. Override to avoid building the full list."""
+        yield from self.extract_from_html(html, url)
+
+    def extract_links(self, html: str, url: str) -> List[CrawlLink]:
+        """Return pagination and detail-page links found in HTML. Default: none."""
+        return []
+
+    def extract_page(self, html: str, url: str) -> Tuple[List[ListingItem], List[CrawlLink]]:
+        """Listings and crawl links from one page. Override to parse the HTML only once."""
+        return self.extract_from_html(html, url), self.extract_links(html, url)
+
+    def extract_detail(self, html: str, url: str, source_id: Optional[str] = None) -> Optional[ListingItem]:
+        """Parse a listing detail page. Default: None (detail pages add nothing)."""
+        return None
@@ -3,23 +3,18 @@ Example listing extractor for demo/development.
 Parses a minimal HTML structure; replace selectors for a real target.
 For production, point SCRAPE_BASE_URL and selectors at an allowed site.
 """
-import re
 from datetime import date
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
+from scraper.config import PARSER_BACKEND, PARSER_PARTIAL
+from scraper.extractors.base import CrawlLink, ListingItem, ListingExtractor, parse_price
+from scraper.extractors.parsers import ParserBackend, Selectors, get_backend
 
-from scraper.extractors.base import ListingItem, ListingExtractor
-
-
-def _parse_price(text: Optional[str]) -> Optional[float]:
-    if not text:
-        return None
-    digits = re.sub(r"[^\d.]", "", text)
-    try:
-        return float(digits) if digits else None
-    except ValueError:
-        return None
+# Pagination: first match wins
+NEXT_PAGE_SELECTOR = "a[rel~=next], link[rel~=next], .pagination a.next, a.next"
+# Partial parse (backends that support it): keep only listing blocks, filters tried in order
+PARTIAL_BLOCKS = ({"data-listing": True}, {"class": "listing"})
 
 
 class ExampleListingExtractor(ListingExtractor):
@@ -30,49 +25,121 @@ class ExampleListingExtractor(ListingExtractor):
     Replace selectors to match your target site.
     """
     source_name = "example_listings"
+    selectors = Selectors(
+        # Flexible: look for [data-listing], .listing, or article
+        blocks=("[data-listing]", ".listing", "article.listing"),
+        title=".title, [data-title], h2, h3",
+        price=".price, [data-price]",
+        address=".address, [data-address]",
+        area=".area, [data-area], .region",
+        link="a[href]",
+        next_page=NEXT_PAGE_SELECTOR,
+        detail_title="h1, .title, [data-title]",
+    )
+
+    def __init__(self, backend: Optional[str] = None, partial: bool = PARSER_PARTIAL):
+        self.parser: ParserBackend = get_backend(backend or PARSER_BACKEND)
+        self.partial = partial
 
     def extract_from_html(self, html: str, url: str) -> List[ListingItem]:
-        soup = BeautifulSoup(html, "html.parser")
-        items: List[ListingItem] = []
-        # Flexible: look for [data-listing], .listing, or article
-        blocks = (
-            soup.select("[data-listing]")
-            or soup.select(".listing")
-            or soup.select("article.listing")
-            or []
-        )
+        return list(self.iter_from_html(html, url))
+
+    def iter_from_html(self, html: str, url: str) -> Iterator[ListingItem]:
+        sel = self.selectors.compiled(self.parser)
+        if self.partial and self.parser.supports_partial:
+            blocks = self._partial_blocks(html, sel)
+        else:
+            blocks = self._blocks(self.parser.parse(html), sel)
         if not blocks:
             # Fallback: single demo row for testing
-            return self._demo_listing(url)
+            yield from self._demo_listing(url)
+            return
+        yield from self._iter_blocks(blocks, url, sel)
+
+    def extract_links(self, html: str, url: str) -> List[CrawlLink]:
+        return self.extract_page(html, url)[1]
+
+    def extract_page(self, html: str, url: str) -> Tuple[List[ListingItem], List[CrawlLink]]:
+        parser = self.parser
+        sel = self.selectors.compiled(parser)
+        root = parser.parse(html)
+        links: List[CrawlLink] = []
+        next_el = parser.select_one(root, sel["next_page"])
+        href = parser.attr(next_el, "href") if next_el is not None else None
+        if href:
+            links.append(CrawlLink(url=urljoin(url, href), kind="next"))
+        blocks = self._blocks(root, sel)
+        if not blocks:
+            return self._demo_listing(url), links
+        items = list(self._iter_blocks(blocks, url, sel))
+        links.extend(CrawlLink(url=item.url, kind="detail", source_id=item.source_id) for item in items if item.url)
+        return items, links
+
+    def _blocks(self, root: Any, sel: dict) -> list:
+        for compiled in sel["blocks"]:
+            blocks = self.parser.select(root, compiled)
+            if blocks:
+                return blocks
+        return []
+
+    def _partial_blocks(self, html: str, sel: dict) -> list:
+        """Listing blocks from a parse that skips everything outside them."""
+        for only in PARTIAL_BLOCKS:
+            blocks = self._blocks(self.parser.parse(html, only=only), sel)
+            if blocks:
+                return blocks
+        return []
+
+    def _iter_blocks(self, blocks: list, url: str, sel: dict) -> Iterator[ListingItem]:
+        parser = self.parser
+        select_one, text, attr = parser.select_one, parser.text, parser.attr
         today = date.today()
         for i, block in enumerate(blocks):
-            title_el = block.select_one(".title, [data-title], h2, h3")
-            price_el = block.select_one(".price, [data-price]")
-            addr_el = block.select_one(".address, [data-address]")
-            area_el = block.select_one(".area, [data-area], .region")
-            link_el = block.select_one("a[href]")
-            source_id = block.get("data-id") or block.get("id") or f"item-{i}"
-            title = (title_el.get_text(strip=True) if title_el else "") or f"Listing {i}"
-            price = _parse_price(price_el.get_text(strip=True) if price_el else None)
-            address = addr_el.get_text(strip=True) if addr_el else None
-            area = area_el.get_text(strip=True) if area_el else None
-            link = link_el.get("href") if link_el else None
+            title_el = select_one(block, sel["title"])
+            price_el = select_one(block, sel["price"])
+            addr_el = select_one(block, sel["address"])
+            area_el = select_one(block, sel["area"])
+            link_el = select_one(block, sel["link"])
+            source_id = attr(block, "data-id") or attr(block, "id") or f"item-{i}"
+            title = (text(title_el) if title_el is not None else "") or f"Listing {i}"
+            price = parse_price(text(price_el) if price_el is not None else None)
+            address = text(addr_el) if addr_el is not None else None
+            area = text(area_el) if area_el is not None else None
+            link = attr(link_el, "href") if link_el is not None else None
             if link and not link.startswith("http"):
-                from urllib.parse import urljoin
                 link = urljoin(url, link)
-            items.append(
-                ListingItem(
-                    source_id=str(source_id),
-                    source=self.source_name,
-                    title=title,
-                    address=address,
-                    area=area,
-                    price=price,
-                    url=link,
-                    scraped_at=today,
-                )
+            yield ListingItem(
+                source_id=str(source_id),
+                source=self.source_name,
+                title=title,
+                address=address,
+                area=area,
+                price=price,
+                url=link,
+                scraped_at=today,
             )
-        return items
+
+    def extract_detail(self, html: str, url: str, source_id: Optional[str] = None) -> Optional[ListingItem]:
+        """Detail page: the whole document is one listing."""
+        parser = self.parser
+        sel = self.selectors.compiled(parser)
+        root = parser.parse(html)
+        title_el = parser.select_one(root, sel["detail_title"])
+        if title_el is None or not source_id:
+            return None
+        price_el = parser.select_one(root, sel["price"])
+        addr_el = parser.select_one(root, sel["address"])
+        area_el = parser.select_one(root, sel["area"])
+        return ListingItem(
+            source_id=source_id,
+            source=self.source_name,
+            title=parser.text(title_el),
+            address=parser.text(addr_el) if addr_el is not None else None,
+            area=parser.text(area_el) if area_el is not None else None,
+            price=parse_price(parser.text(price_el) if price_el is not None else None),
+            url=url,
+            scraped_at=date.today(),
+        )
 
     def _demo_listing(self, url: str) -> List[ListingItem]:
         """Return one demo listing when page has no matching structure (for dev)."""
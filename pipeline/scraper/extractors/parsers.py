@@ -0,0 +1,194 @@
+"""
+HTML parser backends for extractors. selectolax (lexbor) and lxml parse in C
+and are several times faster than BeautifulSoup's pure-Python html.parser,
+which stays as the always-available fallback. Every backend exposes the same
+small node API, and CSS selectors are compiled once per backend.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# "auto" picks the first one that is installed
+BACKENDS = ("selectolax", "lxml", "bs4")
+
+
+class ParserBackend:
+    """Parse HTML and query it with precompiled CSS selectors."""
+
+    name = "base"
+    # Whether parse(only=...) really skips everything outside the matched elements
+    supports_partial = False
+
+    def parse(self, html: str, only: Optional[dict] = None) -> Any:
+        """Root node of html. only: attribute filter for a partial parse, if supported."""
+        raise NotImplementedError
+
+    def compile(self, selector: str) -> Any:
+        return selector
+
+    def select(self, node: Any, compiled: Any) -> list:
+        raise NotImplementedError
+
+    def select_one(self, node: Any, compiled: Any) -> Optional[Any]:
+        raise NotImplementedError
+
+    def text(self, node: Any) -> str:
+        """Text of node and its descendants, each piece stripped (like get_text(strip=True))."""
+        raise NotImplementedError
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def __reduce__(self):
+        # Backends are stateless; rebuild from the name in another process
+        return get_backend, (self.name,)
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup + soupsieve; supports SoupStrainer partial parses."""
+
+    name = "bs4"
+    supports_partial = True
+
+    def __init__(self, features: str = "html.parser"):
+        from bs4 import BeautifulSoup, SoupStrainer
+        import soupsieve
+        self._soup = BeautifulSoup
+        self._strainer = SoupStrainer
+        self._compile = soupsieve.compile
+        self.features = features
+
+    def parse(self, html: str, only: Optional[dict] = None) -> Any:
+        parse_only = self._strainer(attrs=only) if only else None
+        return self._soup(html, self.features, parse_only=parse_only)
+
+    def compile(self, selector: str) -> Any:
+        return self._compile(selector)
+
+    def select(self, node: Any, compiled: Any) -> list:
+        return compiled.select(node)
+
+    def select_one(self, node: Any, compiled: Any) -> Optional[Any]:
+        return compiled.select_one(node)
+
+    def text(self, node: Any) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        value = node.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LxmlBackend(ParserBackend):
+    """lxml.html with cssselect selectors compiled to XPath."""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._fromstring = lxml.html.document_fromstring
+        self._selector = CSSSelector
+
+    def parse(self, html: str, only: Optional[dict] = None) -> Any:
+        if not html or not html.strip():
+            html = "<html></html>"
+        try:
+            return self._fromstring(html)
+        except ValueError:
+            # str input with an XML encoding declaration
+            return self._fromstring(html.encode("utf-8"))
+
+    def compile(self, selector: str) -> Any:
+        return self._selector(selector, translator="html")
+
+    def select(self, node: Any, compiled: Any) -> list:
+        return compiled(node)
+
+    def select_one(self, node: Any, compiled: Any) -> Optional[Any]:
+        found = compiled(node)
+        return found[0] if found else None
+
+    def text(self, node: Any) -> str:
+        return "".join(part.strip() for part in node.itertext())
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax on the lexbor engine (falls back to the Modest engine)."""
+
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as parser
+        except ImportError:
+            from selectolax.parser import HTMLParser as parser
+        self._parser = parser
+
+    def parse(self, html: str, only: Optional[dict] = None) -> Any:
+        return self._parser(html or "")
+
+    def select(self, node: Any, compiled: Any) -> list:
+        return node.css(compiled)
+
+    def select_one(self, node: Any, compiled: Any) -> Optional[Any]:
+        return node.css_first(compiled)
+
+    def text(self, node: Any) -> str:
+        return node.text(deep=True, separator="", strip=True)
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+
+_CLASSES = {"selectolax": SelectolaxBackend, "lxml": LxmlBackend, "bs4": SoupBackend}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name: str = "auto") -> ParserBackend:
+    """Shared backend instance by name; "auto" = fastest installed. Raises ImportError if not installed."""
+    if name == "auto":
+        for candidate in BACKENDS:
+            try:
+                return get_backend(candidate)
+            except ImportError:
+                continue
+    if name not in _CLASSES:
+        raise ValueError(f"Unknown parser backend {name!r} (expected one of {', '.join(BACKENDS)} or auto)")
+    return _CLASSES[name]()
+
+
+def available_backends() -> List[str]:
+    """Names of the backends that can be used in this environment."""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+class Selectors:
+    """
+    Named CSS selectors, compiled once per backend and shared by every instance
+    of the extractor class that declares them. A tuple value is a list of
+    alternatives tried in order.
+    """
+
+    def __init__(self, **selectors: Union[str, Tuple[str, ...]]):
+        self.selectors = selectors
+        self._compiled: Dict[str, Dict[str, Any]] = {}
+
+    def compiled(self, backend: ParserBackend) -> Dict[str, Any]:
+        compiled = self._compiled.get(backend.name)
+        if compiled is None:
+            compiled = {
+                key: tuple(backend.compile(s) for s in value) if isinstance(value, tuple) else backend.compile(value)
+                for key, value in self.selectors.items()
+            }
+            self._compiled[backend.name] = compiled
+        return compiled
@@ -0,0 +1,120 @@
+"""
+Extractor registry: source name -> extractor. Python extractors register a
+factory (built-in ones by import path, so their modules load only when the
+source is used); declarative specs in EXTRACTOR_SPECS_DIR are read once, on
+the first lookup. Each extractor is built once per process and reused, so one
+ETL run can crawl many sources without per-source startup cost.
+"""
+import importlib
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from scraper.config import DEFAULT_BASE_URL, EXTRACTOR_SPECS_DIR, SCRAPE_SOURCES
+from scraper.extractors.base import ListingExtractor
+
+logger = logging.getLogger(__name__)
+
+SPEC_SUFFIXES = (".json", ".yaml", ".yml")
+# Source crawled when no source is configured
+DEFAULT_SOURCE = "example_listings"
+# Built-in Python extractors: source name -> "module:class"
+BUILTIN = {
+    DEFAULT_SOURCE: "scraper.extractors.example:ExampleListingExtractor",
+}
+
+_factories: Dict[str, Callable[[], ListingExtractor]] = {}
+_seed_urls: Dict[str, str] = {}
+_instances: Dict[str, ListingExtractor] = {}
+_specs_loaded = False
+
+
+def register(name: str, factory: Callable[[], ListingExtractor], base_url: Optional[str] = None) -> None:
+    """Register an extractor factory under a source name (replaces an existing one)."""
+    _factories[name] = factory
+    _instances.pop(name, None)
+    if base_url:
+        _seed_urls[name] = base_url
+
+
+def register_path(name: str, path: str, base_url: Optional[str] = None) -> None:
+    """Register the extractor class at "module:class", imported when the source is first used."""
+    def factory() -> ListingExtractor:
+        module, _, cls = path.partition(":")
+        return getattr(importlib.import_module(module), cls)()
+
+    register(name, factory, base_url)
+
+
+def register_spec(spec: dict) -> str:
+    """Register a declarative spec; returns its source name."""
+    from scraper.extractors.spec import SpecExtractor
+    name = spec["source"]
+    register(name, lambda: SpecExtractor(spec), spec.get("base_url"))
+    return name
+
+
+def load_specs(directory: str = EXTRACTOR_SPECS_DIR) -> List[str]:
+    """Register every spec file in directory; returns the source names."""
+    names = []
+    path = Path(directory)
+    if not path.is_dir():
+        return names
+    from scraper.extractors.spec import load_spec
+    for spec_path in sorted(p for p in path.iterdir() if p.suffix in SPEC_SUFFIXES):
+        try:
+            names.append(register_spec(load_spec(spec_path)))
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            logger.warning("Skipping extractor spec %s: %s", spec_path, e)
+    return names
+
+
+def _ensure_specs() -> None:
+    global _specs_loaded
+    if not _specs_loaded:
+        _specs_loaded = True
+        load_specs()
+
+
+def get_extractor(name: str) -> ListingExtractor:
+    """Shared extractor for a source name. Raises ValueError for unknown sources."""
+    extractor = _instances.get(name)
+    if extractor is not None:
+        return extractor
+    _ensure_specs()
+    if name not in _factories:
+        raise ValueError(f"Unknown source {name!r} (known: {', '.join(sorted(_factories))})")
+    extractor = _instances[name] = _factories[name]()
+    return extractor
+
+
+def source_names() -> List[str]:
+    _ensure_specs()
+    return sorted(_factories)
+
+
+def resolve_sources(
+    entries: Optional[Iterable[str]] = None,
+    default_url: str = DEFAULT_BASE_URL,
+) -> List[Tuple[ListingExtractor, str]]:
+    """
+    (extractor, start URL) per "name" or "name=start_url" entry (default: SCRAPE_SOURCES,
+    or example_listings when that is empty). Without a URL in the entry, the spec's
+    base_url is used, then default_url.
+    """
+    if entries is None:
+        entries = SCRAPE_SOURCES.split(",")
+    sources = []
+    for entry in entries:
+        name, _, url = entry.strip().partition("=")
+        if not name:
+            continue
+        extractor = get_extractor(name)
+        sources.append((extractor, url or _seed_urls.get(name) or default_url))
+    if not sources:
+        sources.append((get_extractor(DEFAULT_SOURCE), default_url))
+    return sources
+
+
+for _name, _path in BUILTIN.items():
+    register_path(_name, _path)
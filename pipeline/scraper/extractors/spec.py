@@ -0,0 +1,261 @@
+"""
+Declarative extractors: a JSON/YAML spec (listing block selectors, one entry
+per field, pagination) is compiled once into an ExtractionPlan of precompiled
+selectors and converter functions. Plans are memoized by spec hash and parser
+backend, so every SpecExtractor built from the same spec shares one plan.
+
+    {
+      "source": "my_site",
+      "base_url": "https://my-site.invalid/listings",
+      "blocks": ["[data-listing]", ".listing"],
+      "next_page": "a[rel~=next]",
+      "fields": {
+        "source_id": {"attr": ["data-id", "id"]},
+        "title": ".title, h2",
+        "price": {"selector": ".price", "type": "price"},
+        "url": {"selector": "a[href]", "attr": "href", "absolute": true},
+        "bedrooms": {"selector": ".beds", "regex": "(\\\\d+)", "type": "int"}
+      },
+      "detail": {"title": "h1", "price": ".price"}
+    }
+
+A field is a selector string (text of the first match) or an object with
+selector (omit for the block itself), attr (name or list of fallbacks; text
+when absent), regex (group 1 if it has groups, else the whole match), type
+(text, int, float, price), absolute (resolve against the page URL) and
+default ("{index}" is the block's position). Fields that are not ListingItem
+attributes are kept in ListingItem.raw.
+"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Pattern, Tuple, Union
+from urllib.parse import urljoin
+
+from scraper.config import PARSER_BACKEND
+from scraper.extractors.base import CrawlLink, ListingExtractor, ListingItem, parse_price
+from scraper.extractors.parsers import ParserBackend, get_backend
+
+LISTING_FIELDS = ("source_id", "title", "address", "area", "price", "currency", "url")
+# Used when the spec gives no default (ListingItem requires both)
+FIELD_DEFAULTS = {"source_id": "item-{index}", "title": "Listing {index}"}
+# Used when the spec gives no type
+FIELD_TYPES = {"price": "price"}
+
+
+def _to_int(value: str) -> Optional[int]:
+    try:
+        return int(float(value.replace(",", "")))
+    except ValueError:
+        return None
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "text": str,
+    "int": _to_int,
+    "float": _to_float,
+    "price": parse_price,
+}
+
+
+def spec_hash(spec: dict) -> str:
+    """Stable hash of a spec's content (key order does not matter)."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """One compiled field: where to find it and how to turn it into a value."""
+    name: str
+    selector: Any                  # compiled selector, or None for the block itself
+    attrs: Tuple[str, ...]         # attributes to try in order; empty = element text
+    pattern: Optional[Pattern]
+    convert: Callable[[str], Any]
+    absolute: bool
+    default: Any
+
+    def extract(self, parser: ParserBackend, node: Any, url: str, index: int = 0) -> Any:
+        el = node if self.selector is None else parser.select_one(node, self.selector)
+        value = None
+        if el is not None:
+            if self.attrs:
+                for attr in self.attrs:
+                    value = parser.attr(el, attr)
+                    if value:
+                        value = value.strip()
+                        break
+            else:
+                value = parser.text(el)
+        if value and self.pattern is not None:
+            match = self.pattern.search(value)
+            value = (match.group(1) if self.pattern.groups else match.group(0)) if match else None
+        if value and self.absolute:
+            value = urljoin(url, value)
+        value = self.convert(value) if value else None
+        if value is None or value == "":
+            default = self.default
+            return default.format(index=index) if isinstance(default, str) else default
+        return value
+
+
+@dataclass(frozen=True)
+class ExtractionPlan:
+    """Compiled spec for one parser backend."""
+    spec_hash: str
+    source: str
+    currency: str
+    parser: ParserBackend
+    blocks: Tuple[Any, ...]
+    fields: Tuple[FieldPlan, ...]
+    next_page: Optional[FieldPlan]
+    detail: Tuple[FieldPlan, ...]
+
+
+_PLANS: Dict[Tuple[str, str], ExtractionPlan] = {}
+
+
+def _compile_field(parser: ParserBackend, source: str, name: str, spec: Union[str, dict]) -> FieldPlan:
+    if isinstance(spec, str):
+        spec = {"selector": spec}
+    type_name = spec.get("type", FIELD_TYPES.get(name, "text"))
+    if type_name not in CONVERTERS:
+        raise ValueError(f"Extractor spec {source!r}: field {name!r} has unknown type {type_name!r}")
+    attrs = spec.get("attr") or ()
+    selector = spec.get("selector")
+    return FieldPlan(
+        name=name,
+        selector=parser.compile(selector) if selector else None,
+        attrs=(attrs,) if isinstance(attrs, str) else tuple(attrs),
+        pattern=re.compile(spec["regex"]) if spec.get("regex") else None,
+        convert=CONVERTERS[type_name],
+        absolute=bool(spec.get("absolute", name == "url")),
+        default=spec.get("default", FIELD_DEFAULTS.get(name)),
+    )
+
+
+def compile_spec(spec: dict, backend: Optional[str] = None) -> ExtractionPlan:
+    """ExtractionPlan for spec, compiled on first use and memoized by (spec hash, backend)."""
+    parser = get_backend(backend or spec.get("parser") or PARSER_BACKEND)
+    key = (spec_hash(spec), parser.name)
+    plan = _PLANS.get(key)
+    if plan is not None:
+        return plan
+    source = spec.get("source")
+    if not source or not spec.get("blocks") or not spec.get("fields"):
+        raise ValueError(f"Extractor spec {source or '?'!r} needs source, blocks and fields")
+    blocks = spec["blocks"]
+    next_page = spec.get("next_page")
+    if isinstance(next_page, str):
+        next_page = {"selector": next_page}
+    if next_page:
+        next_page = {"attr": "href", "absolute": True, **next_page}
+    plan = ExtractionPlan(
+        spec_hash=key[0],
+        source=source,
+        currency=spec.get("currency", "USD"),
+        parser=parser,
+        blocks=tuple(parser.compile(s) for s in ([blocks] if isinstance(blocks, str) else blocks)),
+        fields=tuple(_compile_field(parser, source, name, f) for name, f in spec["fields"].items()),
+        next_page=_compile_field(parser, source, "next_page", next_page) if next_page else None,
+        detail=tuple(
+            _compile_field(parser, source, name, {"default": None, **({"selector": f} if isinstance(f, str) else f)})
+            for name, f in (spec.get("detail") or {}).items()
+        ),
+    )
+    _PLANS[key] = plan
+    return plan
+
+
+def load_spec(path: Union[str, Path]) -> dict:
+    """Read a spec from a .json, .yaml or .yml file (YAML needs PyYAML)."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        import yaml
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+class SpecExtractor(ListingExtractor):
+    """ListingExtractor driven by a declarative spec."""
+
+    def __init__(self, spec: dict, backend: Optional[str] = None):
+        self.spec = spec
+        self.backend = backend
+        self.plan = compile_spec(spec, backend)
+        self.source_name = self.plan.source
+
+    def __reduce__(self):
+        # Compiled selectors may not pickle; the other process recompiles from the spec
+        return SpecExtractor, (self.spec, self.backend)
+
+    def extract_from_html(self, html: str, url: str) -> List[ListingItem]:
+        return list(self.iter_from_html(html, url))
+
+    def iter_from_html(self, html: str, url: str) -> Iterator[ListingItem]:
+        yield from self._iter_blocks(self._blocks(self.plan.parser.parse(html)), url)
+
+    def extract_links(self, html: str, url: str) -> List[CrawlLink]:
+        return self.extract_page(html, url)[1]
+
+    def extract_page(self, html: str, url: str) -> Tuple[List[ListingItem], List[CrawlLink]]:
+        plan = self.plan
+        root = plan.parser.parse(html)
+        links: List[CrawlLink] = []
+        if plan.next_page:
+            next_url = plan.next_page.extract(plan.parser, root, url)
+            if next_url:
+                links.append(CrawlLink(url=next_url, kind="next"))
+        items = list(self._iter_blocks(self._blocks(root), url))
+        if plan.detail:
+            links.extend(CrawlLink(url=item.url, kind="detail", source_id=item.source_id) for item in items if item.url)
+        return items, links
+
+    def extract_detail(self, html: str, url: str, source_id: Optional[str] = None) -> Optional[ListingItem]:
+        """Detail page fields from the spec's "detail" section (the whole document is one listing)."""
+        plan = self.plan
+        if not plan.detail or not source_id:
+            return None
+        root = plan.parser.parse(html)
+        values = {f.name: f.extract(plan.parser, root, url) for f in plan.detail}
+        if not values.get("title"):
+            return None
+        return self._item({**values, "source_id": source_id, "url": url}, date.today())
+
+    def _blocks(self, root: Any) -> list:
+        for compiled in self.plan.blocks:
+            blocks = self.plan.parser.select(root, compiled)
+            if blocks:
+                return blocks
+        return []
+
+    def _iter_blocks(self, blocks: list, url: str) -> Iterator[ListingItem]:
+        parser, fields = self.plan.parser, self.plan.fields
+        today = date.today()
+        for i, block in enumerate(blocks):
+            yield self._item({f.name: f.extract(parser, block, url, i) for f in fields}, today)
+
+    def _item(self, values: dict, today: date) -> ListingItem:
+        raw = {k: v for k, v in values.items() if k not in LISTING_FIELDS and v is not None} or None
+        return ListingItem(
+            source_id=str(values.get("source_id")),
+            source=self.source_name,
+            title=values.get("title") or "",
+            address=values.get("address"),
+            area=values.get("area"),
+            price=values.get("price"),
+            currency=values.get("currency") or self.plan.currency,
+            url=values.get("url"),
+            scraped_at=today,
+            raw=raw,
+        )
@@ -1,19 +1,60 @@
 """
-HTTP fetcher with robots.txt check, rate limiting, and configurable User-Agent.
+HTTP fetcher with robots.txt check, adaptive per-host rate limiting, and configurable User-Agent.
 """
+import logging
 import time
+from dataclasses import dataclass
 from typing import Optional
+from urllib.parse import urlparse
 
 import requests
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
-from scraper.config import REQUEST_TIMEOUT, SCRAPE_DELAY_SECONDS, USER_AGENT
-from scraper.robots import can_fetch
+from scraper.config import (
+    RATE_MAX_WAIT,
+    RATE_MIN_DELAY,
+    REQUEST_TIMEOUT,
+    SCRAPE_DELAY_SECONDS,
+    USER_AGENT,
+)
+from scraper import metrics
+from scraper.archive import HtmlArchive, make_archive
+from scraper.http_cache import HttpCache, make_cache
+from scraper.rate_limit import THROTTLE_STATUSES, RateLimiter, get_limiter, parse_retry_after
+from scraper.robots import can_fetch, crawl_delay
+
+logger = logging.getLogger(__name__)
+
+# Retried after the limiter has slowed the host down (and honored Retry-After)
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class HostBlocked(Exception):
+    """The host asked us to wait (Retry-After / backoff) longer than max_wait."""
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one URL fetch; text is None on failure."""
+    url: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    error: Optional[str] = None
+    not_modified: bool = False   # 304: text was served from the HTTP cache
+
+
+def archive_result(archive: Optional[HtmlArchive], result: FetchResult, context: Optional[dict]) -> None:
+    """Store a fetched page in the HTML archive; archive errors never fail the fetch."""
+    if archive is None or result.text is None:
+        return
+    try:
+        archive.put(result.url, result.text, result.status, **(context or {}))
+    except Exception as e:
+        logger.warning("Could not archive %s: %s", result.url, e)
 
 
 class Fetcher:
-    """Respectful HTTP client: robots.txt, delay, retries, timeout."""
+    """Respectful HTTP client: robots.txt, adaptive per-host delay, retries, timeout."""
 
     def __init__(
         self,
@@ -21,35 +62,100 @@ class Fetcher:
         delay_seconds: float = SCRAPE_DELAY_SECONDS,
         timeout: int = REQUEST_TIMEOUT,
         respect_robots: bool = True,
+        cache: Optional[HttpCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        retries: int = 3,
+        max_wait: float = RATE_MAX_WAIT,
+        archive: Optional[HtmlArchive] = None,
     ):
         self.user_agent = user_agent
         self.delay_seconds = delay_seconds
         self.timeout = timeout
         self.respect_robots = respect_robots
-        self._last_fetch_time: float = 0
+        self.cache = cache if cache is not None else make_cache()
+        self.archive = archive if archive is not None else make_archive()
+        self.limiter = limiter or get_limiter()
+        self.retries = retries
+        self.max_wait = max_wait
         self._session = requests.Session()
         self._session.headers["User-Agent"] = user_agent
-        retry = Retry(total=3, backoff_factor=1, status_forcelist=(502, 503, 504))
-        self._session.mount("https://", HTTPAdapter(max_retries=retry))
-        self._session.mount("http://", HTTPAdapter(max_retries=retry))
+        # Retries go through the limiter (see get), not urllib3
+        self._session.mount("https://", HTTPAdapter())
+        self._session.mount("http://", HTTPAdapter())
 
-    def _wait_delay(self) -> None:
-        elapsed = time.monotonic() - self._last_fetch_time
-        if elapsed < self.delay_seconds:
-            time.sleep(self.delay_seconds - elapsed)
-        self._last_fetch_time = time.monotonic()
+    def delay_for(self, url: str) -> float:
+        """Minimum delay between requests to url's host: RATE_MIN_DELAY, raised to robots.txt Crawl-delay."""
+        floor = min(RATE_MIN_DELAY, self.delay_seconds)
+        if not self.respect_robots:
+            return floor
+        robots_delay = crawl_delay(url, self.user_agent)
+        return max(floor, robots_delay or 0.0)
 
-    def get(self, url: str) -> requests.Response:
+    def _wait_delay(self, host: str, floor: float) -> None:
+        wait = self.limiter.reserve(host, floor, self.delay_seconds, self.max_wait)
+        if wait > self.max_wait:
+            raise HostBlocked(f"{host} asks to wait {wait:.0f}s")
+        if wait > 0:
+            time.sleep(wait)
+
+    def get(self, url: str, headers: Optional[dict] = None) -> requests.Response:
         if self.respect_robots and not can_fetch(url, self.user_agent):
             raise PermissionError(f"robots.txt disallows: {url}")
-        self._wait_delay()
-        return self._session.get(url, timeout=self.timeout)
+        host = urlparse(url).netloc
+        floor = self.delay_for(url)
+        for attempt in range(self.retries + 1):
+            self._wait_delay(host, floor)
+            start = time.monotonic()
+            try:
+                resp = self._session.get(url, timeout=self.timeout, headers=headers)
+            except (requests.ConnectionError, requests.Timeout):
+                latency = time.monotonic() - start
+                self.limiter.record(host, None, latency, floor=floor)
+                metrics.record_fetch(host, None, latency)
+                if attempt == self.retries:
+                    raise
+                continue
+            latency = time.monotonic() - start
+            metrics.record_fetch(host, resp.status_code, latency, len(resp.content))
+            retry_after = None
+            if resp.status_code in THROTTLE_STATUSES:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            self.limiter.record(host, resp.status_code, latency, retry_after, floor)
+            if resp.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return resp
+        raise RuntimeError("unreachable")
 
-    def get_html(self, url: str) -> Optional[str]:
-        """Fetch URL and return response text or None on failure."""
+    def fetch(self, url: str, context: Optional[dict] = None) -> FetchResult:
+        """
+        Fetch URL (conditionally, when cached); never raises. context (source, kind,
+        source_id) is stored with the page in the HTML archive.
+        """
+        result = self._fetch(url)
+        archive_result(self.archive, result, context)
+        return result
+
+    def _fetch(self, url: str) -> FetchResult:
         try:
-            resp = self.get(url)
+            headers = self.cache.conditional_headers(url) if self.cache else None
+            resp = self.get(url, headers=headers)
+            if resp.status_code == 304 and self.cache:
+                text = self.cache.not_modified(url)
+                if text is not None:
+                    return FetchResult(url=url, status=304, text=text, not_modified=True)
+                resp = self.get(url)
             resp.raise_for_status()
-            return resp.text
-        except Exception:
-            return None
+            if self.cache:
+                self.cache.store(url, resp.headers, resp.text)
+            return FetchResult(url=url, status=resp.status_code, text=resp.text)
+        except requests.HTTPError as e:
+            metrics.record_fetch_error(url, str(e.response.status_code))
+            logger.debug("Fetch %s: %s", url, e)
+            return FetchResult(url=url, status=e.response.status_code, error=str(e))
+        except Exception as e:
+            metrics.record_fetch_error(url, type(e).__name__)
+            logger.warning("Fetch %s failed: %s", url, str(e) or type(e).__name__)
+            return FetchResult(url=url, error=str(e) or type(e).__name__)
+
+    def get_html(self, url: str) -> Optional[str]:
+        """Fetch URL and return response text or None on failure."""
+        return self.fetch(url).text
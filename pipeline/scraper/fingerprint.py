@@ -0,0 +1,163 @@
+"""
+Stable content fingerprints of listings, used to detect changes between runs,
+and the fingerprint index that lets the loader skip listings that did not change.
+"""
+import hashlib
+import math
+import struct
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from scraper.extractors.base import ListingItem
+
+
+def _normalize(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return " ".join(str(value).split())
+
+
+def listing_hash(
+    title: str,
+    address: Optional[str],
+    area: Optional[str],
+    url: Optional[str],
+    price: Optional[float],
+) -> int:
+    """64-bit hash of the normalized synced fields (whitespace-collapsed text, price to cents)."""
+    key = "\x1f".join(_normalize(v) for v in (title, address, area, url, price))
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def content_hash(item: ListingItem) -> str:
+    """Hex content hash of a ListingItem, as stored in listings.content_hash."""
+    return f"{listing_hash(item.title, item.address, item.area, item.url, item.price):016x}"
+
+
+@dataclass
+class IndexStats:
+    """How items were classified against the index in one run."""
+    new: int = 0          # not in the index: full upsert
+    changed: int = 0      # content or price changed: full upsert
+    price_only: int = 0   # unchanged listing, new day: price row only
+    skipped: int = 0      # unchanged and already recorded for the day: no write
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class FingerprintIndex:
+    """
+    (source, source_id) -> (content hash, listing id, last price, day of last price)
+    for every known listing, so unchanged items can skip the listings UPDATE.
+    Keys are 64-bit hashes; entries are plain tuples. Persisted as a compact
+    binary snapshot (36 bytes per listing before compression).
+    """
+
+    NEW, CHANGED, PRICE_ONLY, SKIP = "new", "changed", "price_only", "skip"
+    MAGIC = b"WSFP1"
+    # key, content hash, listing id, last price (NaN = none), day ordinal (0 = none)
+    RECORD = struct.Struct("<QQqdi")
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[int, int, float, int]] = {}
+        # Newest listings.changed_at reflected in the index (for incremental refresh)
+        self.watermark: Optional[datetime] = None
+        self.stats = IndexStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(source: str, source_id: str) -> int:
+        digest = hashlib.blake2b(f"{source}\x1f{source_id}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def get(self, source: str, source_id: str) -> Optional[Tuple[int, int, float, int]]:
+        return self._entries.get(self.key(source, source_id))
+
+    def put(
+        self,
+        source: str,
+        source_id: str,
+        fingerprint: int,
+        listing_id: int,
+        price: Optional[float],
+        day: Optional[date],
+    ) -> None:
+        self._entries[self.key(source, source_id)] = (
+            fingerprint,
+            listing_id,
+            math.nan if price is None else price,
+            day.toordinal() if day else 0,
+        )
+
+    def remember(self, item: ListingItem, listing_id: int, recorded_at: date) -> None:
+        """Record item as written for recorded_at (a price row exists only when it has a price)."""
+        key = self.key(item.source, item.source_id)
+        day = recorded_at.toordinal() if item.price is not None else self._entries.get(key, (0, 0, 0.0, 0))[3]
+        self._entries[key] = (
+            listing_hash(item.title, item.address, item.area, item.url, item.price),
+            listing_id,
+            math.nan if item.price is None else item.price,
+            day,
+        )
+
+    def classify(self, item: ListingItem, recorded_at: date) -> Tuple[str, Optional[int]]:
+        """(NEW | CHANGED | PRICE_ONLY | SKIP, listing id if known) for item on recorded_at."""
+        key = self.key(item.source, item.source_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.new += 1
+            return self.NEW, None
+        if entry[0] != listing_hash(item.title, item.address, item.area, item.url, item.price):
+            self.stats.changed += 1
+            return self.CHANGED, entry[1]
+        day = recorded_at.toordinal()
+        if item.price is None or entry[3] == day:
+            self.stats.skipped += 1
+            return self.SKIP, entry[1]
+        self.stats.price_only += 1
+        self._entries[key] = (entry[0], entry[1], entry[2], day)
+        return self.PRICE_ONLY, entry[1]
+
+    def save(self, path: str) -> None:
+        """Write a compressed snapshot atomically."""
+        watermark = self.watermark.isoformat().encode() if self.watermark else b""
+        pack = self.RECORD.pack
+        body = b"".join(pack(key, *entry) for key, entry in self._entries.items())
+        header = self.MAGIC + struct.pack("<HI", len(watermark), len(self._entries)) + watermark
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_bytes(zlib.compress(header + body, 6))
+        tmp.replace(target)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FingerprintIndex"]:
+        """Index from a snapshot, or None if it is missing or unreadable."""
+        try:
+            data = zlib.decompress(Path(path).read_bytes())
+        except (OSError, zlib.error):
+            return None
+        if not data.startswith(cls.MAGIC):
+            return None
+        offset = len(cls.MAGIC)
+        wm_len, count = struct.unpack_from("<HI", data, offset)
+        offset += 6
+        index = cls()
+        if wm_len:
+            index.watermark = datetime.fromisoformat(data[offset:offset + wm_len].decode())
+        offset += wm_len
+        if len(data) - offset != count * cls.RECORD.size:
+            return None
+        index._entries = {
+            key: (fingerprint, listing_id, price, day)
+            for key, fingerprint, listing_id, price, day in cls.RECORD.iter_unpack(data[offset:])
+        }
+        return index
@@ -0,0 +1,210 @@
+"""
+Crawl frontier: priority queue of URLs to visit, URL normalization and
+dedup (exact set, or a Bloom filter for large crawls), depth/page budgets.
+State can be persisted to a directory or Redis so an interrupted crawl
+resumes where it stopped.
+"""
+import base64
+import hashlib
+import heapq
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from scraper.config import REDIS_URL
+
+# Query parameters that never change page content
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "sessionid", "phpsessid")
+# Lower priority value is visited first: pagination before detail pages
+KIND_PRIORITY = {"seed": 0, "next": 0, "detail": 1}
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> str:
+    """Absolute, canonical form of url: lowercase host, no default port/fragment, sorted query."""
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunparse((scheme, host, parsed.path or "/", "", urlencode(query), ""))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, bits: Optional[bytearray] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+@dataclass(order=True)
+class FrontierEntry:
+    """One URL waiting in the frontier."""
+    priority: int
+    seq: int
+    url: str
+    depth: int = 0
+    kind: str = "seed"   # "seed", "next" (pagination) or "detail"
+    source_id: Optional[str] = None
+
+
+class CrawlFrontier:
+    """Priority queue of URLs with dedup and max depth / max pages budgets."""
+
+    def __init__(self, max_depth: int = 10, max_pages: int = 50, bloom_capacity: int = 0):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.pages_popped = 0
+        self._heap: List[FrontierEntry] = []
+        self._seq = 0
+        self._seen = BloomFilter(bloom_capacity) if bloom_capacity else set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap) and self.pages_popped < self.max_pages
+
+    def add(self, url: str, depth: int = 0, kind: str = "seed", source_id: Optional[str] = None) -> bool:
+        """Queue url unless already seen or beyond max depth. Returns True if queued."""
+        if depth > self.max_depth:
+            return False
+        url = normalize_url(url)
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self._seq += 1
+        heapq.heappush(
+            self._heap,
+            FrontierEntry(KIND_PRIORITY.get(kind, 1), self._seq, url, depth, kind, source_id),
+        )
+        return True
+
+    def pop(self) -> FrontierEntry:
+        self.pages_popped += 1
+        return heapq.heappop(self._heap)
+
+    def requeue(self, entry: FrontierEntry) -> None:
+        """Put back an entry that was popped but not fully processed."""
+        self.pages_popped -= 1
+        heapq.heappush(self._heap, entry)
+
+    def state(self) -> dict:
+        """JSON-serializable snapshot of the frontier."""
+        if isinstance(self._seen, BloomFilter):
+            seen = {
+                "bloom": base64.b64encode(bytes(self._seen.bits)).decode(),
+                "capacity": self._seen.capacity,
+                "error_rate": self._seen.error_rate,
+            }
+        else:
+            seen = {"urls": sorted(self._seen)}
+        return {
+            "max_depth": self.max_depth,
+            "max_pages": self.max_pages,
+            "pages_popped": self.pages_popped,
+            "seq": self._seq,
+            "queue": [[e.priority, e.seq, e.url, e.depth, e.kind, e.source_id] for e in self._heap],
+            "seen": seen,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "CrawlFrontier":
+        frontier = cls(max_depth=state["max_depth"], max_pages=state["max_pages"])
+        frontier.pages_popped = state["pages_popped"]
+        frontier._seq = state["seq"]
+        frontier._heap = [FrontierEntry(*e) for e in state["queue"]]
+        heapq.heapify(frontier._heap)
+        seen = state["seen"]
+        if "bloom" in seen:
+            frontier._seen = BloomFilter(
+                seen["capacity"],
+                seen["error_rate"],
+                bits=bytearray(base64.b64decode(seen["bloom"])),
+            )
+        else:
+            frontier._seen = set(seen["urls"])
+        return frontier
+
+
+class FileFrontierStore:
+    """Persist frontier state as one JSON file per crawl key in a directory."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            return json.loads(self._path(key).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: str, state: dict) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        tmp.replace(path)
+
+    def clear(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+class RedisFrontierStore:
+    """Persist frontier state in Redis (expires after a few days)."""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "frontier:", ttl: int = 3 * 86400):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def load(self, key: str) -> Optional[dict]:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def save(self, key: str, state: dict) -> None:
+        self._client.set(self.prefix + key, json.dumps(state), ex=self.ttl)
+
+    def clear(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+
+def make_store(spec: str):
+    """Return a frontier store for spec ("redis", a directory path, or "" for none)."""
+    if not spec:
+        return None
+    if spec == "redis" or spec.startswith(("redis://", "rediss://")):
+        return RedisFrontierStore(REDIS_URL if spec == "redis" else spec)
+    return FileFrontierStore(spec)
@@ -0,0 +1,144 @@
+"""
+Persistent HTTP cache for conditional GETs. Stores ETag/Last-Modified per URL
+and the zlib-compressed body, so unchanged pages come back as 304 and are
+served from disk. Extraction results can be cached next to a body so a 304
+page skips parsing too. Total size is bounded with LRU eviction.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from scraper.config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES
+
+
+@dataclass
+class CacheStats:
+    """Counters for one run: revalidations, 304s, bandwidth and parsing saved."""
+    hits: int = 0                  # URL had a cached entry; conditional request sent
+    misses: int = 0                # no (revalidatable) entry; full download
+    not_modified: int = 0          # 304 answered from cache
+    bytes_saved: int = 0           # body bytes (UTF-8) not downloaded thanks to 304s
+    extractions_skipped: int = 0   # 304 pages whose cached extraction was reused
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class HttpCache:
+    """On-disk cache of validators + compressed bodies, indexed in SQLite."""
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.directory / "index.sqlite"), check_same_thread=False, isolation_level=None
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+            " size INTEGER NOT NULL DEFAULT 0, meta_size INTEGER NOT NULL DEFAULT 0, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_entries_used_at ON entries (used_at)")
+
+    def _path(self, url: str, suffix: str) -> Path:
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / digest[:2] / f"{digest}{suffix}"
+
+    def conditional_headers(self, url: str) -> dict:
+        """If-None-Match / If-Modified-Since headers for url (empty if not cached)."""
+        with self._lock:
+            row = self._db.execute("SELECT etag, last_modified FROM entries WHERE url = ?", (url,)).fetchone()
+        if not row:
+            self.stats.misses += 1
+            return {}
+        self.stats.hits += 1
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def not_modified(self, url: str) -> Optional[str]:
+        """Body for url after a 304, or None if the cached copy is gone."""
+        try:
+            data = zlib.decompress(self._path(url, ".body").read_bytes())
+        except (OSError, zlib.error):
+            self.delete(url)
+            return None
+        with self._lock:
+            self._db.execute("UPDATE entries SET used_at = ? WHERE url = ?", (time.time(), url))
+        self.stats.not_modified += 1
+        self.stats.bytes_saved += len(data)
+        return data.decode("utf-8")
+
+    def store(self, url: str, headers: Mapping[str, str], text: str) -> None:
+        """Cache a 200 response if it carries a validator (ETag or Last-Modified)."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            self.delete(url)
+            return
+        path = self._path(url, ".body")
+        path.parent.mkdir(exist_ok=True)
+        data = zlib.compress(text.encode("utf-8"), 6)
+        path.write_bytes(data)
+        self._path(url, ".meta").unlink(missing_ok=True)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (url, etag, last_modified, size, meta_size, used_at)"
+                " VALUES (?, ?, ?, ?, 0, ?)",
+                (url, etag, last_modified, len(data), time.time()),
+            )
+        self._evict()
+
+    def get_meta(self, url: str) -> Optional[Any]:
+        """Cached extraction result stored with url's body, if any."""
+        try:
+            return json.loads(zlib.decompress(self._path(url, ".meta").read_bytes()))
+        except (OSError, zlib.error, ValueError):
+            return None
+
+    def set_meta(self, url: str, meta: Any) -> None:
+        """Attach an extraction result to url's cached body (ignored if url is not cached)."""
+        with self._lock:
+            if not self._db.execute("SELECT 1 FROM entries WHERE url = ?", (url,)).fetchone():
+                return
+            data = zlib.compress(json.dumps(meta).encode("utf-8"), 6)
+            self._path(url, ".meta").write_bytes(data)
+            self._db.execute("UPDATE entries SET meta_size = ? WHERE url = ?", (len(data), url))
+
+    def delete(self, url: str) -> None:
+        self._path(url, ".body").unlink(missing_ok=True)
+        self._path(url, ".meta").unlink(missing_ok=True)
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size + meta_size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for url, size in self._db.execute("SELECT url, size + meta_size FROM entries ORDER BY used_at"):
+                victims.append(url)
+                total -= size
+                if total <= self.max_bytes * 0.9:
+                    break
+        for url in victims:
+            self.delete(url)
+
+
+def make_cache(directory: str = HTTP_CACHE_DIR) -> Optional[HttpCache]:
+    """HttpCache for directory, or None when caching is disabled (empty HTTP_CACHE_DIR)."""
+    return HttpCache(directory) if directory else None
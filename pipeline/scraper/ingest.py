@@ -0,0 +1,274 @@
+"""
+Ingest sync to the Worker's /api/ingest endpoint: rows are split into
+size-bounded chunks, encoded as JSON, NDJSON or msgpack (INGEST_FORMAT),
+gzip-compressed and sent concurrently over a pooled httpx client. Failed
+chunks are retried with exponential backoff under an Idempotency-Key that is
+stable across retries of one send (and differs between sends, so a same-day
+resync with identical content is applied again), and the outcome of every
+chunk is reported.
+"""
+import asyncio
+import gzip
+import hashlib
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Union
+
+from scraper import metrics
+from scraper.config import (
+    API_INGEST_SECRET,
+    API_INGEST_URL,
+    INGEST_CHUNK_BYTES,
+    INGEST_CHUNK_ROWS,
+    INGEST_CONCURRENCY,
+    INGEST_FORMAT,
+    INGEST_GZIP,
+    INGEST_RETRIES,
+)
+from scraper.batch import ListingBatch
+from scraper.extractors.base import ListingItem
+from scraper.serialize import PayloadFormat
+from scraper.stages import batched
+
+if TYPE_CHECKING:
+    import httpx
+
+# Listing fields sent to /api/ingest
+INGEST_FIELDS = ("source_id", "source", "title", "address", "area", "url", "price")
+# Retried statuses; any other 4xx is a permanent failure for the chunk
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+def item_to_row(item: ListingItem) -> dict:
+    """Ingest row for one extracted listing."""
+    return {field: getattr(item, field) for field in INGEST_FIELDS}
+
+
+def unique_items(items: Iterable[ListingItem]) -> Iterator[ListingItem]:
+    """Items, skipping listings already seen (e.g. on an earlier page)."""
+    seen = set()
+    for item in items:
+        key = (item.source, item.source_id)
+        if key not in seen:
+            seen.add(key)
+            yield item
+
+
+def unique_rows(
+    items: Iterable[ListingItem],
+    fmt: Optional[PayloadFormat] = None,
+    batch_rows: int = 10000,
+) -> Iterator[bytes]:
+    """
+    Encoded ingest rows (fmt, default JSON) of unique listings, encoded batch_rows
+    at a time through a ListingBatch (no per-listing dict).
+    """
+    fmt = fmt or PayloadFormat("json")
+    for chunk in batched(unique_items(items), batch_rows):
+        yield from fmt.encode_batch(ListingBatch(chunk), INGEST_FIELDS)
+
+
+def ingest_endpoint(base_url: str) -> str:
+    """Accept either the Worker base URL or the full .../api/ingest URL."""
+    base_url = base_url.rstrip("/")
+    return base_url if base_url.endswith("ingest") else f"{base_url}/api/ingest"
+
+
+@dataclass
+class ChunkResult:
+    """Outcome of sending one chunk."""
+    index: int
+    rows: int
+    ok: bool = False
+    status: Optional[int] = None
+    attempts: int = 0
+    inserted: int = 0
+    errors: int = 0          # rows the Worker rejected in an accepted chunk
+    error: Optional[str] = None
+    error_samples: List[dict] = field(default_factory=list)
+
+
+@dataclass
+class SyncReport:
+    """Per-chunk outcomes of one sync."""
+    chunks: List[ChunkResult] = field(default_factory=list)
+
+    @property
+    def sent(self) -> int:
+        return sum(c.rows for c in self.chunks if c.ok)
+
+    @property
+    def failed(self) -> int:
+        return sum(c.rows for c in self.chunks if not c.ok)
+
+    @property
+    def row_errors(self) -> int:
+        """Rows rejected by the Worker inside chunks that were otherwise applied."""
+        return sum(c.errors for c in self.chunks)
+
+    @property
+    def ok(self) -> bool:
+        return all(c.ok for c in self.chunks)
+
+    @property
+    def complete(self) -> bool:
+        """Every chunk landed and the Worker stored every row in them."""
+        return self.ok and not self.row_errors
+
+    def failed_chunks(self) -> List[ChunkResult]:
+        return [c for c in self.chunks if not c.ok]
+
+
+class IngestClient:
+    """Chunked, compressed, concurrent sync client for /api/ingest."""
+
+    def __init__(
+        self,
+        url: str = API_INGEST_URL,
+        secret: str = API_INGEST_SECRET,
+        max_chunk_bytes: int = INGEST_CHUNK_BYTES,
+        max_chunk_rows: int = INGEST_CHUNK_ROWS,
+        concurrency: int = INGEST_CONCURRENCY,
+        retries: int = INGEST_RETRIES,
+        backoff_factor: float = 1.0,
+        timeout: float = 30,
+        compress: bool = INGEST_GZIP,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+        fmt: str = INGEST_FORMAT,
+    ):
+        self.url = ingest_endpoint(url)
+        self.secret = secret
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_chunk_rows = max_chunk_rows
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.compress = compress
+        self.transport = transport
+        self.format = PayloadFormat(fmt)
+
+    def iter_chunks(
+        self,
+        recorded_at: date,
+        rows: Iterable[Union[dict, bytes]],
+        fields: Optional[dict] = None,
+        first_fields: Optional[dict] = None,
+        key: str = "listings",
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (row_count, body) chunks bounded by max_chunk_bytes / max_chunk_rows.
+        Rows are dicts or rows already encoded in self.format (bytes) and go under
+        key; fields are added to every chunk, first_fields only to the first one
+        (which is sent even when there are no rows).
+        """
+        fmt = self.format
+        header = {"recorded_at": recorded_at.isoformat(), **(fields or {})}
+        first = {**header, **(first_fields or {})}
+        parts: List[bytes] = []
+        size = len(fmt.body(first, key, parts))
+        sent_any = False
+        for row in rows:
+            encoded = row if isinstance(row, bytes) else fmt.encode(row)
+            row_size = len(encoded) + fmt.row_overhead
+            if parts and (size + row_size > self.max_chunk_bytes or len(parts) >= self.max_chunk_rows):
+                yield len(parts), fmt.body(header if sent_any else first, key, parts)
+                sent_any = True
+                parts, size = [], len(fmt.body(header, key, parts))
+            parts.append(encoded)
+            size += row_size
+        if parts or (first_fields and not sent_any):
+            yield len(parts), fmt.body(header if sent_any else first, key, parts)
+
+    def send(
+        self,
+        recorded_at: date,
+        rows: Iterable[Union[dict, bytes]],
+        fields: Optional[dict] = None,
+        first_fields: Optional[dict] = None,
+        key: str = "listings",
+    ) -> SyncReport:
+        """Send rows for recorded_at; blocks until every chunk succeeded or gave up."""
+        return asyncio.run(self.asend(recorded_at, rows, fields, first_fields, key))
+
+    async def asend(
+        self,
+        recorded_at: date,
+        rows: Iterable[Union[dict, bytes]],
+        fields: Optional[dict] = None,
+        first_fields: Optional[dict] = None,
+        key: str = "listings",
+    ) -> SyncReport:
+        import httpx   # deferred: only processes that sync pay for importing it
+        report = SyncReport()
+        # Idempotency keys are scoped to this send: retries match, a later resync does not
+        run_id = uuid.uuid4().hex
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport) as client:
+            pending = set()
+            chunks = self.iter_chunks(recorded_at, rows, fields, first_fields, key)
+            loop = asyncio.get_running_loop()
+            index = 0
+            while True:
+                # Rows may come from a live crawl: wait for them in a thread so in-flight POSTs keep going
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                count, body = chunk
+                result = ChunkResult(index=index, rows=count)
+                index += 1
+                report.chunks.append(result)
+                pending.add(asyncio.ensure_future(self._send_chunk(client, result, body, run_id)))
+                # Bounded window: at most 2x concurrency encoded chunks held in memory
+                if len(pending) >= self.concurrency * 2:
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if pending:
+                await asyncio.wait(pending)
+        return report
+
+    async def _send_chunk(self, client: "httpx.AsyncClient", result: ChunkResult, body: bytes, run_id: str) -> None:
+        import httpx
+        headers = {
+            "Content-Type": self.format.content_type,
+            # Same send and chunk content -> same key, so the Worker can drop a retried duplicate
+            "Idempotency-Key": hashlib.sha256(run_id.encode() + body).hexdigest()[:32],
+        }
+        if self.secret:
+            headers["X-Ingest-Secret"] = self.secret
+        if self.compress:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        try:
+            for attempt in range(self.retries + 1):
+                result.attempts = attempt + 1
+                sent = time.monotonic()
+                try:
+                    resp = await client.post(self.url, content=body, headers=headers)
+                    metrics.SYNC_SECONDS.observe(time.monotonic() - sent, str(resp.status_code))
+                    result.status = resp.status_code
+                    if resp.is_success:
+                        result.ok = True
+                        result.error = None
+                        try:
+                            data = resp.json()
+                            result.inserted = int(data.get("inserted", 0))
+                            result.errors = int(data.get("errors", 0))
+                            result.error_samples = list(data.get("error_samples") or [])
+                        except (ValueError, AttributeError, TypeError):
+                            pass
+                        return
+                    result.error = f"HTTP {resp.status_code}"
+                    if resp.status_code not in RETRY_STATUSES:
+                        return
+                except httpx.HTTPError as e:
+                    metrics.SYNC_SECONDS.observe(time.monotonic() - sent, "error")
+                    result.error = str(e) or type(e).__name__
+                if attempt < self.retries:
+                    metrics.SYNC_RETRIES.inc()
+                    delay = self.backoff_factor * (2 ** attempt)
+                    await asyncio.sleep(delay + random.uniform(0, delay / 2))
+        finally:
+            metrics.record_sync_chunk(result.ok, result.errors)
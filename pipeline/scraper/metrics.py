@@ -0,0 +1,370 @@
+"""
+Pipeline instrumentation: in-process histograms and counters for fetch, parse,
+DB load and sync. Collection is off unless METRICS=1 (or RUN_REPORT /
+METRICS_PORT asks for it); while off, each observation is a single flag check.
+Metrics are exported as Prometheus text (serve_metrics, for Celery workers)
+or as a JSON run report (write_report, for CI). profiled() wraps a run in
+cProfile or pyinstrument.
+"""
+import io
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from scraper.config import METRICS, METRICS_PORT, PROFILE, PROFILE_OUTPUT, RUN_REPORT
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "webscrap_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_enabled = METRICS or bool(RUN_REPORT) or METRICS_PORT > 0
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count per label values."""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                self._series[labels] = [amount]
+            else:
+                series[0] += amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._label_text(k)} {v[0]:g}" for k, v in self._series.items()]
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, k)), "value": v[0]} for k, v in self._series.items()]
+
+
+class Histogram(_Metric):
+    """Bucketed observations (plus count, sum, min and max) per label values."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not _enabled:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (last = +Inf), count, sum, min, max]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0.0, value, value]
+            series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+            if value < series[3]:
+                series[3] = value
+            if value > series[4]:
+                series[4] = value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the seconds its block takes."""
+        return _Timer(self, labels) if _enabled else _NULL_TIMER
+
+    def _quantile(self, counts: List[int], total: int, q: float, low: float, high: float) -> float:
+        """Estimate from bucket counts (linear within the bucket, narrowed to the observed min and max)."""
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = max(low, self.buckets[i - 1] if i > 0 else low)
+                upper = min(high, self.buckets[i] if i < len(self.buckets) else high)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return high
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, sum_, _, _) in self._series.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = self._label_text(key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{self._label_text(key)} {sum_:g}")
+                lines.append(f"{self.name}_count{self._label_text(key)} {total}")
+        return lines
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "labels": dict(zip(self.labels, key)),
+                    "count": total,
+                    "sum": round(sum_, 6),
+                    "mean": round(sum_ / total, 6),
+                    "min": round(low, 6),
+                    "max": round(high, 6),
+                    "p50": round(self._quantile(counts, total, 0.5, low, high), 6),
+                    "p95": round(self._quantile(counts, total, 0.95, low, high), 6),
+                }
+                for key, (counts, total, sum_, low, high) in self._series.items()
+            ]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+FETCH_SECONDS = Histogram("fetch_seconds", "HTTP request latency per host (each attempt)", ["host"])
+FETCH_BYTES = Histogram("fetch_bytes", "Response body bytes per host", ["host"], SIZE_BUCKETS)
+FETCH_REQUESTS = Counter(
+    "fetch_requests_total", "HTTP requests per host and status (error = no response)", ["host", "status"]
+)
+FETCH_ERRORS = Counter("fetch_errors_total", "Fetches that returned no page, per host and reason", ["host", "reason"])
+PARSE_SECONDS = Histogram("parse_seconds", "Extraction time per page", ["source", "kind"])
+LOAD_SECONDS = Histogram("load_seconds", "DB load time per batch", ["mode"])
+LOAD_ROWS = Counter("load_rows_total", "Listings processed by the DB loader", ["mode"])
+SYNC_SECONDS = Histogram("sync_chunk_seconds", "Ingest request latency per chunk attempt", ["status"])
+SYNC_CHUNKS = Counter("sync_chunks_total", "Ingest chunks by final outcome", ["outcome"])
+SYNC_RETRIES = Counter("sync_retries_total", "Ingest chunk attempts that were retried")
+SYNC_ROW_ERRORS = Counter("sync_row_errors_total", "Rows the Worker rejected in accepted chunks")
+RECRAWL_DETAILS = Counter(
+    "recrawl_details_total", "Detail links per source and scheduler decision (new, changed, planned, skipped, budget)", ["source", "reason"]
+)
+RECRAWL_CHANGES = Counter("recrawl_changes_total", "Detail page visits that found a changed listing", ["source"])
+
+METRICS_ALL: List[_Metric] = [
+    FETCH_SECONDS, FETCH_BYTES, FETCH_REQUESTS, FETCH_ERRORS, PARSE_SECONDS,
+    LOAD_SECONDS, LOAD_ROWS, SYNC_SECONDS, SYNC_CHUNKS, SYNC_RETRIES, SYNC_ROW_ERRORS,
+    RECRAWL_DETAILS, RECRAWL_CHANGES,
+]
+
+
+def record_fetch(host: str, status: Optional[int], seconds: float, size: Optional[int] = None) -> None:
+    """One HTTP request attempt (status None = no response)."""
+    if not _enabled:
+        return
+    FETCH_SECONDS.observe(seconds, host)
+    FETCH_REQUESTS.inc(host, str(status) if status else "error")
+    if size is not None:
+        FETCH_BYTES.observe(size, host)
+
+
+def record_fetch_error(url: str, reason: str) -> None:
+    """A fetch that returned no page (HTTP status or exception name)."""
+    if _enabled:
+        FETCH_ERRORS.inc(urlparse(url).netloc, reason)
+
+
+def record_sync_chunk(ok: bool, row_errors: int = 0) -> None:
+    """Final outcome of one ingest chunk."""
+    if not _enabled:
+        return
+    SYNC_CHUNKS.inc("ok" if ok else "failed")
+    if row_errors:
+        SYNC_ROW_ERRORS.inc(amount=row_errors)
+
+
+def reset() -> None:
+    """Drop every recorded value (e.g. between runs in one process)."""
+    for metric in METRICS_ALL:
+        metric.clear()
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS_ALL:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    """Recorded series of every metric that has any, keyed by metric name."""
+    out = {}
+    for metric in METRICS_ALL:
+        series = metric.snapshot()
+        if series:
+            out[metric.name[len(PREFIX):]] = series
+    return out
+
+
+def write_report(path: str = RUN_REPORT, started_at: Optional[datetime] = None, **fields) -> Optional[Path]:
+    """Write fields plus the metrics snapshot as a JSON run report; returns its path (None when path is empty)."""
+    if not path:
+        return None
+    now = datetime.now(timezone.utc)
+    report = {
+        "finished_at": now.isoformat(),
+        **({"started_at": started_at.isoformat(), "seconds": (now - started_at).total_seconds()} if started_at else {}),
+        **fields,
+        "metrics": snapshot(),
+    }
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, indent=2, default=str))
+    return target
+
+
+def serve_metrics(port: int = METRICS_PORT, host: str = "0.0.0.0"):
+    """Serve /metrics (Prometheus text) from a daemon thread; turns collection on. Returns the server."""
+    # Imported here: http.server is only needed by processes that export metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    logger.info("Serving metrics on :%d/metrics", server.server_port)
+    return server
+
+
+# cProfile profiles of background stage threads, merged into the run's profile
+_thread_profiles: Optional[list] = None
+
+
+@contextmanager
+def profile_thread():
+    """Profile the calling (stage) thread too while a cProfile run is active."""
+    profiles = _thread_profiles
+    if profiles is None:
+        yield
+        return
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profiles.append(profile)
+
+
+@contextmanager
+def profiled(kind: str = PROFILE, output: str = PROFILE_OUTPUT):
+    """
+    Profile the block: "cprofile" (deterministic; stage threads included, stats file
+    for pstats/snakeviz) or "pyinstrument" (sampling, main thread, HTML report).
+    Empty kind = no profiling.
+    """
+    global _thread_profiles
+    if not kind:
+        yield
+        return
+    if kind == "cprofile":
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        _thread_profiles = []
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            stats = pstats.Stats(profile)
+            for extra in _thread_profiles:
+                stats.add(extra)
+            _thread_profiles = None
+            path = output or "run.prof"
+            stats.dump_stats(path)
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats("cumulative").print_stats(25)
+            logger.info("Profile written to %s\n%s", path, text.getvalue())
+    elif kind == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path = output or "run-profile.html"
+            Path(path).write_text(profiler.output_html())
+            logger.info("Profile written to %s\n%s", path, profiler.output_text())
+    else:
+        raise ValueError(f"Unknown profiler {kind!r} (cprofile or pyinstrument)")
@@ -0,0 +1,189 @@
+"""
+Adaptive per-host rate limiting (AIMD). Each host has a delay between
+requests. Fast, successful responses add RATE_INCREASE requests/sec to its
+rate. 429/5xx responses, network errors and slow responses multiply the delay
+by RATE_DECREASE. A Retry-After header blocks the host until the time it
+names. The delay never drops below the politeness floor the caller passes in
+(RATE_MIN_DELAY, raised to the robots.txt Crawl-delay). With
+RATE_LIMIT_BACKEND=redis, every crawler process shares one state per host.
+"""
+import threading
+import time
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, TypeVar
+
+from scraper.config import (
+    RATE_DECREASE,
+    RATE_INCREASE,
+    RATE_LATENCY_TARGET,
+    RATE_LIMIT_BACKEND,
+    RATE_MAX_DELAY,
+    REDIS_URL,
+)
+
+T = TypeVar("T")
+
+# Statuses that mean "slow down" (429, 503 may carry Retry-After)
+THROTTLE_STATUSES = (429, 503)
+# A response this many times slower than the host's average counts as a slowdown,
+# once it takes at least SLOW_MIN_LATENCY seconds (5ms -> 20ms is jitter, not load)
+SLOW_FACTOR = 3.0
+SLOW_MIN_LATENCY = 0.25
+# Longest Retry-After honored, seconds
+MAX_RETRY_AFTER = 3600.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+@dataclass
+class HostState:
+    """Limiter state for one host (wall-clock times, so it can be shared between processes)."""
+    delay: float
+    next_at: float = 0.0
+    blocked_until: float = 0.0
+    latency: float = 0.0   # moving average of response time, seconds
+
+
+class LocalLimiterStore:
+    """Host states in this process."""
+
+    def __init__(self):
+        self._states: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def update(self, host: str, initial: float, fn: Callable[[HostState], T]) -> T:
+        with self._lock:
+            state = self._states.get(host)
+            if state is None:
+                state = self._states[host] = HostState(delay=initial)
+            return fn(state)
+
+
+class RedisLimiterStore:
+    """Host states in Redis hashes, updated in WATCH/MULTI transactions."""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "ratelimit:", ttl: int = 86400):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def update(self, host: str, initial: float, fn: Callable[[HostState], T]) -> T:
+        key = self.prefix + host
+
+        def txn(pipe) -> T:
+            raw = pipe.hgetall(key)
+            if raw:
+                state = HostState(**{k.decode(): float(v) for k, v in raw.items()})
+            else:
+                state = HostState(delay=initial)
+            result = fn(state)
+            pipe.multi()
+            pipe.hset(key, mapping=asdict(state))
+            pipe.expire(key, self.ttl)
+            return result
+
+        return self._client.transaction(txn, key, value_from_callable=True)
+
+
+class RateLimiter:
+    """AIMD delay per host with Retry-After blocking and a politeness floor."""
+
+    def __init__(
+        self,
+        store=None,
+        max_delay: float = RATE_MAX_DELAY,
+        increase: float = RATE_INCREASE,
+        decrease: float = RATE_DECREASE,
+        latency_target: float = RATE_LATENCY_TARGET,
+    ):
+        self.store = store or LocalLimiterStore()
+        self.max_delay = max_delay
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+
+    @property
+    def shared(self) -> bool:
+        """True when state lives outside this process (calls may block on I/O)."""
+        return not isinstance(self.store, LocalLimiterStore)
+
+    def reserve(self, host: str, floor: float = 0.0, initial: float = 0.0, max_wait: Optional[float] = None) -> float:
+        """
+        Book the next request slot for host; returns seconds to wait before sending.
+        If the wait would exceed max_wait, nothing is booked and the wait is returned.
+        """
+        now = time.time()
+
+        def book(state: HostState) -> float:
+            state.delay = min(max(state.delay, floor), max(self.max_delay, floor))
+            at = max(now, state.next_at, state.blocked_until)
+            if max_wait is not None and at - now > max_wait:
+                return at - now
+            state.next_at = at + state.delay
+            return at - now
+
+        return self.store.update(host, max(initial, floor), book)
+
+    def record(
+        self,
+        host: str,
+        status: Optional[int],
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+        floor: float = 0.0,
+    ) -> float:
+        """Adjust host's delay after a response (status None = network error). Returns the new delay."""
+        now = time.time()
+
+        def adjust(state: HostState) -> float:
+            slow = False
+            if latency is not None:
+                slow = latency > self.latency_target or (
+                    latency >= SLOW_MIN_LATENCY and state.latency > 0 and latency > SLOW_FACTOR * state.latency
+                )
+                state.latency = latency if state.latency <= 0 else 0.8 * state.latency + 0.2 * latency
+            if status is None or status in THROTTLE_STATUSES or status >= 500 or slow:
+                # Multiplicative decrease of the rate; start from 0.5s when the delay was (near) zero
+                state.delay = min(self.max_delay, max(state.delay, 0.5) * self.decrease)
+            elif state.delay > 0:
+                # Additive increase of the rate
+                state.delay = 1.0 / (1.0 / state.delay + self.increase)
+            state.delay = max(state.delay, floor)
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, now + min(retry_after, MAX_RETRY_AFTER))
+            return state.delay
+
+        return self.store.update(host, floor, adjust)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def make_limiter(spec: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    """RateLimiter with local state, or Redis-shared state for spec "redis" / a redis:// URL."""
+    if spec == "redis" or spec.startswith(("redis://", "rediss://")):
+        return RateLimiter(RedisLimiterStore(REDIS_URL if spec == "redis" else spec))
+    return RateLimiter()
+
+
+def get_limiter() -> RateLimiter:
+    """Process-wide limiter shared by all fetchers (RATE_LIMIT_BACKEND)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = make_limiter()
+        return _limiter
@@ -0,0 +1,356 @@
+"""
+Change-frequency-aware recrawl of listing detail pages.
+
+Each listing's changes are modelled as a Poisson process. After n visits, X of
+which found the listing changed, at a mean interval of I days, its rate is
+
+    rate = -ln(1 - (X + 0.5) / (n + 1)) / I      changes per day
+
+(the posterior mean of the per-visit change probability under a Beta(0.5, 0.5)
+prior, so a listing seen once, or changed at every visit, still gets a finite
+rate). The probability that it changed t days after the last visit is then
+1 - exp(-rate * t), and its next visit is due when that reaches RECRAWL_TARGET,
+within [RECRAWL_MIN_DAYS, RECRAWL_MAX_DAYS]. Right after a detected change the
+rate is multiplied by RECRAWL_CHANGED_BOOST: price cuts come in bursts.
+
+A run spends its detail-page budget (RECRAWL_BUDGET per source) once every
+listing page has been seen (crawl() holds the detail links until then): on new
+listings, then on listings whose listing-page content differs from their last
+visit, then on due listings in order of change probability. Histories are
+indexed by next visit time in a heap (in-process, saved to a JSON file) or a
+Redis sorted set, so finding the due listings does not scan every listing.
+The first run seeds the histories from the DB (etl.seed_recrawl_schedule).
+"""
+import heapq
+import json
+import logging
+import math
+import time
+from dataclasses import asdict, astuple, dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scraper import metrics
+from scraper.config import (
+    RECRAWL_BUDGET,
+    RECRAWL_CHANGED_BOOST,
+    RECRAWL_MAX_DAYS,
+    RECRAWL_MIN_DAYS,
+    RECRAWL_STATE,
+    RECRAWL_TARGET,
+    REDIS_URL,
+)
+from scraper.extractors.base import ListingItem
+from scraper.fingerprint import content_hash
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def to_days(value) -> float:
+    """Days since the Unix epoch of a date, a naive-UTC or aware datetime, or a time.time() value."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp() / 86400
+    if isinstance(value, date):
+        return float(value.toordinal() - _EPOCH)
+    return value / 86400
+
+
+def estimate_rate(visits: int, changes: int, span_days: float) -> float:
+    """Changes per day from `changes` found in `visits` visits spread over span_days (see module docstring)."""
+    if visits <= 0:
+        return 0.0
+    changes = min(max(changes, 0), visits)
+    interval = max(span_days, 1.0) / visits
+    return -math.log(1 - (changes + 0.5) / (visits + 1)) / interval
+
+
+@dataclass
+class VisitHistory:
+    """What the scheduler knows about one listing. Times are days since the epoch."""
+    first_seen: float
+    last_visit: float
+    visits: int = 0
+    changes: int = 0
+    last_change: Optional[float] = None
+    content_hash: str = ""   # of the listing as last extracted from its detail page
+    listed_hash: str = ""    # of its listing-page entry at that visit ("" = unknown)
+
+    def rate(self) -> float:
+        rate = estimate_rate(self.visits, self.changes, self.last_visit - self.first_seen)
+        if self.last_change is not None and self.last_change >= self.last_visit:
+            rate *= RECRAWL_CHANGED_BOOST
+        return rate
+
+    def change_probability(self, now: float) -> float:
+        """Probability that the listing changed since the last visit (1 if never visited)."""
+        if not self.visits:
+            return 1.0
+        return 1 - math.exp(-self.rate() * max(now - self.last_visit, 0.0))
+
+    def next_visit(self) -> float:
+        if not self.visits:
+            return self.first_seen
+        rate = self.rate()
+        interval = -math.log(1 - RECRAWL_TARGET) / rate if rate > 0 else RECRAWL_MAX_DAYS
+        return self.last_visit + min(max(interval, RECRAWL_MIN_DAYS), RECRAWL_MAX_DAYS)
+
+    def observe(self, now: float, detail_hash: str, listed_hash: str) -> bool:
+        """Record a visit; returns True if it found the listing changed."""
+        changed = bool(self.content_hash) and detail_hash != self.content_hash
+        self.visits += 1
+        if changed:
+            self.changes += 1
+            self.last_change = now
+        self.last_visit = now
+        self.content_hash = detail_hash
+        self.listed_hash = listed_hash
+        return changed
+
+
+class RecrawlSchedule:
+    """Visit histories per source, indexed by next visit time. Subclasses store them."""
+
+    def get_many(self, source: str, source_ids: Iterable[str]) -> Dict[str, VisitHistory]:
+        raise NotImplementedError
+
+    def put_many(self, source: str, histories: Dict[str, VisitHistory]) -> None:
+        raise NotImplementedError
+
+    def due(self, source: str, now: float) -> List[Tuple[str, VisitHistory]]:
+        """Listings of source whose next visit is at or before now."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def save(self) -> None:
+        pass
+
+    def put(self, source: str, source_id: str, history: VisitHistory) -> None:
+        self.put_many(source, {source_id: history})
+
+    def plan(self, source: str, budget: int = RECRAWL_BUDGET, now: Optional[float] = None) -> "RecrawlPlan":
+        return RecrawlPlan(self, source, budget, to_days(time.time()) if now is None else now)
+
+
+class LocalRecrawlSchedule(RecrawlSchedule):
+    """Histories in a dict with a heap of (next visit, source_id) per source; optionally saved to a JSON file."""
+
+    def __init__(self, path: str = ""):
+        self.path = Path(path) if path else None
+        self._entries: Dict[str, Dict[str, VisitHistory]] = {}
+        # Entries go stale when a listing is re-put; due() drops them
+        self._heaps: Dict[str, List[Tuple[float, str]]] = {}
+        if self.path:
+            try:
+                state = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                state = {}
+            for source, rows in state.items():
+                self.put_many(source, {source_id: VisitHistory(*row) for source_id, row in rows.items()})
+
+    def get_many(self, source: str, source_ids: Iterable[str]) -> Dict[str, VisitHistory]:
+        entries = self._entries.get(source, {})
+        return {sid: entries[sid] for sid in source_ids if sid in entries}
+
+    def put_many(self, source: str, histories: Dict[str, VisitHistory]) -> None:
+        entries = self._entries.setdefault(source, {})
+        heap = self._heaps.setdefault(source, [])
+        for source_id, history in histories.items():
+            entries[source_id] = history
+            heapq.heappush(heap, (history.next_visit(), source_id))
+
+    def due(self, source: str, now: float) -> List[Tuple[str, VisitHistory]]:
+        entries = self._entries.get(source, {})
+        heap = self._heaps.get(source, [])
+        out, seen = [], set()
+        while heap and heap[0][0] <= now:
+            score, source_id = heapq.heappop(heap)
+            history = entries.get(source_id)
+            if history is None or source_id in seen or history.next_visit() != score:
+                continue
+            seen.add(source_id)
+            out.append((source_id, history))
+        # Due listings stay due until visited
+        for source_id, history in out:
+            heapq.heappush(heap, (history.next_visit(), source_id))
+        return out
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        state = {
+            source: {source_id: astuple(history) for source_id, history in entries.items()}
+            for source, entries in self._entries.items()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(state))
+        tmp.replace(self.path)
+
+
+class RedisRecrawlSchedule(RecrawlSchedule):
+    """Histories in a Redis hash per source, next visit times in a sorted set per source."""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "recrawl:"):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _keys(self, source: str) -> Tuple[str, str]:
+        return f"{self.prefix}h:{source}", f"{self.prefix}z:{source}"
+
+    def get_many(self, source: str, source_ids: Iterable[str]) -> Dict[str, VisitHistory]:
+        source_ids = list(source_ids)
+        if not source_ids:
+            return {}
+        values = self._client.hmget(self._keys(source)[0], source_ids)
+        return {sid: VisitHistory(*json.loads(raw)) for sid, raw in zip(source_ids, values) if raw}
+
+    def put_many(self, source: str, histories: Dict[str, VisitHistory]) -> None:
+        if not histories:
+            return
+        hkey, zkey = self._keys(source)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.hset(hkey, mapping={sid: json.dumps(astuple(h)) for sid, h in histories.items()})
+        pipe.zadd(zkey, {sid: h.next_visit() for sid, h in histories.items()})
+        pipe.execute()
+
+    def due(self, source: str, now: float) -> List[Tuple[str, VisitHistory]]:
+        source_ids = [sid.decode() for sid in self._client.zrangebyscore(self._keys(source)[1], "-inf", now)]
+        histories = {}
+        for i in range(0, len(source_ids), 1000):
+            histories.update(self.get_many(source, source_ids[i:i + 1000]))
+        return list(histories.items())
+
+    def __len__(self) -> int:
+        return sum(self._client.zcard(key) for key in self._client.scan_iter(f"{self.prefix}z:*"))
+
+
+def make_schedule(spec: str = RECRAWL_STATE) -> Optional[RecrawlSchedule]:
+    """Recrawl schedule for spec ("redis", a JSON file path, or "" for none)."""
+    if not spec:
+        return None
+    if spec == "redis" or spec.startswith(("redis://", "rediss://")):
+        return RedisRecrawlSchedule(REDIS_URL if spec == "redis" else spec)
+    return LocalRecrawlSchedule(spec)
+
+
+@dataclass
+class RecrawlStats:
+    """Detail links seen by one plan and what was done with them."""
+    due: int = 0        # listings due when the plan was made
+    new: int = 0        # fetched: no history yet
+    changed: int = 0    # fetched: listing-page entry changed since the last visit
+    planned: int = 0    # fetched: due and among the most likely to have changed
+    skipped: int = 0    # not due
+    budget: int = 0     # wanted, but the budget was spent
+    visits: int = 0     # detail pages recorded
+    detected: int = 0   # visits that found a change
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out["changes_per_request"] = round(self.detected / self.visits, 3) if self.visits else 0.0
+        return out
+
+
+class RecrawlPlan:
+    """
+    One run's detail-page budget for one source (see module docstring): select() sorts
+    each listing page's listings into candidates, choose() spends the budget on them.
+    """
+
+    def __init__(self, schedule: RecrawlSchedule, source: str, budget: int, now: float):
+        self.schedule = schedule
+        self.source = source
+        self.budget = budget
+        self.now = now
+        self.stats = RecrawlStats()
+        due = schedule.due(source, now)
+        self.stats.due = len(due)
+        ranked = heapq.nlargest(budget or len(due), due, key=lambda entry: entry[1].change_probability(now))
+        self._planned: Dict[str, float] = {source_id: history.change_probability(now) for source_id, history in ranked}
+        # Candidates in the order they were seen -> "new", "changed" or "planned"
+        self._candidates: Dict[str, str] = {}
+        self._unvisited: Set[str] = set()
+        self._taken = 0
+
+    def select(self, items: List[ListingItem]) -> Set[str]:
+        """source_ids of the listings (from one listing page) whose detail page choose() may fetch."""
+        known = self.schedule.get_many(self.source, [item.source_id for item in items])
+        selected, baselines = set(), {}
+        for item in items:
+            history = known.get(item.source_id)
+            if history is None or not history.visits:
+                reason = "new"
+            elif history.listed_hash and history.listed_hash != content_hash(item):
+                reason = "changed"
+            elif item.source_id in self._planned:
+                reason = "planned"
+            else:
+                if not history.listed_hash:
+                    # Seeded from the DB: remember the entry so a later change can be noticed
+                    history.listed_hash = content_hash(item)
+                    baselines[item.source_id] = history
+                self._count("skipped")
+                continue
+            if history is None:
+                self._unvisited.add(item.source_id)
+            self._candidates.setdefault(item.source_id, reason)
+            selected.add(item.source_id)
+        self.schedule.put_many(self.source, baselines)
+        return selected
+
+    def choose(self) -> List[str]:
+        """
+        Spend the budget on the candidates selected so far, once every listing page has been
+        seen: new listings, then changed ones, then planned ones in order of change probability.
+        Returns the source_ids whose detail page to fetch, in that order.
+        """
+        order = {"new": 0, "changed": 1, "planned": 2}
+        ranked = sorted(
+            self._candidates.items(),
+            key=lambda entry: (order[entry[1]], -self._planned.get(entry[0], 0.0)),
+        )
+        chosen, blocked = [], {}
+        for source_id, reason in ranked:
+            if self.budget and self._taken >= self.budget:
+                if source_id in self._unvisited:
+                    # Never visited: due from now on, ahead of every visited listing
+                    blocked[source_id] = VisitHistory(first_seen=self.now, last_visit=self.now)
+                self._count("budget")
+                continue
+            self._taken += 1
+            self._count(reason)
+            chosen.append(source_id)
+        self.schedule.put_many(self.source, blocked)
+        self._candidates, self._unvisited = {}, set()
+        return chosen
+
+    def record(self, listed: Optional[ListingItem], item: ListingItem) -> bool:
+        """Record the detail page visit of item (listed: its listing-page entry). True if it changed."""
+        history = self.schedule.get_many(self.source, [item.source_id]).get(item.source_id)
+        if history is None:
+            history = VisitHistory(first_seen=self.now, last_visit=self.now)
+        changed = history.observe(self.now, content_hash(item), content_hash(listed) if listed else "")
+        self.schedule.put(self.source, item.source_id, history)
+        self.stats.visits += 1
+        if changed:
+            self.stats.detected += 1
+            metrics.RECRAWL_CHANGES.inc(self.source)
+        return changed
+
+    def close(self) -> None:
+        logger.info("Recrawl %s: %s", self.source, self.stats.as_dict())
+
+    def _count(self, reason: str) -> None:
+        setattr(self.stats, reason, getattr(self.stats, reason) + 1)
+        metrics.RECRAWL_DETAILS.inc(self.source, reason)
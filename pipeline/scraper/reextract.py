@@ -0,0 +1,118 @@
+"""
+Re-extract archived pages (ARCHIVE_DIR) with the current extractors, with no
+network I/O: e.g. after fixing an extractor bug, or for listings that are no
+longer online. Pages are read in capture order and parsed in worker processes
+(--workers, default EXTRACT_WORKERS).
+
+    python -m scraper.reextract --source example_listings --from 2026-10-01 --db
+    python -m scraper.reextract --source example_listings --snapshot ./snapshots
+"""
+import argparse
+import dataclasses
+import sys
+import time
+from datetime import date
+from itertools import groupby
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Ensure pipeline root is on path when run as python -m scraper.reextract
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scraper.archive import HtmlArchive
+from scraper.config import ARCHIVE_DIR, EXTRACT_WORKERS
+from scraper.extract_pool import ExtractPool, Page
+from scraper.extractors import get_extractor
+from scraper.extractors.base import ListingExtractor
+
+
+def reextract(
+    archive: HtmlArchive,
+    extractor: ListingExtractor,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    pool: Optional[ExtractPool] = None,
+) -> Iterator[tuple]:
+    """
+    (day, ListingItem) for every archived page of extractor's source, day by day in fetch
+    order. Detail pages come after the listing pages that linked them, so their items win
+    when loaded.
+    """
+    captures = archive.captures(extractor.source_name, start, end)
+    pages = (
+        (capture, Page(capture.url, body, capture.kind or "next", capture.source_id))
+        for capture, body in archive.read(captures)
+    )
+    if pool is None:
+        for capture, page in pages:
+            day = date.fromisoformat(capture.fetched_at[:10])
+            if page.kind == "detail":
+                item = extractor.extract_detail(page.html, page.url, page.source_id)
+                items = [item] if item else []
+            else:
+                items = extractor.extract_page(page.html, page.url)[0]
+            for item in items:
+                yield day, item
+        return
+    days = []
+
+    def queued() -> Iterator[Page]:
+        for capture, page in pages:
+            days.append(date.fromisoformat(capture.fetched_at[:10]))
+            yield page
+
+    for index, result in enumerate(pool.map(extractor, queued())):
+        for item in result.items:
+            yield days[index], item
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-extract archived HTML without refetching.")
+    parser.add_argument("--dir", default=ARCHIVE_DIR, help="archive directory (default: ARCHIVE_DIR)")
+    parser.add_argument("--source", required=True, help="source (extractor) name")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first fetch day")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="last fetch day")
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="extraction processes")
+    parser.add_argument("--db", action="store_true", help="load the listings into the database")
+    parser.add_argument("--snapshot", help="write the listings as a snapshot under this directory")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("no archive directory (--dir or ARCHIVE_DIR)")
+
+    archive = HtmlArchive(args.dir)
+    extractor = get_extractor(args.source)
+    pool = ExtractPool(args.workers) if args.workers > 1 else None
+    started = time.perf_counter()
+    total = 0
+    try:
+        for day, group in groupby(reextract(archive, extractor, args.start, args.end, pool), key=lambda t: t[0]):
+            items = [dataclasses.replace(item, scraped_at=day) for _, item in group]
+            total += len(items)
+            if args.snapshot:
+                from scraper.snapshot import SnapshotWriter
+                writer = SnapshotWriter(args.snapshot, day)
+                for item in items:
+                    writer.write(item)
+                writer.close()
+            if args.db:
+                from etl import load_items, refresh_area_stats
+                from models import get_session
+                session = get_session()
+                try:
+                    load_items(session, items, day)
+                    refresh_area_stats(session, day)
+                    session.commit()
+                finally:
+                    session.close()
+            print(f"{day}: {len(items)} listings")
+    finally:
+        if pool:
+            pool.close()
+        archive.close()
+    elapsed = time.perf_counter() - started
+    print(f"Re-extracted {total} listings in {elapsed:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Replay run snapshots (SNAPSHOT_DIR) without re-scraping: reload the database
+and/or resend the Worker sync for a range of days, e.g. to backfill a new
+database or restore D1.
+
+    python -m scraper.replay --from 2026-10-01 --to 2026-10-07 --db
+    python -m scraper.replay --from 2026-10-07 --sync          # no DB (like run_scrape_and_sync)
+    python -m scraper.replay --from 2026-10-01 --db --sync --source example_listings
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Optional, Sequence
+
+# Ensure pipeline root is on path when run as python -m scraper.replay
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scraper.config import SNAPSHOT_DIR, SYNC_MODE
+from scraper.ingest import IngestClient, unique_rows
+from scraper.snapshot import iter_snapshot_days
+
+
+def replay(
+    root: str = SNAPSHOT_DIR,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    sources: Optional[Sequence[str]] = None,
+    to_db: bool = True,
+    sync: bool = False,
+    sync_mode: str = SYNC_MODE,
+) -> int:
+    """Replay snapshot days in order; returns the number of items read."""
+    total = 0
+    for day, items in iter_snapshot_days(root, sources, start, end):
+        if to_db:
+            from etl import load_items, refresh_area_stats, run_sync
+            from models import get_session
+            session = get_session()
+            try:
+                processed = load_items(session, items, day)
+                refresh_area_stats(session, day)
+                session.commit()
+            finally:
+                session.close()
+            synced = run_sync(day, sync_mode).sent if sync else 0
+        else:
+            client = IngestClient()
+            processed = synced = client.send(day, unique_rows(items, client.format)).sent
+        total += processed
+        print(f"{day}: {processed} listings replayed" + (f", {synced} synced" if sync else ""))
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay run snapshots into the DB and/or the Worker API.")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="snapshot root (default: SNAPSHOT_DIR)")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="last day (YYYY-MM-DD)")
+    parser.add_argument("--source", action="append", help="only this source (repeatable)")
+    parser.add_argument("--db", action="store_true", help="load into the database")
+    parser.add_argument("--sync", action="store_true", help="send to the Worker API")
+    parser.add_argument("--full-resync", action="store_true", help="with --db: resend every row, not a delta")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("no snapshot directory (--dir or SNAPSHOT_DIR)")
+    if not (args.db or args.sync):
+        parser.error("nothing to do: pass --db and/or --sync")
+    total = replay(
+        args.dir, args.start, args.end, args.source, to_db=args.db, sync=args.sync,
+        sync_mode="full" if args.full_resync else SYNC_MODE,
+    )
+    print(f"Replayed {total} listings.")
+    sys.exit(0)
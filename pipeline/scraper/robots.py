@@ -1,33 +1,254 @@
 """
 Robots.txt compliance: check whether we are allowed to fetch a URL
 before making requests. Uses urllib.robotparser.
+
+Parsed robots.txt files are cached per origin (LRU with TTL, honoring
+Cache-Control/Expires). An optional shared store (directory or Redis) lets
+Celery workers and CI runs reuse a single robots.txt fetch per origin.
 """
+import hashlib
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
 import urllib.robotparser
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
 from urllib.parse import urljoin, urlparse
 
-from scraper.config import USER_AGENT
+from scraper.config import (
+    REDIS_URL,
+    REQUEST_TIMEOUT,
+    ROBOTS_CACHE_BACKEND,
+    ROBOTS_CACHE_SIZE,
+    ROBOTS_CACHE_TTL,
+    USER_AGENT,
+)
+
+# Lower bound on how long a robots.txt is kept, even with "no-cache" headers
+MIN_TTL = 60
+# Unreachable robots.txt is cached (as disallow-all) for a short time only
+ERROR_TTL = 300
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _ttl_from_headers(headers, default: int) -> int:
+    """Seconds to keep a robots.txt, from Cache-Control max-age or Expires, capped at default."""
+    if headers is None:
+        return default
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name in ("no-cache", "no-store"):
+            return MIN_TTL
+        if name in ("max-age", "s-maxage") and value.strip().isdigit():
+            return max(MIN_TTL, min(default, int(value.strip())))
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            delta = parsedate_to_datetime(expires).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return MIN_TTL
+        return max(MIN_TTL, min(default, int(delta)))
+    return default
+
+
+def _download(robots_url: str, user_agent: str, default_ttl: int) -> dict:
+    """Fetch robots.txt; return a cache entry {status, body, expires_at}."""
+    request = urllib.request.Request(robots_url, headers={"User-Agent": user_agent})
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as resp:
+            body = resp.read().decode("utf-8", errors="ignore")
+            status, ttl = resp.status, _ttl_from_headers(resp.headers, default_ttl)
+    except urllib.error.HTTPError as e:
+        # A 5xx is an outage, not an answer: retry it as soon as an unreachable robots.txt
+        ttl = ERROR_TTL if e.code >= 500 else _ttl_from_headers(e.headers, default_ttl)
+        body, status = "", e.code
+    except Exception:
+        body, status, ttl = "", 0, ERROR_TTL
+    return {"status": status, "body": body, "expires_at": time.time() + ttl}
 
 
-def get_robots_parser(base_url: str) -> urllib.robotparser.RobotFileParser:
-    """Fetch and parse robots.txt for the given origin."""
-    parsed = urlparse(base_url)
-    origin = f"{parsed.scheme}://{parsed.netloc}"
-    robots_url = urljoin(origin, "/robots.txt")
+def _build_parser(robots_url: str, entry: dict) -> urllib.robotparser.RobotFileParser:
+    """Build a parser from a cache entry, mirroring RobotFileParser.read() status handling."""
     parser = urllib.robotparser.RobotFileParser()
     parser.set_url(robots_url)
-    parser.read()
+    status = entry["status"]
+    if status in (401, 403):
+        parser.disallow_all = True
+    elif 400 <= status < 500:
+        parser.allow_all = True
+    elif 200 <= status < 300:
+        parser.parse(entry["body"].splitlines())
+    # Anything else (network error, 5xx): never marked as checked, so can_fetch() is False
     return parser
 
 
+class FileRobotsStore:
+    """Shared robots.txt store: one JSON file per origin in a directory."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, origin: str) -> Path:
+        return self.directory / f"{hashlib.sha1(origin.encode()).hexdigest()}.json"
+
+    def get(self, origin: str) -> Optional[dict]:
+        try:
+            return json.loads(self._path(origin).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def set(self, origin: str, entry: dict) -> None:
+        path = self._path(origin)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry))
+        tmp.replace(path)
+
+
+class RedisRobotsStore:
+    """Shared robots.txt store in Redis; keys expire with the entry."""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "robots:"):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, origin: str) -> Optional[dict]:
+        raw = self._client.get(self.prefix + origin)
+        return json.loads(raw) if raw else None
+
+    def set(self, origin: str, entry: dict) -> None:
+        ttl = max(1, int(entry["expires_at"] - time.time()))
+        self._client.set(self.prefix + origin, json.dumps(entry), ex=ttl)
+
+
+def make_store(spec: str = ROBOTS_CACHE_BACKEND):
+    """Return a shared store for spec ("redis", a directory path, or "" for none)."""
+    if not spec:
+        return None
+    if spec == "redis" or spec.startswith(("redis://", "rediss://")):
+        return RedisRobotsStore(REDIS_URL if spec == "redis" else spec)
+    return FileRobotsStore(spec)
+
+
+class RobotsCache:
+    """Per-origin cache of parsed robots.txt (LRU, TTL) with an optional shared store."""
+
+    def __init__(
+        self,
+        ttl: int = ROBOTS_CACHE_TTL,
+        max_size: int = ROBOTS_CACHE_SIZE,
+        store=None,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.store = store
+        self._entries: "OrderedDict[str, tuple[float, urllib.robotparser.RobotFileParser]]" = OrderedDict()
+        self._origin_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_parser(self, url: str, user_agent: str = USER_AGENT) -> urllib.robotparser.RobotFileParser:
+        origin = _origin(url)
+        now = time.time()
+        parser = self._lookup(origin, now)
+        if parser is not None:
+            return parser
+        # One download per origin even when many threads miss at once
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            parser = self._lookup(origin, now)
+            if parser is not None:
+                return parser
+            robots_url = urljoin(origin, "/robots.txt")
+            entry = self.store.get(origin) if self.store else None
+            if not entry or entry["expires_at"] <= now:
+                entry = _download(robots_url, user_agent, self.ttl)
+                if self.store:
+                    try:
+                        self.store.set(origin, entry)
+                    except Exception:
+                        pass  # shared store is an optimization; keep the local copy
+            parser = _build_parser(robots_url, entry)
+            with self._lock:
+                self._entries[origin] = (entry["expires_at"], parser)
+                self._entries.move_to_end(origin)
+                while len(self._entries) > self.max_size:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._origin_locks.pop(evicted, None)
+        return parser
+
+    def _lookup(self, origin: str, now: float) -> Optional[urllib.robotparser.RobotFileParser]:
+        with self._lock:
+            cached = self._entries.get(origin)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(origin)
+                return cached[1]
+        return None
+
+    def can_fetch(self, url: str, user_agent: str = USER_AGENT) -> bool:
+        return self.get_parser(url, user_agent).can_fetch(user_agent, url)
+
+    def crawl_delay(self, url: str, user_agent: str = USER_AGENT) -> Optional[float]:
+        """Minimum seconds between requests from Crawl-delay / Request-rate, if any."""
+        parser = self.get_parser(url, user_agent)
+        delays = []
+        delay = parser.crawl_delay(user_agent)
+        if delay is not None:
+            delays.append(float(delay))
+        rate = parser.request_rate(user_agent)
+        if rate is not None and rate.requests:
+            delays.append(rate.seconds / rate.requests)
+        return max(delays) if delays else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache: Optional[RobotsCache] = None
+
+
+def get_cache() -> RobotsCache:
+    """Process-wide robots cache, configured from ROBOTS_CACHE_* settings."""
+    global _default_cache
+    if _default_cache is None:
+        try:
+            store = make_store()
+        except Exception:
+            store = None
+        _default_cache = RobotsCache(store=store)
+    return _default_cache
+
+
+def get_robots_parser(base_url: str, user_agent: str = USER_AGENT) -> urllib.robotparser.RobotFileParser:
+    """Return the (cached) parsed robots.txt for the given origin."""
+    return get_cache().get_parser(base_url, user_agent)
+
+
 def can_fetch(url: str, user_agent: str = USER_AGENT) -> bool:
     """
     Return True if robots.txt allows the given user_agent to fetch the URL.
     If robots.txt is unreachable or invalid, we disallow by default (safe).
     """
-    parsed = urlparse(url)
-    origin = f"{parsed.scheme}://{parsed.netloc}"
     try:
-        parser = get_robots_parser(origin)
-        return parser.can_fetch(user_agent, url)
+        return get_cache().can_fetch(url, user_agent)
     except Exception:
         return False
+
+
+def crawl_delay(url: str, user_agent: str = USER_AGENT) -> Optional[float]:
+    """Return the robots.txt Crawl-delay/Request-rate for the URL's origin (seconds), or None."""
+    try:
+        return get_cache().crawl_delay(url, user_agent)
+    except Exception:
+        return None
@@ -1,12 +1,22 @@
 """One-off ETL run (e.g. from CLI or cron without Celery)."""
 import sys
+from datetime import datetime, timezone
 
 # Ensure pipeline root is on path when run as python -m scraper.run_once
 sys.path.insert(0, str(__import__("pathlib").Path(__file__).resolve().parents[1]))
 
 from etl import run_extract_load
+from scraper import metrics
+from scraper.config import SYNC_MODE
 
 if __name__ == "__main__":
-    processed, synced = run_extract_load(sync_to_api=True)
+    # --full-resync: resend every listing instead of only changes since the last sync
+    sync_mode = "full" if "--full-resync" in sys.argv[1:] else SYNC_MODE
+    started_at = datetime.now(timezone.utc)
+    with metrics.profiled():
+        processed, synced = run_extract_load(sync_to_api=True, sync_mode=sync_mode)
     print(f"Processed {processed} listings, synced {synced} to API.")
+    report = metrics.write_report(started_at=started_at, processed=processed, synced=synced, sync_mode=sync_mode)
+    if report:
+        print(f"Run report: {report}")
     sys.exit(0 if processed >= 0 else 1)
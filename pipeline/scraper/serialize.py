@@ -0,0 +1,120 @@
+"""
+Encoders for ingest payloads. JSON is encoded with orjson or msgspec when one
+of them is installed and with the stdlib json module otherwise. msgpack is
+encoded with msgspec or msgpack. A body comes in one of three formats:
+
+- json: one object holding the header fields and the rows array
+- ndjson: a header line, then one row per line, so the Worker can parse
+  rows as they stream in
+- msgpack: the same object as json, in binary
+"""
+import json
+import struct
+from functools import lru_cache
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+from scraper.config import INGEST_FORMAT
+
+# Ingest format -> Content-Type
+FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/msgpack",
+}
+
+
+@lru_cache(maxsize=None)
+def _json_backend() -> Tuple[str, Callable[[object], bytes]]:
+    try:
+        import orjson
+        return "orjson", orjson.dumps
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        return "msgspec", msgspec.json.Encoder().encode
+    except ImportError:
+        pass
+    return "json", lambda obj: json.dumps(obj).encode()
+
+
+def json_backend() -> str:
+    """Name of the JSON library in use."""
+    return _json_backend()[0]
+
+
+def json_encoder() -> Callable[[object], bytes]:
+    """Fastest available JSON encoder: orjson, msgspec, then the stdlib."""
+    return _json_backend()[1]
+
+
+@lru_cache(maxsize=None)
+def msgpack_encoder() -> Callable[[object], bytes]:
+    """msgpack encoder from msgspec or msgpack (ImportError when neither is installed)."""
+    try:
+        import msgspec
+        return msgspec.msgpack.Encoder().encode
+    except ImportError:
+        pass
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("msgpack ingest needs msgspec or msgpack (pip install msgpack)") from None
+    return msgpack.Packer(autoreset=True).pack
+
+
+def dumps(obj) -> bytes:
+    return json_encoder()(obj)
+
+
+def packb(obj) -> bytes:
+    return msgpack_encoder()(obj)
+
+
+def msgpack_map_header(n: int) -> bytes:
+    if n < 16:
+        return bytes((0x80 | n,))
+    return struct.pack(">BH", 0xDE, n) if n < 0x10000 else struct.pack(">BI", 0xDF, n)
+
+
+def msgpack_array_header(n: int) -> bytes:
+    if n < 16:
+        return bytes((0x90 | n,))
+    return struct.pack(">BH", 0xDC, n) if n < 0x10000 else struct.pack(">BI", 0xDD, n)
+
+
+class PayloadFormat:
+    """Row encoding and body framing for one ingest format."""
+
+    def __init__(self, name: str = INGEST_FORMAT):
+        if name not in FORMATS:
+            raise ValueError(f"Unknown ingest format {name!r} ({', '.join(FORMATS)})")
+        self.name = name
+        self.content_type = FORMATS[name]
+        self.binary = name == "msgpack"
+        # Bytes each row adds to a body besides its own encoding (separator)
+        self.row_overhead = {"json": 2, "ndjson": 1, "msgpack": 0}[name]
+        if self.binary:
+            msgpack_encoder()   # fail early when no msgpack library is installed
+
+    def encode(self, row: dict) -> bytes:
+        """One row."""
+        return packb(row) if self.binary else dumps(row)
+
+    def encode_batch(self, batch, names: Sequence[str]) -> Iterator[bytes]:
+        """Rows of a ListingBatch with the given fields, encoded column by column."""
+        return batch.iter_msgpack(names) if self.binary else batch.iter_json(names)
+
+    def body(self, header: dict, key: str, rows: List[bytes]) -> bytes:
+        """Request body: header fields plus encoded rows under key."""
+        if self.name == "ndjson":
+            lines = [dumps({**header, "rows": key}), *rows]
+            return b"\n".join(lines) + b"\n"
+        if self.binary:
+            fields = b"".join(packb(k) + packb(v) for k, v in header.items())
+            return (
+                msgpack_map_header(len(header) + 1) + fields
+                + packb(key) + msgpack_array_header(len(rows)) + b"".join(rows)
+            )
+        # Every JSON encoder ends {..., "key": []} with "[]}": splice the rows in
+        return dumps({**header, key: []})[:-2] + b", ".join(rows) + b"]}"
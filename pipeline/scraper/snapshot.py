@@ -0,0 +1,205 @@
+"""
+Columnar snapshots of each run's extracted listings, for replays and offline
+backfills without re-scraping. Items are written as Parquet (zstd) or Arrow
+IPC files, hive-partitioned by source and day:
+
+    SNAPSHOT_DIR/source=<source>/recorded_at=<YYYY-MM-DD>/<run id>.parquet|.arrow
+
+Arrow IPC files are uncompressed, so they can be read zero-copy through a
+memory map. Needs pyarrow.
+"""
+import json
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scraper.batch import ListingBatch
+from scraper.config import SNAPSHOT_DIR, SNAPSHOT_FORMAT
+from scraper.extractors.base import ListingItem
+
+# Columns stored in the files; source and recorded_at come from the partition path
+COLUMNS = ("source_id", "title", "address", "area", "price", "currency", "url", "scraped_at", "raw")
+SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("source_id", pa.string()),
+        ("title", pa.string()),
+        ("address", pa.string()),
+        ("area", pa.dictionary(pa.int32(), pa.string())),
+        ("price", pa.float64()),
+        ("currency", pa.dictionary(pa.int8(), pa.string())),
+        ("url", pa.string()),
+        ("scraped_at", pa.date32()),
+        ("raw", pa.string()),   # JSON
+    ])
+
+
+class _PartitionWriter:
+    """Row-group writer for one source/day partition; the file appears only on close."""
+
+    def __init__(self, path: Path, fmt: str, schema):
+        import pyarrow as pa
+        self.path = path
+        self.tmp = path.with_name(path.name + ".tmp")
+        self.schema = schema
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.tmp, schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(self.tmp, schema)
+        self.batch = ListingBatch()
+        self.rows = 0
+
+    def append(self, item: ListingItem) -> None:
+        self.batch.append(item)
+
+    def flush(self) -> None:
+        if not len(self.batch):
+            return
+        self._writer.write_table(self.batch.to_arrow(self.schema))
+        self.rows += len(self.batch)
+        self.batch = ListingBatch()
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+        os.replace(self.tmp, self.path)
+
+
+class SnapshotWriter:
+    """Writes one run's items for recorded_at into per-source partition files."""
+
+    def __init__(
+        self,
+        root: str = SNAPSHOT_DIR,
+        recorded_at: Optional[date] = None,
+        fmt: str = SNAPSHOT_FORMAT,
+        run_id: Optional[str] = None,
+        batch_rows: int = 50000,
+    ):
+        if fmt not in SUFFIXES:
+            raise ValueError(f"Unknown snapshot format {fmt!r} (parquet or arrow)")
+        self.root = Path(root)
+        self.recorded_at = recorded_at or date.today()
+        self.fmt = fmt
+        # Sortable, so replays apply a day's runs in order
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        self.batch_rows = batch_rows
+        self._schema = _schema()
+        self._partitions: Dict[str, _PartitionWriter] = {}
+
+    def partition_path(self, source: str) -> Path:
+        return (
+            self.root / f"source={source}" / f"recorded_at={self.recorded_at.isoformat()}"
+            / f"{self.run_id}{SUFFIXES[self.fmt]}"
+        )
+
+    def write(self, item: ListingItem) -> None:
+        writer = self._partitions.get(item.source)
+        if writer is None:
+            writer = self._partitions[item.source] = _PartitionWriter(
+                self.partition_path(item.source), self.fmt, self._schema
+            )
+        writer.append(item)
+        if len(writer.batch) >= self.batch_rows:
+            writer.flush()
+
+    def tee(self, items: Iterable[ListingItem]) -> Iterator[ListingItem]:
+        """Pass items through, writing each one to the snapshot."""
+        for item in items:
+            self.write(item)
+            yield item
+
+    def close(self) -> List[Path]:
+        """Finish every partition file; returns their paths."""
+        paths = []
+        for writer in self._partitions.values():
+            writer.close()
+            paths.append(writer.path)
+        self._partitions.clear()
+        return paths
+
+    def abort(self) -> None:
+        """Drop unfinished files (failed run)."""
+        for writer in self._partitions.values():
+            try:
+                writer._writer.close()
+            finally:
+                writer.tmp.unlink(missing_ok=True)
+        self._partitions.clear()
+
+
+def make_snapshot_writer(recorded_at: date, root: str = SNAPSHOT_DIR) -> Optional[SnapshotWriter]:
+    """SnapshotWriter for a run, or None when SNAPSHOT_DIR is not set."""
+    return SnapshotWriter(root, recorded_at) if root else None
+
+
+def snapshot_files(
+    root: str = SNAPSHOT_DIR,
+    sources: Optional[Iterable[str]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[Tuple[date, str, Path]]:
+    """(recorded_at, source, path) of every snapshot file in range, by day, source and run."""
+    wanted = set(sources) if sources else None
+    files = []
+    for source_dir in Path(root).glob("source=*"):
+        source = source_dir.name.partition("=")[2]
+        if wanted is not None and source not in wanted:
+            continue
+        for day_dir in source_dir.glob("recorded_at=*"):
+            day = date.fromisoformat(day_dir.name.partition("=")[2])
+            if (start and day < start) or (end and day > end):
+                continue
+            for path in day_dir.iterdir():
+                if path.suffix in (".parquet", ".arrow"):
+                    files.append((day, source, path))
+    return sorted(files)
+
+
+def read_snapshot(path: Path):
+    """pyarrow Table of one snapshot file; Arrow IPC files are memory-mapped (zero-copy)."""
+    import pyarrow as pa
+    if path.suffix == ".arrow":
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).read_all()
+    import pyarrow.parquet as pq
+    return pq.read_table(path, memory_map=True)
+
+
+def iter_snapshot_items(path: Path, source: str, recorded_at: date) -> Iterator[ListingItem]:
+    """ListingItems of one snapshot file, converted a record batch at a time."""
+    for batch in read_snapshot(path).to_batches():
+        columns = [batch.column(name).to_pylist() for name in COLUMNS]
+        for source_id, title, address, area, price, currency, url, scraped_at, raw in zip(*columns):
+            yield ListingItem(
+                source_id=source_id,
+                source=source,
+                title=title,
+                address=address,
+                area=area,
+                price=price,
+                currency=currency,
+                url=url,
+                scraped_at=scraped_at or recorded_at,
+                raw=json.loads(raw) if raw else None,
+            )
+
+
+def iter_snapshot_days(
+    root: str = SNAPSHOT_DIR,
+    sources: Optional[Iterable[str]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Iterator[Tuple[date, Iterator[ListingItem]]]:
+    """(recorded_at, items of every source and run that day) in day order."""
+    by_day: Dict[date, List[Tuple[str, Path]]] = {}
+    for day, source, path in snapshot_files(root, sources, start, end):
+        by_day.setdefault(day, []).append((source, path))
+    for day in sorted(by_day):
+        yield day, (item for source, path in by_day[day] for item in iter_snapshot_items(path, source, day))
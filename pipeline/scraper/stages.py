@@ -0,0 +1,77 @@
+"""
+Streaming pipeline stages: run a generator in a background thread and hand its
+output to the consumer through a bounded queue, so a slow consumer (DB load,
+sync) applies backpressure to the producer (fetch + extract) and memory stays
+bounded by the queue size rather than the crawl size.
+"""
+import queue
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+from scraper import metrics
+from scraper.config import STREAM_QUEUE_SIZE
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def threaded(source: Iterable[T], maxsize: int = STREAM_QUEUE_SIZE) -> Iterator[T]:
+    """Iterate source in a background thread; yield its items via a queue of at most maxsize."""
+    q: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(obj) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(obj, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        # Joins the run profile when one is active (PROFILE=cprofile)
+        with metrics.profile_thread():
+            try:
+                for item in source:
+                    if not put(item):
+                        break
+            except BaseException as e:  # re-raised in the consumer
+                put(_Failure(e))
+                return
+            finally:
+                close = getattr(source, "close", None)
+                if stop.is_set() and close:
+                    close()
+            put(_DONE)
+
+    thread = threading.Thread(target=produce, name="stage-producer", daemon=True)
+    thread.start()
+    try:
+        while True:
+            obj = q.get()
+            if obj is _DONE:
+                return
+            if isinstance(obj, _Failure):
+                raise obj.exc
+            yield obj
+    finally:
+        stop.set()
+        thread.join()
+
+
+def batched(source: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group source into lists of at most size items."""
+    it = iter(source)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
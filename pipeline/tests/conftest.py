@@ -0,0 +1,50 @@
+"""
+Shared test setup: the pipeline root and benchmarks/ (synthetic site, stand-in
+servers) on sys.path, an offline and delay-free configuration, and a throwaway
+SQLite database. Settings are set before scraper.config first reads them.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+_TMP = tempfile.mkdtemp(prefix="pipeline-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_TMP}/tests.db",
+    CELERY_BROKER_URL="memory://",
+    CELERY_RESULT_BACKEND="cache+memory://",
+    SCRAPE_DELAY_SECONDS="0",
+    RATE_MIN_DELAY="0",
+    RATE_MAX_WAIT="5",
+    SCRAPE_SOURCES="",
+    SCRAPE_FOLLOW_DETAILS="0",
+    HTTP_CACHE_DIR="",
+    FINGERPRINT_SNAPSHOT="",
+    CRAWL_STATE="",
+    RECRAWL_STATE="",
+    SNAPSHOT_DIR="",
+    ARCHIVE_DIR="",
+    API_INGEST_URL="",
+    API_INGEST_SECRET="",
+    RUN_REPORT="",
+    METRICS="0",
+    PROFILE="",
+    ROBOTS_CACHE_BACKEND="",
+    RATE_LIMIT_BACKEND="",
+)
+
+
+@pytest.fixture
+def db():
+    """Session on an empty schema."""
+    from models import Base, get_engine, get_session
+    Base.metadata.drop_all(get_engine())
+    Base.metadata.create_all(get_engine())
+    session = get_session()
+    yield session
+    session.close()
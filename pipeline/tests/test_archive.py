@@ -0,0 +1,36 @@
+from datetime import date
+
+from scraper.archive import HtmlArchive
+from scraper.extractors import get_extractor
+from scraper.reextract import reextract
+from sitegen import SyntheticSite
+
+DAY1, DAY2 = date(2026, 10, 1), date(2026, 10, 2)
+
+
+def _capture(archive, day, url, body, kind, source_id=None):
+    archive.put(url, body, 200, "example_listings", kind, source_id)
+    archive._db.execute(
+        "UPDATE captures SET day = ?, fetched_at = ? WHERE id = (SELECT MAX(id) FROM captures)",
+        (day.isoformat(), f"{day.isoformat()}T06:00:00+00:00"),
+    )
+
+
+def test_reextract_keeps_capture_order_across_shared_blobs(tmp_path):
+    site = SyntheticSite(2, per_page=2, noise=0)
+    listing_url, detail_url = "https://example.test/list?page=1", "https://example.test/d/p1-0"
+    archive = HtmlArchive(str(tmp_path))
+    try:
+        # Day 2's listing page is unchanged, so its body is day 1's blob; the detail page changed
+        _capture(archive, DAY1, listing_url, site.listing_page(1), "next")
+        _capture(archive, DAY1, detail_url, site.detail_page("p1-0"), "detail", "p1-0")
+        _capture(archive, DAY2, listing_url, site.listing_page(1), "next")
+        _capture(archive, DAY2, detail_url, site.detail_page("p1-0", version=1), "detail", "p1-0")
+        rows = list(reextract(archive, get_extractor("example_listings")))
+    finally:
+        archive.close()
+
+    assert [day for day, _ in rows] == [DAY1] * 3 + [DAY2] * 3
+    # Within each day the detail page comes last, so its price wins when loaded
+    latest = {day: item.price for day, item in rows if item.source_id == "p1-0"}
+    assert latest == {DAY1: site.listing(0, 1)["price"], DAY2: site.listing(0, 1, version=1)["price"]}
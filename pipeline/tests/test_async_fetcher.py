@@ -0,0 +1,56 @@
+import time
+
+from scraper.async_fetcher import fetch_many
+from scraper.rate_limit import RateLimiter
+from sitegen import SyntheticSite
+from standin import SiteServer
+
+
+def _urls(server, pages):
+    return [f"{server.url}/list?page={page}" for page in range(1, pages + 1)]
+
+
+def test_requests_to_one_host_overlap_up_to_per_host():
+    with SiteServer(SyntheticSite(listings=200, per_page=10), slow_every=1, slow_seconds=0.2) as server:
+        start = time.monotonic()
+        results = fetch_many(_urls(server, 20), delay_seconds=0, concurrency=10, per_host=10,
+                             limiter=RateLimiter())
+        elapsed = time.monotonic() - start
+    assert sorted(r.url for r in results) == sorted(_urls(server, 20))
+    assert all(r.status == 200 and r.text for r in results)
+    # 20 slow responses one at a time would take 4s
+    assert elapsed < 2
+
+
+def test_robots_disallowed_urls_are_not_requested():
+    with SiteServer(SyntheticSite(listings=20, per_page=10)) as server:
+        results = fetch_many([server.url + "/private/x", server.url + "/list?page=1"], delay_seconds=0,
+                             limiter=RateLimiter())
+        stats = dict(server.stats)
+    by_url = {r.url: r for r in results}
+    assert by_url[server.url + "/private/x"].text is None
+    assert "robots.txt disallows" in by_url[server.url + "/private/x"].error
+    assert by_url[server.url + "/list?page=1"].text
+    assert stats.get("not_found", 0) == 0 and stats["pages"] == 1
+
+
+def test_throttled_requests_are_retried():
+    with SiteServer(SyntheticSite(listings=100, per_page=10), throttle_every=3, retry_after=0) as server:
+        results = fetch_many(_urls(server, 10), delay_seconds=0, concurrency=4, per_host=4,
+                             limiter=RateLimiter(max_delay=0.05), max_wait=5)
+        stats = dict(server.stats)
+    assert all(r.status == 200 and r.text for r in results)
+    assert stats["throttled"] > 0 and stats["pages"] == 10
+
+
+def test_cached_pages_are_fetched_conditionally(tmp_path):
+    from scraper.http_cache import HttpCache
+
+    cache = HttpCache(str(tmp_path))
+    with SiteServer(SyntheticSite(listings=30, per_page=10)) as server:
+        first = fetch_many(_urls(server, 3), delay_seconds=0, cache=cache, limiter=RateLimiter())
+        again = fetch_many(_urls(server, 3), delay_seconds=0, cache=cache, limiter=RateLimiter())
+        stats = dict(server.stats)
+    assert all(r.status == 200 for r in first)
+    assert all(r.not_modified and r.text for r in again)
+    assert stats["not_modified"] == 3 and stats["pages"] == 3
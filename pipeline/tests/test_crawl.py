@@ -0,0 +1,111 @@
+from datetime import date
+from itertools import islice
+
+import pytest
+
+from scraper.crawl import CrawlCheckpoints, crawl
+from scraper.extractors.base import ListingItem
+from scraper.extractors.example import ExampleListingExtractor
+from scraper.fetcher import Fetcher
+from scraper.recrawl import LocalRecrawlSchedule
+from sitegen import SyntheticSite
+from standin import SiteServer
+
+
+@pytest.fixture
+def site():
+    with SiteServer(SyntheticSite(listings=300, per_page=10, noise=0)) as server:
+        yield server
+
+
+def _crawl(server, state, checkpoints=None, **kwargs):
+    return crawl(
+        server.url + "/list", ExampleListingExtractor(), fetcher=Fetcher(delay_seconds=0),
+        max_pages=1000, max_depth=1000, state=str(state), checkpoints=checkpoints, **kwargs,
+    )
+
+
+def test_uncommitted_pages_are_crawled_again(site, tmp_path):
+    run = _crawl(site, tmp_path, CrawlCheckpoints())
+    list(islice(run, 150))   # 15 pages, nothing committed
+    run.close()
+    assert len(list(_crawl(site, tmp_path, CrawlCheckpoints()))) == 300
+
+
+def test_resume_after_committed_checkpoint(site, tmp_path):
+    checkpoints = CrawlCheckpoints()
+    run = _crawl(site, tmp_path, checkpoints)
+    first = [item.source_id for item in islice(run, 150)]
+    checkpoints.committed(120)   # covers the save offered after page 10
+    run.close()
+    resumed = [item.source_id for item in _crawl(site, tmp_path, CrawlCheckpoints())]
+    assert len(resumed) == 200
+    assert set(first[:120]) | set(resumed) == {f"p{p}-{i}" for p in range(1, 31) for i in range(10)}
+
+
+def test_load_items_reports_commits(db):
+    from etl import load_items
+    from models import Listing
+
+    seen = []
+    checkpoints = CrawlCheckpoints()
+
+    def items():
+        for n in range(25):
+            checkpoints.yielded += 1
+            if n == 9:
+                checkpoints.offer(lambda: seen.append(db.query(Listing).count()))
+            yield ListingItem(source_id=str(n), source="test", title=f"T{n}", price=100.0 + n)
+
+    assert load_items(db, items(), date(2026, 1, 1), batch_size=10, checkpoints=checkpoints) == 25
+    # Offered after item 10, run once the batch holding it was committed
+    assert seen == [10]
+
+
+class _FlakySite(SyntheticSite):
+    details_down = False
+
+    def detail_page(self, source_id, version=0):
+        if self.details_down:
+            raise ValueError("detail pages unavailable")
+        return super().detail_page(source_id, version)
+
+
+def test_resume_keeps_listings_waiting_for_detail_pages(tmp_path):
+    site = _FlakySite(listings=300, per_page=10, noise=0)
+    with SiteServer(site) as server:
+        checkpoints = CrawlCheckpoints()
+        run = _crawl(server, tmp_path, checkpoints, follow_details=True)
+        # Pagination is visited before detail pages: the save after page 10 holds 100 pending listings
+        next(run)
+        checkpoints.committed(0)
+        run.close()
+        site.details_down = True
+        resumed = list(_crawl(server, tmp_path, CrawlCheckpoints(), follow_details=True))
+    # Every listing comes back, from its listing page when the detail page fails
+    assert len({item.source_id for item in resumed}) == 300
+
+
+class _Schedule(LocalRecrawlSchedule):
+    last = None
+
+    def plan(self, source, budget=0, now=None):
+        self.last = super().plan(source, 50, now)
+        return self.last
+
+
+def test_resume_keeps_detail_links_held_for_the_recrawl_plan(site, tmp_path):
+    schedule = _Schedule()
+    checkpoints = CrawlCheckpoints()
+    run = _crawl(site, tmp_path / "state", checkpoints, follow_details=True, schedule=schedule)
+    # Every listing is new, so its detail link is held until pagination ends: the saves hold them all
+    next(run)
+    checkpoints.committed(0)
+    run.close()
+    schedule = _Schedule()
+    resumed = list(_crawl(site, tmp_path / "state", CrawlCheckpoints(), follow_details=True, schedule=schedule))
+    assert len({item.source_id for item in resumed}) == 300
+    stats = schedule.last.stats
+    assert (stats.new, stats.budget, stats.visits) == (50, 250, 50)
+    visited = schedule.get_many("example_listings", [f"p{p}-{i}" for p in range(1, 6) for i in range(10)])
+    assert len(visited) == 50 and all(history.visits == 1 for history in visited.values())
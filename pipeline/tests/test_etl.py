@@ -0,0 +1,52 @@
+import csv
+import io
+from datetime import date
+
+from etl import _csv_row, load_items
+from models import Listing
+from scraper.extractors.base import ListingItem
+
+
+def test_copy_rows_keep_empty_strings_apart_from_null():
+    line = _csv_row((0, "id", "src", "", None, 'a "b", c', None, "USD", 1.5, "ff"))
+    # COPY ... (FORMAT csv) reads only the unquoted empty fields as NULL
+    assert line == '0,"id","src","",,"a ""b"", c",,"USD",1.5,"ff"\n'
+    assert next(csv.reader(io.StringIO(line)))[5] == 'a "b", c'
+
+
+def test_load_modes_store_empty_strings(db):
+    items = [ListingItem(source_id="1", source="test", title="", address="", area=None, price=10.0)]
+    for mode in ("upsert", "row"):
+        load_items(db, items, date(2026, 1, 1), mode=mode)
+        db.commit()
+        listing = db.query(Listing).one()
+        assert (listing.title, listing.address, listing.area) == ("", "", None)
+
+
+def test_sync_keeps_watermark_while_rows_are_rejected(db, monkeypatch):
+    import httpx
+
+    import etl
+    import scraper.config
+    from models import SyncState
+    from scraper.ingest import IngestClient
+
+    rejected = [1]
+
+    def handler(request):
+        return httpx.Response(200, json={"ok": True, "inserted": 1 - rejected[0], "errors": rejected[0],
+                                         "error_samples": [{"index": 0}] * rejected[0]})
+
+    monkeypatch.setattr(scraper.config, "API_INGEST_URL", "http://ingest.invalid", raising=False)
+    monkeypatch.setattr(etl, "IngestClient", lambda: IngestClient(
+        url="http://ingest.invalid", backoff_factor=0, transport=httpx.MockTransport(handler)))
+    day = date(2026, 1, 1)
+    load_items(db, [ListingItem(source_id="1", source="test", title="T", price=10.0)], day)
+    db.commit()
+
+    report = etl._sync_to_api(db, day, "delta")
+    assert report.ok and report.row_errors == 1
+    assert db.get(SyncState, etl.SYNC_STATE_NAME) is None
+    rejected[0] = 0
+    assert etl._sync_to_api(db, day, "delta").complete
+    assert db.get(SyncState, etl.SYNC_STATE_NAME).last_recorded_at == day
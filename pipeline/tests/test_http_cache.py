@@ -0,0 +1,10 @@
+from scraper.http_cache import HttpCache
+
+
+def test_bytes_saved_counts_bytes(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    text = "<p>Café · 2 Zimmer · 1.200 €</p>"
+    cache.store("https://example.test/a", {"ETag": '"1"'}, text)
+    assert cache.conditional_headers("https://example.test/a") == {"If-None-Match": '"1"'}
+    assert cache.not_modified("https://example.test/a") == text
+    assert cache.stats.bytes_saved == len(text.encode("utf-8")) > len(text)
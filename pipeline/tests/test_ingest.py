@@ -0,0 +1,69 @@
+import time
+from datetime import date
+
+import pytest
+
+from scraper.ingest import IngestClient
+from standin import IngestServer
+
+
+def _rows(n):
+    return [{"source_id": str(i), "source": "test", "title": f"T{i}", "address": None, "area": "A", "url": None, "price": 1.0 * i} for i in range(n)]
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson", "msgpack"])
+def test_chunks_retries_and_report(fmt):
+    with IngestServer(fail_every=3) as server:
+        client = IngestClient(url=server.url, max_chunk_rows=100, backoff_factor=0, fmt=fmt)
+        report = client.send(date(2026, 1, 1), _rows(1000))
+    assert report.ok and report.sent == 1000
+    assert len(report.chunks) == 10
+    assert any(chunk.attempts > 1 for chunk in report.chunks)
+    assert server.stats["rows"] == 1000 and server.stats["failed"] > 0
+
+
+def test_permanent_failure_is_reported_per_chunk():
+    with IngestServer() as server:
+        client = IngestClient(url=server.url + "/missing/ingest", max_chunk_rows=100, backoff_factor=0)
+        report = client.send(date(2026, 1, 1), _rows(250))
+    assert not report.ok and report.failed == 250
+    assert [chunk.status for chunk in report.chunks] == [404, 404, 404]
+    assert all(chunk.attempts == 1 for chunk in report.chunks)
+
+
+def test_chunks_are_sent_while_rows_are_still_coming():
+    with IngestServer() as server:
+        client = IngestClient(url=server.url, max_chunk_rows=10, concurrency=4, backoff_factor=0)
+
+        def slow_rows():
+            rows = _rows(30)
+            yield from rows[:11]   # the 11th row closes the first chunk
+            # Rows from a live crawl: the first chunk must be on the wire before more arrive
+            deadline = time.monotonic() + 5
+            while not server.stats["chunks"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert server.stats["chunks"], "first chunk was not sent while waiting for rows"
+            yield from rows[11:]
+
+        report = client.send(date(2026, 1, 1), slow_rows())
+    assert report.ok and report.sent == 30
+
+
+def test_idempotency_keys_match_retries_not_resyncs():
+    import httpx
+
+    keys = []
+
+    def handler(request):
+        keys.append(request.headers["Idempotency-Key"])
+        if len(keys) % 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True, "inserted": 10})
+
+    client = IngestClient(url="http://ingest.invalid", max_chunk_rows=10, concurrency=1, backoff_factor=0,
+                          transport=httpx.MockTransport(handler))
+    for _ in range(2):
+        assert client.send(date(2026, 1, 1), _rows(10)).ok
+    # Each send: a 503 and its retry under one key; the identical resync gets a new key
+    assert keys[0] == keys[1] and keys[2] == keys[3]
+    assert keys[0] != keys[2]
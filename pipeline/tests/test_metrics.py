@@ -0,0 +1,21 @@
+from urllib.request import urlopen
+
+from scraper import metrics
+
+
+def test_serve_metrics_exports_prometheus_text():
+    was_enabled = metrics.enabled()
+    server = metrics.serve_metrics(0, "127.0.0.1")
+    try:
+        metrics.record_fetch("example.test", 200, 0.02, 512)
+        with urlopen(f"http://127.0.0.1:{server.server_port}/metrics", timeout=5) as res:
+            assert res.status == 200
+            assert res.headers["Content-Type"].startswith("text/plain")
+            body = res.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+        metrics.reset()
+        metrics.enable(was_enabled)
+    assert "# TYPE webscrap_fetch_seconds histogram" in body
+    assert 'webscrap_fetch_seconds_count{host="example.test"} 1' in body
@@ -0,0 +1,124 @@
+from datetime import date, datetime, timedelta
+
+from scraper.recrawl import LocalRecrawlSchedule, to_days
+
+DAY0 = date(2026, 9, 1)
+
+
+def _listing(session, source_id, prices, updated):
+    from models import Listing, ListingPriceHistory
+    listing = Listing(
+        source_id=source_id, source="test", title=source_id, first_seen_at=DAY0, updated_at=updated,
+        changed_at=datetime.combine(updated, datetime.min.time()),
+    )
+    session.add(listing)
+    session.flush()
+    session.add_all(
+        ListingPriceHistory(listing_id=listing.id, price=price, recorded_at=DAY0 + timedelta(days=day))
+        for day, price in enumerate(prices)
+    )
+
+
+def test_seed_uses_last_price_day_as_last_visit(db):
+    from etl import seed_recrawl_schedule
+    # Both seen daily for 30 days; updated_at only moves on a change (fingerprint index)
+    _listing(db, "stable", [1000.0] * 30, updated=DAY0)
+    _listing(db, "volatile", [1000.0 + 10 * (day // 3) for day in range(30)], updated=DAY0 + timedelta(days=27))
+    db.commit()
+    schedule = LocalRecrawlSchedule()
+    assert seed_recrawl_schedule(db, schedule) == 2
+
+    seeded = schedule.get_many("test", ["stable", "volatile"])
+    last_day = to_days(DAY0 + timedelta(days=29))
+    assert seeded["stable"].last_visit == seeded["volatile"].last_visit == last_day
+    assert (seeded["stable"].visits, seeded["stable"].changes) == (30, 0)
+    assert (seeded["volatile"].visits, seeded["volatile"].changes) == (30, 9)
+    now = last_day + 1
+    assert seeded["stable"].change_probability(now) < 0.1 < seeded["volatile"].change_probability(now)
+
+
+NOW = 20000.0
+
+
+def _item(source_id, price=1000.0):
+    from scraper.extractors.base import ListingItem
+    return ListingItem(source_id, "test", f"Listing {source_id}", price=price, url=f"https://example.test/d/{source_id}")
+
+
+def _visited(item, changes, listed_hash=None):
+    from scraper.fingerprint import content_hash
+    from scraper.recrawl import VisitHistory
+    return VisitHistory(
+        first_seen=NOW - 10, last_visit=NOW - 5, visits=5, changes=changes,
+        content_hash="0" * 16, listed_hash=listed_hash or content_hash(item),
+    )
+
+
+def _schedule():
+    """Page 1: four visited listings, all due; page 2: two new listings and one whose entry changed."""
+    page1 = [_item(f"a{i}") for i in range(4)]
+    page2 = [_item("n0"), _item("n1"), _item("c0")]
+    schedule = LocalRecrawlSchedule()
+    histories = {item.source_id: _visited(item, changes=i + 1) for i, item in enumerate(page1)}
+    histories["c0"] = _visited(page2[2], changes=0, listed_hash="stale")
+    schedule.put_many("test", histories)
+    return schedule, page1, page2
+
+
+def test_plan_spends_budget_on_new_then_changed_then_likeliest():
+    schedule, page1, page2 = _schedule()
+    plan = schedule.plan("test", budget=5, now=NOW)
+    assert plan.select(page1) == {"a0", "a1", "a2", "a3"}
+    assert plan.select(page2) == {"n0", "n1", "c0"}
+    # Listings seen on later pages are not crowded out by planned ones seen first
+    assert plan.choose() == ["n0", "n1", "c0", "a3", "a2"]
+    stats = plan.stats
+    assert (stats.new, stats.changed, stats.planned, stats.budget) == (2, 1, 2, 2)
+
+
+def test_plan_keeps_listings_the_budget_missed_due():
+    schedule, page1, page2 = _schedule()
+    plan = schedule.plan("test", budget=1, now=NOW)
+    plan.select(page1)
+    plan.select(page2)
+    assert plan.choose() == ["n0"]
+    # n1 was never visited: it is due from now on, ahead of every visited listing
+    n1 = schedule.get_many("test", ["n1"])["n1"]
+    assert n1.visits == 0 and n1.next_visit() == NOW
+    assert "n1" in dict(schedule.due("test", NOW + 1))
+
+
+class _Schedule(LocalRecrawlSchedule):
+    last = None
+
+    def plan(self, source, budget=0, now=None):
+        self.last = super().plan(source, 4, to_days(date.today()))
+        return self.last
+
+
+def test_crawl_follows_new_listings_on_later_pages_first():
+    from scraper.crawl import crawl
+    from scraper.extractors.example import ExampleListingExtractor
+    from scraper.fingerprint import content_hash
+    from scraper.recrawl import VisitHistory
+    from sitegen import SyntheticSite
+    from standin import SiteServer
+
+    extractor = ExampleListingExtractor()
+    site = SyntheticSite(8, per_page=4, noise=0)
+    schedule = _Schedule()
+    today = to_days(date.today())
+    with SiteServer(site) as server:
+        # Visit page 1's listings once, then make them all due
+        first = list(crawl(server.url + "/list?page=1", extractor, max_pages=1, state=""))
+        schedule.put_many(extractor.source_name, {
+            item.source_id: VisitHistory(today - 10, today - 5, visits=5, changes=3, content_hash="0" * 16,
+                                         listed_hash=content_hash(item))
+            for item in first
+        })
+        items = list(crawl(server.url + "/list", extractor, follow_details=True, state="", schedule=schedule))
+    assert len(items) == 8
+    stats = schedule.last.stats
+    assert (stats.new, stats.planned, stats.budget, stats.visits) == (4, 0, 4, 4)
+    visited = schedule.get_many(extractor.source_name, [f"p2-{i}" for i in range(4)])
+    assert all(history.visits == 1 for history in visited.values())
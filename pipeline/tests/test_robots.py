@@ -0,0 +1,18 @@
+import time
+import urllib.error
+from email.message import Message
+
+import pytest
+
+from scraper import robots
+
+
+@pytest.mark.parametrize("code, ttl", [(503, robots.ERROR_TTL), (404, 86400)])
+def test_download_caches_server_errors_briefly(monkeypatch, code, ttl):
+    def urlopen(request, timeout=None):
+        raise urllib.error.HTTPError(request.full_url, code, "error", Message(), None)
+
+    monkeypatch.setattr(robots.urllib.request, "urlopen", urlopen)
+    entry = robots._download("https://example.test/robots.txt", "test-agent", 86400)
+    assert entry["status"] == code
+    assert entry["expires_at"] - time.time() == pytest.approx(ttl, abs=5)
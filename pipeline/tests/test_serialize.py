@@ -0,0 +1,84 @@
+"""
+Ingest payload round-trips, and the fixture bodies the Worker's ingest check
+(worker/scripts/ingest-check.mjs) posts. Regenerate the fixtures after a format
+change with UPDATE_WORKER_FIXTURES=1 python -m pytest tests/test_serialize.py.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from scraper.batch import ListingBatch
+from scraper.extractors.base import ListingItem
+from scraper.ingest import INGEST_FIELDS
+from scraper.serialize import FORMATS, PayloadFormat
+
+FIXTURES = Path(__file__).resolve().parents[2] / "worker" / "test" / "fixtures"
+HEADER = {"recorded_at": "2026-10-01", "mode": "full"}
+
+
+def _items():
+    items = [
+        ListingItem(
+            source_id=f"fx-{i}",
+            source="fixture",
+            title=f"Bright {i % 4 + 1}-bed #{i}",
+            address=f"{i} Oak St",
+            area=f"Area {i % 3}",
+            price=1000.0 + i * 12.5,
+            url=f"https://example.test/d/fx-{i}",
+        )
+        for i in range(20)
+    ]
+    # Unicode, empty and missing values, a long string and a large price
+    items[3] = ListingItem("fx-3", "fixture", "Café — 2 Zimmer, Ørestad", address="", area=None, price=None)
+    items[7] = ListingItem("fx-7", "fixture", "Loft " + "x" * 300, address=None, area="Area 1", price=12_345_678.25)
+    return items
+
+
+def _rows(items):
+    return [{name: getattr(item, name) for name in INGEST_FIELDS} for item in items]
+
+
+def decode(fmt: str, body: bytes) -> dict:
+    """Decode a body the way the Worker's readIngestBody does."""
+    if fmt == "ndjson":
+        header, *rows = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+        key = header.pop("rows", "listings")
+        return {**header, key: rows}
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.unpackb(body)
+    return json.loads(body)
+
+
+def _body(fmt: str, items) -> bytes:
+    payload = PayloadFormat(fmt)
+    return payload.body(HEADER, "listings", list(payload.encode_batch(ListingBatch(items), INGEST_FIELDS)))
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_round_trip(fmt):
+    items = _items()
+    payload = PayloadFormat(fmt)
+    expected = {**HEADER, "listings": _rows(items)}
+    assert decode(fmt, _body(fmt, items)) == expected
+    # Rows encoded one by one frame the same way as rows encoded from a batch
+    assert decode(fmt, payload.body(HEADER, "listings", [payload.encode(row) for row in _rows(items)])) == expected
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_empty_body(fmt):
+    assert decode(fmt, PayloadFormat(fmt).body(HEADER, "area_stats", [])) == {**HEADER, "area_stats": []}
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_worker_fixtures(fmt):
+    expected = {**HEADER, "listings": _rows(_items())}
+    path = FIXTURES / f"ingest.{fmt}"
+    if os.getenv("UPDATE_WORKER_FIXTURES"):
+        path.write_bytes(_body(fmt, _items()))
+        (FIXTURES / "ingest.expected.json").write_text(json.dumps(expected, indent=2, ensure_ascii=False) + "\n")
+    assert decode(fmt, path.read_bytes()) == expected
+    assert json.loads((FIXTURES / "ingest.expected.json").read_text()) == expected
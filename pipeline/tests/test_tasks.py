@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from sitegen import SyntheticSite
+from standin import SiteServer
+
+
+class _FeaturedSite(SyntheticSite):
+    """Every page also shows page 1's first listing and links back to page 1."""
+
+    def listing_page(self, page: int, version: int = 0) -> str:
+        html = super().listing_page(page, version)
+        featured = self._block(self.listing(0, 1, version), None)
+        return html.replace("<main>", f"<main>{featured}<a href='/list?page=1'>First</a>", 1)
+
+
+@pytest.fixture
+def canvas(db, monkeypatch):
+    from celery_app import app, tasks
+    monkeypatch.setattr(app.conf, "task_always_eager", True)
+    monkeypatch.setattr(app.conf, "task_eager_propagates", True)
+    monkeypatch.setattr(tasks, "_index", None)
+    monkeypatch.setattr(tasks, "_fetcher", None)
+
+    def run(url, max_pages=50, max_depth=10, follow_details=False):
+        monkeypatch.setattr(tasks, "SCRAPE_MAX_PAGES", max_pages)
+        monkeypatch.setattr(tasks, "SCRAPE_MAX_DEPTH", max_depth)
+        monkeypatch.setattr(tasks, "SCRAPE_FOLLOW_DETAILS", follow_details)
+        result = tasks.etl_canvas(date(2026, 10, 1), [f"example_listings={url}"], sync_to_api=False).apply()
+        return result.get()
+
+    return run
+
+
+def _counts(session):
+    from models import Listing, ListingPriceHistory
+    listings = session.execute(select(func.count()).select_from(Listing)).scalar()
+    prices = session.execute(select(func.count()).select_from(ListingPriceHistory)).scalar()
+    return listings, prices
+
+
+def test_eager_canvas_visits_each_page_once(canvas, db):
+    with SiteServer(_FeaturedSite(12, per_page=4, noise=0)) as site:
+        result = canvas(site.url + "/list", follow_details=True)
+    # 3 listing pages + 12 detail pages; page 1 and the featured detail page only once
+    assert site.stats["pages"] == 15
+    assert result["processed"] == 14
+    assert _counts(db) == (12, 12)
+
+
+def test_eager_canvas_caps_total_pages(canvas, db):
+    with SiteServer(SyntheticSite(40, per_page=4, noise=0)) as site:
+        result = canvas(site.url + "/list", max_pages=5, follow_details=True)
+    # Page 1 claims page 2 and three of its detail pages; the fourth listing is loaded from page 1
+    assert site.stats["pages"] == 5
+    assert result["processed"] == 8
+    assert _counts(db) == (8, 8)
+
+
+def test_eager_canvas_stops_at_max_depth(canvas, db):
+    with SiteServer(SyntheticSite(40, per_page=4, noise=0)) as site:
+        result = canvas(site.url + "/list", max_depth=2)
+    assert site.stats["pages"] == 3
+    assert result["processed"] == 12
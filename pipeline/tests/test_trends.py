@@ -0,0 +1,36 @@
+import pandas as pd
+
+from analytics.trends import listing_metrics
+
+
+def _history(rows):
+    frame = pd.DataFrame(rows, columns=["listing_id", "recorded_at", "area", "price"])
+    frame["recorded_at"] = pd.to_datetime(frame["recorded_at"])
+    return frame
+
+
+def test_days_on_market_counts_calendar_days_from_first_seen():
+    history = _history([
+        (1, "2026-01-02", "A", 1000.0),
+        (1, "2026-01-03", "A", 1100.0),
+        (2, "2026-01-03", "A", 900.0),
+    ])
+    first_seen = pd.Series(pd.to_datetime(["2025-12-31 10:00", "2026-01-03 23:59"]), index=[1, 2])
+    metrics = listing_metrics(history, first_seen).set_index("listing_id")
+    assert metrics.loc[1, "days_on_market"] == 4
+    assert metrics.loc[2, "days_on_market"] == 1
+    assert metrics.loc[1, "price_changes"] == 1
+
+
+def test_copy_csv_keeps_computed_at_time():
+    from analytics.store import _copy_csv
+    from models import AreaPriceTrend
+
+    frame = pd.DataFrame({
+        "recorded_at": pd.to_datetime(["2026-01-02", None]),
+        "area": ["A", ""],
+        "median_price": [1000.0, None],
+        "computed_at": pd.to_datetime(["2026-01-03 04:05:06", "2026-01-03 04:05:06"]),
+    })
+    lines = _copy_csv(frame, AreaPriceTrend.__table__).splitlines()
+    assert lines == ["2026-01-02,A,1000.0,2026-01-03 04:05:06", ",,,2026-01-03 04:05:06"]
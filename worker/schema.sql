@@ -18,6 +18,12 @@ CREATE INDEX IF NOT EXISTS idx_listings_recorded_at ON listings(recorded_at);
 CREATE INDEX IF NOT EXISTS idx_listings_area ON listings(area);
 CREATE INDEX IF NOT EXISTS idx_listings_source ON listings(source);
 
+-- One row per listing per day (ingest upserts on it). Databases created before this
+-- index may hold duplicates from re-syncs: keep the newest row of each, then add it.
+DELETE FROM listings
+WHERE id NOT IN (SELECT MAX(id) FROM listings GROUP BY source_id, source, recorded_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_listings_source_day ON listings(source_id, source, recorded_at);
+
 -- Price history for charts (one row per listing per day)
 CREATE TABLE IF NOT EXISTS price_history (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,3 +37,31 @@ CREATE TABLE IF NOT EXISTS price_history (
 
 CREATE INDEX IF NOT EXISTS idx_price_history_recorded ON price_history(recorded_at);
 CREATE INDEX IF NOT EXISTS idx_price_history_area ON price_history(area);
+
+-- Idempotency keys of applied ingest chunks (retried chunks are not re-applied)
+CREATE TABLE IF NOT EXISTS ingest_requests (
+  key TEXT PRIMARY KEY,
+  rows INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Delta sync: listings removed on a day, so rows carried forward from the previous day skip them
+CREATE TABLE IF NOT EXISTS listing_deletions (
+  source_id TEXT NOT NULL,
+  source TEXT NOT NULL,
+  recorded_at TEXT NOT NULL,
+  PRIMARY KEY (source_id, source, recorded_at)
+);
+
+-- Per-area daily price aggregates computed by the pipeline (area '' = no area); /api/trends
+-- reads these and aggregates price_history only for days without them
+CREATE TABLE IF NOT EXISTS area_daily_stats (
+  recorded_at TEXT NOT NULL,
+  area TEXT NOT NULL DEFAULT '',
+  count INTEGER NOT NULL,
+  avg_price REAL,
+  median_price REAL,
+  min_price REAL,
+  max_price REAL,
+  PRIMARY KEY (recorded_at, area)
+);
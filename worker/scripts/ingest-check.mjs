@@ -0,0 +1,117 @@
+#!/usr/bin/env node
+/**
+ * Check /api/ingest against a local Worker: every fixture body in test/fixtures
+ * (json, ndjson, msgpack; plain and gzipped) must decode to the rows in
+ * ingest.expected.json, and a chunk with bad rows must store every good row and
+ * report the bad ones: one rejected by validation, one D1 cannot bind, and one
+ * that fails inside a db.batch() (over D1's 2 MB string limit), so its batch
+ * falls back to per-row writes. Run against an empty local database:
+ *   npm run db:migrate:local && npx wrangler dev --local
+ *   npm run check:ingest
+ * API_URL (default http://127.0.0.1:8787) and INGEST_SECRET are read from the environment.
+ * The fixtures are written by pipeline/tests/test_serialize.py.
+ */
+import { readFileSync } from "node:fs";
+import { gzipSync } from "node:zlib";
+
+const API_URL = (process.env.API_URL || "http://127.0.0.1:8787").replace(/\/+$/, "");
+const FIXTURES = new URL("../test/fixtures/", import.meta.url);
+const CONTENT_TYPES = {
+  json: "application/json",
+  ndjson: "application/x-ndjson",
+  msgpack: "application/msgpack",
+};
+const FIELDS = ["source_id", "source", "title", "address", "area", "url", "price"];
+
+let failures = 0;
+
+function check(ok, message) {
+  console.log(`${ok ? "ok  " : "FAIL"} ${message}`);
+  if (!ok) failures++;
+}
+
+async function ingest(body, contentType, gzip = false) {
+  const headers = { "Content-Type": contentType };
+  if (process.env.INGEST_SECRET) headers["X-Ingest-Secret"] = process.env.INGEST_SECRET;
+  if (gzip) headers["Content-Encoding"] = "gzip";
+  const res = await fetch(`${API_URL}/api/ingest`, {
+    method: "POST",
+    headers,
+    body: gzip ? gzipSync(body) : body,
+  });
+  if (!res.ok) throw new Error(`POST /api/ingest: HTTP ${res.status} ${await res.text()}`);
+  return res.json();
+}
+
+async function listings(recordedAt, source) {
+  const res = await fetch(`${API_URL}/api/listings?recorded_at=${recordedAt}&limit=500`);
+  if (!res.ok) throw new Error(`GET /api/listings: HTTP ${res.status}`);
+  const { data } = await res.json();
+  return new Map(data.filter((l) => l.source === source).map((l) => [l.source_id, l]));
+}
+
+/** Fixture bodies: after overwriting the day's rows, each format must store the expected rows again. */
+async function checkFormats() {
+  const expected = JSON.parse(readFileSync(new URL("ingest.expected.json", FIXTURES), "utf8"));
+  const rows = expected.listings;
+  const stale = JSON.stringify({
+    recorded_at: expected.recorded_at,
+    listings: rows.map((l) => ({ ...l, title: "stale", address: null, area: null, url: null, price: 0 })),
+  });
+  for (const [format, contentType] of Object.entries(CONTENT_TYPES)) {
+    const body = readFileSync(new URL(`ingest.${format}`, FIXTURES));
+    for (const gzip of [false, true]) {
+      const name = `${format}${gzip ? " (gzip)" : ""}`;
+      await ingest(stale, CONTENT_TYPES.json);
+      const result = await ingest(body, contentType, gzip);
+      check(result.inserted === rows.length && result.errors === 0, `${name}: inserted ${result.inserted}/${rows.length}`);
+      const stored = await listings(expected.recorded_at, rows[0].source);
+      const wrong = rows.filter((l) => FIELDS.some((f) => (stored.get(l.source_id)?.[f] ?? null) !== l[f]));
+      check(wrong.length === 0, `${name}: stored rows match${wrong.length ? ` (${wrong.length} differ, e.g. ${wrong[0].source_id})` : ""}`);
+    }
+  }
+}
+
+/** A chunk with three bad rows: the other rows are stored, the bad ones reported with their index. */
+async function checkBadRows() {
+  const recordedAt = "2026-10-02";
+  const source = "ingest-check";
+  const rows = Array.from({ length: 150 }, (_, i) => ({
+    source_id: `bad-${i}`,
+    source,
+    title: `Listing ${i}`,
+    area: "Area 1",
+    price: 1000 + i,
+  }));
+  const bad = {
+    5: { ...rows[5], source_id: "" },                   // rejected before any write
+    42: { ...rows[42], title: "x".repeat(2_100_000) },  // fails in the first db.batch()
+    120: { ...rows[120], area: { name: "Area 1" } },    // D1 cannot bind an object
+  };
+  Object.assign(rows, bad);
+  const result = await ingest(JSON.stringify({ recorded_at: recordedAt, listings: rows }), CONTENT_TYPES.json);
+  const good = rows.length - Object.keys(bad).length;
+  check(result.inserted === good, `bad rows: inserted ${result.inserted}/${good}`);
+  check(result.errors === 3, `bad rows: errors ${result.errors}/3`);
+  const indexes = (result.error_samples || []).map((e) => e.index).sort((a, b) => a - b);
+  check(indexes.join() === "5,42,120", `bad rows: error_samples at [${indexes}]`);
+  const stored = await listings(recordedAt, source);
+  const missing = rows.filter((l, i) => !(i in bad) && !stored.has(l.source_id));
+  check(missing.length === 0 && stored.size === good, `bad rows: ${stored.size} rows stored, ${missing.length} good rows missing`);
+}
+
+async function main() {
+  console.log("Checking", `${API_URL}/api/ingest`);
+  await checkFormats();
+  await checkBadRows();
+  if (failures) {
+    console.error(`${failures} check(s) failed`);
+    process.exit(1);
+  }
+  console.log("All checks passed.");
+}
+
+main().catch((e) => {
+  console.error(e);
+  process.exit(1);
+});
@@ -6,7 +6,7 @@ export interface Env {
 const CORS_HEADERS: Record<string, string> = {
   "Access-Control-Allow-Origin": "*",
   "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-  "Access-Control-Allow-Headers": "Content-Type, X-Ingest-Secret",
+  "Access-Control-Allow-Headers": "Content-Type, Content-Encoding, X-Ingest-Secret, Idempotency-Key",
   "Access-Control-Max-Age": "86400",
 };
 
@@ -57,55 +57,355 @@ async function handleIngest(request: Request, env: Env): Promise<Response> {
   if (env.INGEST_SECRET && secret !== env.INGEST_SECRET) {
     return jsonResponse({ error: "Unauthorized" }, 401);
   }
-  const body = (await request.json()) as {
+  const idempotencyKey = request.headers.get("Idempotency-Key");
+  if (idempotencyKey) {
+    const seen = await env.DB.prepare("SELECT rows FROM ingest_requests WHERE key = ?")
+      .bind(idempotencyKey)
+      .first<{ rows: number }>();
+    if (seen) return jsonResponse({ ok: true, inserted: seen.rows, duplicate: true });
+  }
+  const body = (await readIngestBody(request)) as {
     recorded_at?: string;
-    listings?: Array<{
-      source_id: string;
-      source: string;
-      title: string;
-      address?: string;
-      area?: string;
-      url?: string;
-      price?: number;
-    }>;
+    mode?: "full" | "delta";
+    base_recorded_at?: string;
+    carry_forward?: boolean;
+    listings?: IngestListing[];
+    area_stats?: AreaStats[];
   };
   const recorded_at = body?.recorded_at || new Date().toISOString().slice(0, 10);
-  const listings = body?.listings || [];
-  if (listings.length === 0) return jsonResponse({ ok: true, inserted: 0 });
-
   const db = env.DB;
-  let inserted = 0;
-  for (const l of listings) {
-    try {
+  if (body?.area_stats) {
+    const inserted = await ingestAreaStats(db, recorded_at, body.area_stats);
+    if (idempotencyKey) {
       await db
-        .prepare(
-          `INSERT INTO listings (source_id, source, title, address, area, url, price, recorded_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)`
-        )
-        .bind(
-          l.source_id,
-          l.source,
-          l.title,
-          l.address ?? null,
-          l.area ?? null,
-          l.url ?? null,
-          l.price ?? null,
-          recorded_at
-        )
+        .prepare("INSERT OR IGNORE INTO ingest_requests (key, rows) VALUES (?, ?)")
+        .bind(idempotencyKey, inserted)
         .run();
-      await db
-        .prepare(
-          `INSERT OR REPLACE INTO price_history (source_id, source, area, price, recorded_at)
-           VALUES (?, ?, ?, ?, ?)`
-        )
-        .bind(l.source_id, l.source, l.area ?? null, l.price ?? null, recorded_at)
-        .run();
-      inserted++;
+    }
+    return jsonResponse({ ok: true, inserted });
+  }
+  const listings = body?.listings || [];
+  const delta = body?.mode === "delta";
+  if (listings.length === 0 && !(delta && body.carry_forward)) {
+    return jsonResponse({ ok: true, inserted: 0 });
+  }
+
+  const result = await ingestListings(db, recorded_at, listings);
+  if (delta && body.carry_forward && body.base_recorded_at && body.base_recorded_at !== recorded_at) {
+    await carryForward(db, body.base_recorded_at, recorded_at);
+  }
+  if (idempotencyKey) {
+    await db
+      .prepare("INSERT OR IGNORE INTO ingest_requests (key, rows) VALUES (?, ?)")
+      .bind(idempotencyKey, result.inserted)
+      .run();
+  }
+  return jsonResponse({ ok: true, ...result });
+}
+
+interface IngestListing {
+  source_id: string;
+  source: string;
+  title: string;
+  address?: string | null;
+  area?: string | null;
+  url?: string | null;
+  price?: number | null;
+  deleted?: boolean;
+}
+
+interface IngestResult {
+  inserted: number;
+  deleted: number;
+  errors: number;
+  error_samples: Array<{ index: number; source_id: unknown; error: string }>;
+}
+
+// Statements per db.batch() call: one round-trip, applied as one transaction
+const INGEST_BATCH_STATEMENTS = 200;
+// Failed rows described in the response (errors counts all of them)
+const MAX_ERROR_SAMPLES = 10;
+
+/** Why a listing row cannot be stored, or null when it is valid. */
+function invalidListing(l: IngestListing): string | null {
+  if (!l || typeof l !== "object") return "row is not an object";
+  if (typeof l.source_id !== "string" || !l.source_id) return "missing source_id";
+  if (typeof l.source !== "string" || !l.source) return "missing source";
+  if (l.deleted) return null;
+  if (typeof l.title !== "string") return "missing title";
+  if (l.price != null && typeof l.price !== "number") return "price is not a number";
+  return null;
+}
+
+/**
+ * Upsert listings and prices for recorded_at (rows marked deleted are removed for the day).
+ * Rows are written through reused prepared statements in db.batch() calls of at most
+ * INGEST_BATCH_STATEMENTS statements. A failed batch rolls back as a whole, so its rows
+ * are then retried one by one, and only the rows that fail again count as errors.
+ */
+async function ingestListings(db: D1Database, recorded_at: string, listings: IngestListing[]): Promise<IngestResult> {
+  const upsertListing = db.prepare(
+    `INSERT INTO listings (source_id, source, title, address, area, url, price, recorded_at)
+     VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8)
+     ON CONFLICT (source_id, source, recorded_at) DO UPDATE SET
+       title = excluded.title, address = excluded.address, area = excluded.area,
+       url = excluded.url, price = excluded.price`
+  );
+  const upsertPrice = db.prepare(
+    `INSERT INTO price_history (source_id, source, area, price, recorded_at)
+     VALUES (?1, ?2, ?3, ?4, ?5)
+     ON CONFLICT (source_id, source, recorded_at) DO UPDATE SET area = excluded.area, price = excluded.price`
+  );
+  const deleteListing = db.prepare("DELETE FROM listings WHERE source_id = ?1 AND source = ?2 AND recorded_at = ?3");
+  const deletePrice = db.prepare("DELETE FROM price_history WHERE source_id = ?1 AND source = ?2 AND recorded_at = ?3");
+  const markDeleted = db.prepare(
+    "INSERT OR IGNORE INTO listing_deletions (source_id, source, recorded_at) VALUES (?1, ?2, ?3)"
+  );
+
+  const result: IngestResult = { inserted: 0, deleted: 0, errors: 0, error_samples: [] };
+  const fail = (index: number, l: IngestListing, error: unknown) => {
+    result.errors++;
+    if (result.error_samples.length < MAX_ERROR_SAMPLES) {
+      const message = error instanceof Error ? error.message : String(error);
+      result.error_samples.push({ index, source_id: l?.source_id ?? null, error: message });
+    }
+  };
+  const applied = (l: IngestListing) => {
+    if (l.deleted) result.deleted++;
+    else result.inserted++;
+  };
+
+  type Row = { index: number; listing: IngestListing; statements: D1PreparedStatement[] };
+  let pending: Row[] = [];
+  let statements = 0;
+  const flush = async () => {
+    const rows = pending;
+    pending = [];
+    statements = 0;
+    if (rows.length === 0) return;
+    try {
+      await db.batch(rows.flatMap((r) => r.statements));
+      rows.forEach((r) => applied(r.listing));
     } catch (_) {
-      // skip duplicate or constraint error
+      for (const r of rows) {
+        try {
+          await db.batch(r.statements);
+          applied(r.listing);
+        } catch (e) {
+          fail(r.index, r.listing, e);
+        }
+      }
+    }
+  };
+
+  for (let index = 0; index < listings.length; index++) {
+    const l = listings[index];
+    const problem = invalidListing(l);
+    if (problem) {
+      fail(index, l, problem);
+      continue;
+    }
+    const key = [l.source_id, l.source, recorded_at] as const;
+    let rowStatements: D1PreparedStatement[];
+    try {
+      // bind() throws on values D1 cannot store (e.g. an object in area)
+      rowStatements = l.deleted
+        ? [deleteListing.bind(...key), deletePrice.bind(...key), markDeleted.bind(...key)]
+        : [
+            upsertListing.bind(
+              l.source_id, l.source, l.title, l.address ?? null, l.area ?? null, l.url ?? null, l.price ?? null, recorded_at
+            ),
+            upsertPrice.bind(l.source_id, l.source, l.area ?? null, l.price ?? null, recorded_at),
+          ];
+    } catch (e) {
+      fail(index, l, e);
+      continue;
+    }
+    pending.push({ index, listing: l, statements: rowStatements });
+    statements += rowStatements.length;
+    if (statements >= INGEST_BATCH_STATEMENTS) await flush();
+  }
+  await flush();
+  return result;
+}
+
+interface AreaStats {
+  area?: string | null;
+  count: number;
+  avg_price: number;
+  median_price: number;
+  min_price: number;
+  max_price: number;
+}
+
+/** Store the pipeline's precomputed per-area aggregates for one day (replaces earlier ones). */
+async function ingestAreaStats(db: D1Database, recorded_at: string, stats: AreaStats[]): Promise<number> {
+  if (stats.length === 0) return 0;
+  const stmt = db.prepare(
+    `INSERT OR REPLACE INTO area_daily_stats
+       (recorded_at, area, count, avg_price, median_price, min_price, max_price)
+     VALUES (?, ?, ?, ?, ?, ?, ?)`
+  );
+  for (let i = 0; i < stats.length; i += INGEST_BATCH_STATEMENTS) {
+    await db.batch(
+      stats
+        .slice(i, i + INGEST_BATCH_STATEMENTS)
+        .map((s) => stmt.bind(recorded_at, s.area ?? "", s.count, s.avg_price, s.median_price, s.min_price, s.max_price))
+    );
+  }
+  return stats.length;
+}
+
+/**
+ * Delta sync: copy unchanged rows from the last synced day to recorded_at. Rows already sent
+ * for recorded_at and listings marked deleted are skipped, so chunk order does not matter.
+ */
+async function carryForward(db: D1Database, base: string, recorded_at: string): Promise<void> {
+  await db
+    .prepare(
+      `INSERT INTO listings (source_id, source, title, address, area, url, price, currency, recorded_at)
+       SELECT p.source_id, p.source, p.title, p.address, p.area, p.url, p.price, p.currency, ?1
+       FROM listings p
+       WHERE p.recorded_at = ?2
+         AND NOT EXISTS (SELECT 1 FROM listings c
+                         WHERE c.recorded_at = ?1 AND c.source_id = p.source_id AND c.source = p.source)
+         AND NOT EXISTS (SELECT 1 FROM listing_deletions d
+                         WHERE d.recorded_at = ?1 AND d.source_id = p.source_id AND d.source = p.source)`
+    )
+    .bind(recorded_at, base)
+    .run();
+  await db
+    .prepare(
+      `INSERT OR IGNORE INTO price_history (source_id, source, area, price, recorded_at)
+       SELECT p.source_id, p.source, p.area, p.price, ?1
+       FROM price_history p
+       WHERE p.recorded_at = ?2
+         AND NOT EXISTS (SELECT 1 FROM listing_deletions d
+                         WHERE d.recorded_at = ?1 AND d.source_id = p.source_id AND d.source = p.source)`
+    )
+    .bind(recorded_at, base)
+    .run();
+}
+
+/** Request body as a byte stream, gunzipped when the pipeline sent it compressed. */
+async function bodyStream(request: Request): Promise<ReadableStream<Uint8Array>> {
+  const reader = request.body!.getReader();
+  const first = await reader.read();
+  const head = first.value ?? new Uint8Array();
+  const stream = new ReadableStream<Uint8Array>({
+    start(controller) {
+      if (head.length) controller.enqueue(head);
+      if (first.done) controller.close();
+    },
+    async pull(controller) {
+      const { done, value } = await reader.read();
+      if (done) controller.close();
+      else controller.enqueue(value);
+    },
+  });
+  // Check the gzip magic bytes too: the body may already have been decoded upstream
+  const gzipped = head.length > 2 && head[0] === 0x1f && head[1] === 0x8b;
+  return gzipped ? stream.pipeThrough(new DecompressionStream("gzip")) : stream;
+}
+
+/**
+ * Parse an ingest body: JSON, NDJSON (a header line naming the rows key in "rows",
+ * then one row per line, parsed as it streams in) or msgpack, by Content-Type.
+ */
+async function readIngestBody(request: Request): Promise<unknown> {
+  if (!request.body) return {};
+  const type = (request.headers.get("Content-Type") || "").split(";")[0].trim().toLowerCase();
+  const stream = await bodyStream(request);
+  if (type === "application/x-ndjson") return readNdjson(stream);
+  if (type === "application/msgpack" || type === "application/x-msgpack") {
+    return decodeMsgpack(new Uint8Array(await new Response(stream).arrayBuffer()));
+  }
+  return JSON.parse(await new Response(stream).text());
+}
+
+async function readNdjson(stream: ReadableStream<Uint8Array>): Promise<unknown> {
+  const reader = stream.pipeThrough(new TextDecoderStream()).getReader();
+  let header: Record<string, unknown> | null = null;
+  const rows: unknown[] = [];
+  let buffer = "";
+  const take = (line: string) => {
+    if (!line.trim()) return;
+    if (header) rows.push(JSON.parse(line));
+    else header = JSON.parse(line) as Record<string, unknown>;
+  };
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let end: number;
+    while ((end = buffer.indexOf("\n")) >= 0) {
+      take(buffer.slice(0, end));
+      buffer = buffer.slice(end + 1);
     }
   }
-  return jsonResponse({ ok: true, inserted });
+  take(buffer);
+  const body: Record<string, unknown> = header ?? {};
+  const key = typeof body.rows === "string" ? body.rows : "listings";
+  delete body.rows;
+  body[key] = rows;
+  return body;
+}
+
+/** Decode one msgpack value (maps become objects, bin becomes Uint8Array; no extension types). */
+function decodeMsgpack(bytes: Uint8Array): unknown {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const text = new TextDecoder();
+  let pos = 0;
+  const str = (n: number) => text.decode(bytes.subarray(pos, (pos += n)));
+  const array = (n: number) => {
+    const out = new Array(n);
+    for (let i = 0; i < n; i++) out[i] = value();
+    return out;
+  };
+  const map = (n: number) => {
+    const out: Record<string, unknown> = {};
+    for (let i = 0; i < n; i++) {
+      const key = String(value());
+      out[key] = value();
+    }
+    return out;
+  };
+  const value = (): unknown => {
+    const b = bytes[pos++];
+    if (b <= 0x7f) return b;
+    if (b >= 0xe0) return b - 0x100;
+    if ((b & 0xf0) === 0x80) return map(b & 0x0f);
+    if ((b & 0xf0) === 0x90) return array(b & 0x0f);
+    if ((b & 0xe0) === 0xa0) return str(b & 0x1f);
+    let v: number;
+    switch (b) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: v = bytes[pos]; pos += 1; return bytes.slice(pos, (pos += v));
+      case 0xc5: v = view.getUint16(pos); pos += 2; return bytes.slice(pos, (pos += v));
+      case 0xc6: v = view.getUint32(pos); pos += 4; return bytes.slice(pos, (pos += v));
+      case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+      case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+      case 0xcc: v = bytes[pos]; pos += 1; return v;
+      case 0xcd: v = view.getUint16(pos); pos += 2; return v;
+      case 0xce: v = view.getUint32(pos); pos += 4; return v;
+      case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+      case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+      case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+      case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+      case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+      case 0xd9: v = bytes[pos]; pos += 1; return str(v);
+      case 0xda: v = view.getUint16(pos); pos += 2; return str(v);
+      case 0xdb: v = view.getUint32(pos); pos += 4; return str(v);
+      case 0xdc: v = view.getUint16(pos); pos += 2; return array(v);
+      case 0xdd: v = view.getUint32(pos); pos += 4; return array(v);
+      case 0xde: v = view.getUint16(pos); pos += 2; return map(v);
+      case 0xdf: v = view.getUint32(pos); pos += 4; return map(v);
+    }
+    throw new Error(`Unsupported msgpack type 0x${b.toString(16)}`);
+  };
+  return value();
 }
 
 async function handleListings(
@@ -145,22 +445,36 @@ async function handleTrends(
   startDate.setDate(startDate.getDate() - days);
   const start = startDate.toISOString().slice(0, 10);
 
-  let query = `
-    SELECT recorded_at as date, area, AVG(price) as avg_price, COUNT(*) as count
+  // Precomputed aggregates where the pipeline sent them; raw price_history only for other days
+  // (e.g. runs that post listings straight to the Worker, without the database)
+  const areaFilter = area ? " AND area = ?2" : "";
+  const query = `
+    SELECT recorded_at as date, NULLIF(area, '') as area, avg_price, median_price, min_price, max_price, count
+    FROM area_daily_stats
+    WHERE recorded_at >= ?1${areaFilter}
+    UNION ALL
+    SELECT recorded_at as date, area, AVG(price) as avg_price, NULL as median_price,
+           MIN(price) as min_price, MAX(price) as max_price, COUNT(*) as count
     FROM price_history
-    WHERE recorded_at >= ? AND price IS NOT NULL
+    WHERE recorded_at >= ?1 AND price IS NOT NULL${areaFilter}
+      AND recorded_at NOT IN (SELECT DISTINCT recorded_at FROM area_daily_stats WHERE recorded_at >= ?1)
+    GROUP BY recorded_at, area
+    ORDER BY date ASC
   `;
-  const bind: (string | number)[] = [start];
-  if (area) {
-    query += " AND area = ?";
-    bind.push(area);
-  }
-  query += " GROUP BY recorded_at, area ORDER BY recorded_at ASC";
+  const bind: (string | number)[] = area ? [start, area] : [start];
 
   const { results } = await db
     .prepare(query)
     .bind(...bind)
-    .all<{ date: string; area: string | null; avg_price: number; count: number }>();
+    .all<{
+      date: string;
+      area: string | null;
+      avg_price: number;
+      median_price: number | null;
+      min_price: number;
+      max_price: number;
+      count: number;
+    }>();
   return jsonResponse({ data: results });
 }
 